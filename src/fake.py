@@ -1,21 +1,89 @@
-from faker import Faker
-from faker.providers import company, file, internet, person, job
-from faker_music import MusicProvider
-from faker_vehicle import VehicleProvider
+from typing import TYPE_CHECKING
+from utils.seeding import RandomSource, resolve_random
 
-fake: Faker | None = None
+if TYPE_CHECKING:
+    from faker import Faker
 
-def get_fake() -> Faker:
+# Faker (and its plugins) take a while to import, so nothing here is imported until a generator
+# actually asks for a Faker instance.
+fake: "Faker | None" = None
+fake_seed: int | None = None
+
+def load_music_provider():
+    from faker_music import MusicProvider
+    return MusicProvider
+
+def load_vehicle_provider():
+    from faker_vehicle import VehicleProvider
+    return VehicleProvider
+
+# Providers that are not part of Faker's en_US defaults, keyed by the name used to request them.
+EXTRA_PROVIDERS = {
+    "music": load_music_provider,
+    "vehicle": load_vehicle_provider
+}
+
+def seed_fake(seed: int) -> None:
+    """
+        Seed Faker's shared random generator. If Faker has not been imported yet, the seed is
+        applied when the instance is first created instead.
+    """
+    global fake_seed
+    fake_seed = seed
+
+    if fake is not None:
+        from faker import Faker
+        Faker.seed(seed)
+
+def get_fake(*providers: str) -> "Faker":
+    """
+        Get the shared en_US Faker instance, creating it on first use.
+
+        :param providers: Names of extra providers (see EXTRA_PROVIDERS) the caller needs. Each is only
+        imported and registered the first time it is requested.
+    """
     global fake
-    
+
     if fake is None:
+        from faker import Faker
+
         fake = Faker("en_US")
-        fake.add_provider(company)
-        fake.add_provider(file)
-        fake.add_provider(internet)
-        fake.add_provider(person)
-        fake.add_provider(job)
-        fake.add_provider(MusicProvider)
-        fake.add_provider(VehicleProvider)
-
-    return fake
\ No newline at end of file
+        if fake_seed is not None:
+            Faker.seed(fake_seed)
+
+    return add_fake_providers(fake, *providers)
+
+def create_fake(*providers: str, rng: RandomSource | None = None) -> "Faker":
+    """
+        Create a separate en_US Faker instance with its own random generator, for callers (such as threads)
+        that must not share the global one.
+
+        :param providers: Names of extra providers (see EXTRA_PROVIDERS) to register.
+        :param rng: The generator the instance should draw from. Pass the same one given to a generator's `rng`
+        to keep all of its draws on one stream. If None, the instance gets a new, randomly seeded generator.
+    """
+    from faker import Faker
+
+    fake = Faker("en_US")
+    if rng is None:
+        fake.seed_instance()
+    else:
+        fake.random = resolve_random(rng)
+
+    return add_fake_providers(fake, *providers)
+
+def add_fake_providers(fake: "Faker", *providers: str) -> "Faker":
+    """
+        Register the named extra providers (see EXTRA_PROVIDERS) on a Faker instance, unless they already are.
+
+        :return: The same instance.
+    """
+    for provider in providers:
+        if provider not in EXTRA_PROVIDERS:
+            raise ValueError(f"Unknown Faker provider '{provider}'. Valid providers are: {', '.join(EXTRA_PROVIDERS)}.")
+
+        provider_class = EXTRA_PROVIDERS[provider]()
+        if not any(isinstance(existing, provider_class) for existing in fake.providers):
+            fake.add_provider(provider_class)
+
+    return fake
@@ -1,7 +1,17 @@
-# Import from subfiles here so that they can be imported directly from the parent package.
-from .color import *
-from .phone import *
-from .ssn import *
-from .address import *
-from .typos import *
-from .name import *
\ No newline at end of file
+# Names from the subfiles can be imported directly from the parent package, but each subfile is only
+# imported the first time one of its names is looked up (PEP 562). That way an SSN run never pays for
+# importing Faker, NLTK or scipy.
+import importlib
+
+# Searched in order, cheapest first
+SUBMODULES = ["ssn", "phone", "color", "typos", "address", "name", "record"]
+
+def __getattr__(name: str):
+    for submodule_name in SUBMODULES:
+        submodule = importlib.import_module(f".{submodule_name}", __name__)
+        if hasattr(submodule, name):
+            value = getattr(submodule, name)
+            globals()[name] = value
+            return value
+
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
@@ -1,15 +1,42 @@
+import re
+import numpy as np
 from warnings import warn
-import random
+from typing import TYPE_CHECKING, Callable
 from fake import get_fake
+from utils.math import WeightedSampler
+from utils.seeding import RandomSource, resolve_random, resolve_generator
 import utils.location as location_utils
-from .pytypes import AddressArgs
+from utils.log import get_logger
+from .pytypes import AddressArgs, AddressParts, AddressPartsBatch
+
+if TYPE_CHECKING:
+    from faker import Faker
+
+logger = get_logger("address")
 
 ZIPCODE_MIN = 0
 ZIPCODE_MAX = 99999
+ADDRESS_FORMAT = "{building_number} {street}, {city} {state}, {zip}"
+ADDRESS_PARTS = ["building_number", "street", "city", "state", "zip"]
+
+# A "{{token}}" in one of Faker's street name formats
+FAKER_TOKEN_REGEX = re.compile(r'\{\{\s*(\w+)\s*\}\}')
 
-def gen_address(data: AddressArgs={}, state_abbr: bool = True, existing_city: bool = True, log: bool = False) -> str:
+# Built by get_street_samplers the first time a batch needs street names
+street_samplers: dict[str, WeightedSampler] | None = None
+
+def gen_address_parts(
+        data: AddressArgs={},
+        state_abbr: bool = True,
+        existing_city: bool = True,
+        log: bool = False,
+        *,
+        population_weighted: bool = False,
+        rng: RandomSource | None = None,
+        fake: "Faker | None" = None
+    ) -> AddressParts:
     """
-        Generate a random US address using the Faker library.
+        Generate a random US address using the Faker library, as its separate parts.
         These components can be optionally specified in the input dictionary:
         - building_number
         - street
@@ -24,9 +51,16 @@ def gen_address(data: AddressArgs={}, state_abbr: bool = True, existing_city: bo
 
         :param data: A dictionary with optional keys: 'street', 'city', 'state', 'zip'.
         :param existing_city: Whether to use existing city names in a resolved state, or generate completely random city names.
-        :return: A formatted address string.
+        :param population_weighted: Whether to pick random states, cities and zip codes with probability proportional to their
+        population (per the zip code database) instead of uniformly. Falls back to uniform picks where there is no population data.
+        :param rng: The generator to draw from. If None, the global random module is used.
+        :param fake: The Faker instance to draw from. If None, the shared one is used. Pass one made by
+        `fake.create_fake` with the same `rng` to keep every draw on one stream.
+        :return: The address parts. Use `format_address` to get the address string.
     """
-    fake = get_fake()
+    rng = resolve_random(rng)
+    if fake is None:
+        fake = get_fake()
     
     city = data.get('city')
     state = location_utils.normalize_state_name(data.get('state'), state_abbr)
@@ -35,50 +69,61 @@ def gen_address(data: AddressArgs={}, state_abbr: bool = True, existing_city: bo
     zip = data.get('zip')
 
     def random_state():
+        if population_weighted:
+            return location_utils.pick_state_by_population(rng)
+
         states = location_utils.get_all_us_states()
-        return random.choice(states)['abbr']
+        return rng.choice(states).abbr
     
     def random_city() -> str:
         return fake.city()
     
     def random_city_existing(state: str) -> str:
+        if population_weighted:
+            city = location_utils.pick_city_by_population(state, rng)
+            if city is not None:
+                return city
+
         cities = location_utils.get_cities_by_state(state)
-        return random.choice(cities)
+        if len(cities) == 0:
+            # No major cities are listed for this state, so there is nothing to pick from
+            return random_city()
+        return rng.choice(cities)
     
     def is_valid_zip(zip_code: str) -> bool:
         return zip_code.isdigit() and (ZIPCODE_MIN <= int(zip_code) <= ZIPCODE_MAX)
     
     def random_zip():
-        return str(random.randint(ZIPCODE_MIN, ZIPCODE_MAX)).zfill(5)
+        return str(rng.randint(ZIPCODE_MIN, ZIPCODE_MAX)).zfill(5)
 
     if zip is not None:
         if not is_valid_zip(zip):
-            if log: print(f"Provided zip code '{zip}' is not valid. Generating a random zip code.")
+            if log: logger.debug("Provided zip code '%s' is not valid. Generating a random zip code.", zip)
             zip = random_zip()
-            if log: print(f"Using zip code '{zip}'.")
+            if log: logger.debug("Using zip code '%s'.", zip)
 
         correct_city_state = location_utils.get_city_state_by_zipcode(zip)
         correct_city_state_found = correct_city_state is not None
 
         if not correct_city_state_found:
-            if log: print(f"Could not find city/state for provided zip code '{zip}'. Generating random values.")
+            if log: logger.debug("Could not find city/state for provided zip code '%s'. Generating random values.", zip)
 
             if city and not state:
                 try:
                     state_options = location_utils.find_states_with_city(city)
                     if len(state_options) == 0:
                         state = random_state()
-                        if log: print(f"No states found with city '{city}'. Randomly selected state '{state}'.")
+                        if log: logger.debug("No states found with city '%s'. Randomly selected state '%s'.", city, state)
                     else:
-                        state = random.choice(state_options)
-                        if log: print(f"Found states {state_options} with city '{city}'. Randomly selected state '{state}'.")
+                        state = rng.choice(state_options)
+                        if log: logger.debug("Found states %s with city '%s'. Randomly selected state '%s'.", state_options, city, state)
                 except:
                     state = random_state()
-                    if log: print(f"Error looking up states for city '{city}'. Randomly selected state '{state}'.")
+                    if log: logger.debug("Error looking up states for city '%s'. Randomly selected state '%s'.", city, state)
             
             state = state or random_state()
             city = city or (random_city_existing(state) if existing_city else random_city())
-            if log: print(f"Using city '{city}' and state '{state}' for zip code '{zip}'.")
+            if log: logger.debug("Using city '%s' and state '%s' for zip code '%s'.", city, state, zip)
         else:
             correct_city, correct_state = correct_city_state
             city_matches = (city is None) or (city.lower() == correct_city.lower())
@@ -86,10 +131,10 @@ def gen_address(data: AddressArgs={}, state_abbr: bool = True, existing_city: bo
             
             # Do not override the user's choice to have these mismatches; just warn them.
             if not city_matches:
-                print(f"Provided city '{city}' does not match city '{correct_city}' for zip code '{zip}'. Using provided city.")
+                warn(f"Provided city '{city}' does not match city '{correct_city}' for zip code '{zip}'. Using provided city.")
 
             if not state_matches:
-                print(f"Provided state '{state}' does not match state '{correct_state}' for zip code '{zip}'. Using provided state.")
+                warn(f"Provided state '{state}' does not match state '{correct_state}' for zip code '{zip}'. Using provided state.")
 
             if city is None: city = correct_city
             if state is None: state = correct_state
@@ -100,37 +145,41 @@ def gen_address(data: AddressArgs={}, state_abbr: bool = True, existing_city: bo
                     state_options = location_utils.find_states_with_city(city)
                     if len(state_options) == 0:
                         state = random_state()
-                        if log: print(f"No states found with city '{city}'. Randomly selected state '{state}'.")
+                        if log: logger.debug("No states found with city '%s'. Randomly selected state '%s'.", city, state)
                     else:
-                        state = random.choice(state_options)
-                        if log: print(f"Found states {state_options} with city '{city}'. Randomly selected state '{state}'.")
+                        state = rng.choice(state_options)
+                        if log: logger.debug("Found states %s with city '%s'. Randomly selected state '%s'.", state_options, city, state)
                 except:
                     state = random_state()
-                    if log: print(f"Error looking up states for city '{city}'. Randomly selected state '{state}'.")
+                    if log: logger.debug("Error looking up states for city '%s'. Randomly selected state '%s'.", city, state)
             else:
                 state = random_state()
                 if log:
-                    print(f"No state provided; randomly selected state '{state}'.")
+                    logger.debug("No state provided; randomly selected state '%s'.", state)
 
         if city is None:
             city = random_city_existing(state) if existing_city else random_city()
             if log:
-                print(f"No city provided; randomly selected city '{city}' for state '{state}'.")
+                logger.debug("No city provided; randomly selected city '%s' for state '%s'.", city, state)
 
         try:
             zips = location_utils.get_zipcodes_by_city(city, state)
-            if len(zips) == 0:
-                if log: print(f"No zip codes found for city '{city}', state '{state}'. Generating a random zip code.")
+            weighted_zip = location_utils.pick_zipcode_by_population(city, state, rng) if population_weighted and len(zips) > 0 else None
+            if weighted_zip is not None:
+                zip = weighted_zip
+                if log: logger.debug("Selected zip code '%s' for city '%s', state '%s' weighted by population.", zip, city, state)
+            elif len(zips) == 0:
+                if log: logger.debug("No zip codes found for city '%s', state '%s'. Generating a random zip code.", city, state)
                 zip = random_zip()
-                if log: print(f"Using zip code '{zip}' for city '{city}', state '{state}'.")
+                if log: logger.debug("Using zip code '%s' for city '%s', state '%s'.", zip, city, state)
             else:
-                if log: print(f"Found {len(zips)} zip code(s) for city '{city}', state '{state}'. Selecting one at random.")
-                zip = random.choice(zips)
-                if log: print(f"Selected zip code '{zip}' for city '{city}', state '{state}'.")
+                if log: logger.debug("Found %s zip code(s) for city '%s', state '%s'. Selecting one at random.", len(zips), city, state)
+                zip = rng.choice(zips)
+                if log: logger.debug("Selected zip code '%s' for city '%s', state '%s'.", zip, city, state)
         except:
-            if log: print(f"Error looking up zip codes for city '{city}', state '{state}'. Generating a random zip code.")
+            if log: logger.debug("Error looking up zip codes for city '%s', state '%s'. Generating a random zip code.", city, state)
             zip = random_zip()
-            if log: print(f"Using zip code '{zip}' for city '{city}', state '{state}'.")
+            if log: logger.debug("Using zip code '%s' for city '%s', state '%s'.", zip, city, state)
     
     building_number = data.get('building_number')
     street = data.get('street')
@@ -141,5 +190,275 @@ def gen_address(data: AddressArgs={}, state_abbr: bool = True, existing_city: bo
     building_number = building_number or fake.building_number()
     street = street or fake.street_name()
 
-    address = f"{building_number} {street}, {city} {state}, {zip}"
-    return address
\ No newline at end of file
+    return {
+        'building_number': building_number,
+        'street': street,
+        'city': city,
+        'state': state,
+        'zip': zip
+    }
+
+def format_address(parts: AddressParts) -> str:
+    """
+        Format address parts from `gen_address_parts` as "BUILDING_NUMBER STREET, CITY STATE, ZIP".
+    """
+    return ADDRESS_FORMAT.format(**parts)
+
+def get_street_samplers(fake: "Faker") -> dict[str, WeightedSampler]:
+    """
+        Get samplers over the lists Faker fills its street name formats from, so that a batch of street names can
+        be drawn in bulk instead of one `street_name()` call at a time. Keys are the tokens of the formats
+        (e.g. "last_name" for "{{last_name}} {{street_suffix}}"). Built the first time they are needed, and
+        reused after that.
+    """
+    global street_samplers
+
+    if street_samplers is None:
+        person = fake.provider("faker.providers.person")
+        address = fake.provider("faker.providers.address")
+        street_samplers = {
+            "first_name": WeightedSampler([(weight, name) for name, weight in person.first_names.items()]),
+            "last_name": WeightedSampler([(weight, name) for name, weight in person.last_names.items()]),
+            "street_suffix": WeightedSampler([(1, suffix) for suffix in address.street_suffixes])
+        }
+
+    return street_samplers
+
+def gen_building_numbers(n: int, formats: tuple[str, ...], generator: np.random.Generator) -> list[str]:
+    """
+        Fill `n` building number formats (picked uniformly) in bulk, the way Faker's `numerify` does:
+        '#' is any digit, '%' any non-zero digit, and anything else is kept as it is.
+    """
+    result = np.empty(n, dtype=object)
+    choices = generator.integers(0, len(formats), size=n)
+    for i, number_format in enumerate(formats):
+        rows = np.flatnonzero(choices == i)
+        if len(rows) == 0:
+            continue
+
+        chars = np.empty((len(rows), len(number_format)), dtype='<U1')
+        for position, c in enumerate(number_format):
+            if c == '#':
+                chars[:, position] = generator.integers(0, 10, size=len(rows)).astype('<U1')
+            elif c == '%':
+                chars[:, position] = generator.integers(1, 10, size=len(rows)).astype('<U1')
+            else:
+                chars[:, position] = c
+        # Each row of single characters is read back as one string of the format's length
+        result[rows] = chars.view(f'<U{len(number_format)}').ravel().tolist()
+
+    return result.tolist()
+
+def gen_street_names(n: int, fake: "Faker", generator: np.random.Generator) -> list[str]:
+    """
+        Fill `n` of Faker's street name formats (picked uniformly) in bulk, drawing each token's values through
+        `get_street_samplers`. Tokens without a sampler are filled by calling Faker once per row.
+    """
+    samplers = get_street_samplers(fake)
+    formats = fake.provider("faker.providers.address").street_name_formats
+
+    result = np.empty(n, dtype=object)
+    choices = generator.integers(0, len(formats), size=n)
+    for i, street_format in enumerate(formats):
+        rows = np.flatnonzero(choices == i)
+        if len(rows) == 0:
+            continue
+
+        # Literal text and token values alternate: literals are at even positions, tokens at odd ones
+        pieces = FAKER_TOKEN_REGEX.split(street_format)
+        columns: list[list[str]] = []
+        for position, piece in enumerate(pieces):
+            if position % 2 == 0:
+                columns.append([piece] * len(rows))
+            elif piece in samplers:
+                columns.append(samplers[piece].sample(len(rows), generator))
+            else:
+                columns.append([str(getattr(fake, piece)()) for _ in range(len(rows))])
+        result[rows] = [''.join(row) for row in zip(*columns)]
+
+    return result.tolist()
+
+def gen_address_parts_batch(
+        n: int,
+        data: AddressArgs={},
+        state_abbr: bool = True,
+        existing_city: bool = True,
+        log: bool = False,
+        *,
+        population_weighted: bool = False,
+        rng: RandomSource | None = None,
+        fake: "Faker | None" = None
+    ) -> AddressPartsBatch:
+    """
+        Vectorized `gen_address_parts`. Generates `n` addresses at once, as one list per part. The lookups that
+        only depend on `data` are done once for the whole batch; states, cities and zip codes are then picked per
+        distinct state (or city) in bulk, and building numbers and street names are drawn in bulk instead of
+        through one Faker call per address.
+
+        As in `gen_address_parts`, an invalid zip code is replaced by a random one for each address, and addresses
+        whose zip code is not in the database get a random location.
+
+        :param rng: The generator to draw from. If None, one is seeded from the global random module.
+        :param fake: The Faker instance to draw from. If None, the shared one is used.
+        :return: The parts of every address. Use `format_addresses` to get the address strings.
+    """
+    generator = resolve_generator(rng)
+    if fake is None:
+        fake = get_fake()
+
+    city = data.get('city')
+    state = location_utils.normalize_state_name(data.get('state'), state_abbr)
+    zip_code = data.get('zip')
+
+    if state is None and data.get('state') is not None:
+        warn(f"State name {data.get('state')} could not be normalized; it may not correspond to a valid US state abbreviation or name.")
+
+    def random_states(k: int) -> list[str]:
+        if population_weighted:
+            return location_utils.pick_states_by_population(k, generator)
+
+        states = location_utils.get_all_us_states()
+        return [states[i].abbr for i in generator.integers(0, len(states), size=k).tolist()]
+
+    def random_zips(k: int) -> list[str]:
+        return [str(value).zfill(5) for value in generator.integers(ZIPCODE_MIN, ZIPCODE_MAX + 1, size=k).tolist()]
+
+    def fill_by_group(keys: list, pick: Callable[..., list[str]]) -> list[str]:
+        # Rows sharing a key (a state, or a city and state) are filled with one bulk pick
+        groups: dict = {}
+        for row, key in enumerate(keys):
+            groups.setdefault(key, []).append(row)
+
+        values: list[str] = [""] * len(keys)
+        for key, rows in groups.items():
+            for row, value in zip(rows, pick(key, len(rows))):
+                values[row] = value
+        return values
+
+    def existing_cities(state: str, k: int) -> list[str]:
+        if population_weighted:
+            cities = location_utils.pick_cities_by_population(state, k, generator)
+            if cities is not None:
+                return cities
+
+        cities = location_utils.get_cities_by_state(state)
+        if len(cities) == 0:
+            # No major cities are listed for this state, so there is nothing to pick from
+            return [fake.city() for _ in range(k)]
+        return [cities[i] for i in generator.integers(0, len(cities), size=k).tolist()]
+
+    def zips_for_city(city_state: tuple[str, str], k: int) -> list[str]:
+        city, state = city_state
+        try:
+            zips = location_utils.get_zipcodes_by_city(city, state)
+            weighted_zips = location_utils.pick_zipcodes_by_population(city, state, k, generator) if population_weighted and len(zips) > 0 else None
+        except:
+            return random_zips(k)
+
+        if weighted_zips is not None:
+            return weighted_zips
+        if len(zips) == 0:
+            return random_zips(k)
+        return [zips[i] for i in generator.integers(0, len(zips), size=k).tolist()]
+
+    def resolve_states_and_cities(k: int) -> tuple[list[str], list[str]]:
+        if state is not None:
+            states = [state] * k
+        elif city is not None:
+            try:
+                state_options = location_utils.find_states_with_city(city)
+            except:
+                state_options = ()
+            if len(state_options) == 0:
+                states = random_states(k)
+            else:
+                states = [state_options[i] for i in generator.integers(0, len(state_options), size=k).tolist()]
+        else:
+            states = random_states(k)
+
+        if city is not None:
+            cities = [city] * k
+        elif existing_city:
+            cities = fill_by_group(states, existing_cities)
+        else:
+            cities = [fake.city() for _ in range(k)]
+
+        return states, cities
+
+    if zip_code is None:
+        states, cities = resolve_states_and_cities(n)
+        zips = fill_by_group(list(zip(cities, states)), zips_for_city)
+    else:
+        is_valid_zip = zip_code.isdigit() and (ZIPCODE_MIN <= int(zip_code) <= ZIPCODE_MAX)
+        zips = [zip_code] * n if is_valid_zip else random_zips(n)
+        city_states = {row_zip: location_utils.get_city_state_by_zipcode(row_zip) for row_zip in set(zips)}
+
+        # Addresses whose zip code is not in the database get a random location, like when no zip code is given
+        unknown_rows = [row for row, row_zip in enumerate(zips) if city_states[row_zip] is None]
+        states = [""] * n
+        cities = [""] * n
+        for row, random_state, random_city in zip(unknown_rows, *resolve_states_and_cities(len(unknown_rows))):
+            states[row] = random_state
+            cities[row] = random_city
+
+        # Each distinct mismatch is only warned about once
+        mismatches: dict[str, None] = {}
+        for row, row_zip in enumerate(zips):
+            if city_states[row_zip] is None:
+                continue
+
+            correct_city, correct_state = city_states[row_zip]
+            # Do not override the user's choice to have these mismatches; just warn them.
+            if city is not None and city.lower() != correct_city.lower():
+                mismatches[f"Provided city '{city}' does not match city '{correct_city}' for zip code '{row_zip}'. Using provided city."] = None
+            if state is not None and state.lower() != correct_state.lower():
+                mismatches[f"Provided state '{state}' does not match state '{correct_state}' for zip code '{row_zip}'. Using provided state."] = None
+
+            cities[row] = city or correct_city
+            states[row] = state or correct_state
+
+        for message in mismatches:
+            warn(message)
+
+    building_number = data.get('building_number')
+    street = data.get('street')
+
+    if building_number and street:
+        warn(f"The specified street address ('{building_number} {street}') may correspond to a real location.")
+
+    building_numbers = [building_number] * n if building_number else gen_building_numbers(n, fake.provider("faker.providers.address").building_number_formats, generator)
+    streets = [street] * n if street else gen_street_names(n, fake, generator)
+
+    if log: logger.info("Generated %s address(es) in bulk.", n)
+
+    return {
+        'building_number': building_numbers,
+        'street': streets,
+        'city': cities,
+        'state': states,
+        'zip': zips
+    }
+
+def format_addresses(parts: AddressPartsBatch) -> list[str]:
+    """
+        Vectorized `format_address`. Formats every address of a batch from `gen_address_parts_batch`.
+    """
+    return [
+        ADDRESS_FORMAT.format(building_number=building_number, street=street, city=city, state=state, zip=zip_code)
+        for building_number, street, city, state, zip_code in zip(*(parts[part] for part in ADDRESS_PARTS))
+    ]
+
+def gen_address(
+        data: AddressArgs={},
+        state_abbr: bool = True,
+        existing_city: bool = True,
+        log: bool = False,
+        *,
+        population_weighted: bool = False,
+        rng: RandomSource | None = None,
+        fake: "Faker | None" = None
+    ) -> str:
+    """
+        Generate a random US address as a formatted string. See `gen_address_parts` for the parameters.
+    """
+    return format_address(gen_address_parts(data, state_abbr, existing_city, log, population_weighted=population_weighted, rng=rng, fake=fake))
\ No newline at end of file
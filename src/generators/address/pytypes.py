@@ -5,4 +5,18 @@ class AddressArgs(TypedDict):
     street: NotRequired[str | None]
     city: NotRequired[str | None]
     state: NotRequired[str | None]
-    zip: NotRequired[str | None]
\ No newline at end of file
+    zip: NotRequired[str | None]
+
+class AddressParts(TypedDict):
+    building_number: str
+    street: str
+    city: str
+    state: str
+    zip: str
+
+class AddressPartsBatch(TypedDict):
+    building_number: list[str]
+    street: list[str]
+    city: list[str]
+    state: list[str]
+    zip: list[str]
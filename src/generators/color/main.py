@@ -1,11 +1,19 @@
-import random
+import numpy as np
 from utils.colors import *
 from utils.math import clamp
+from utils.seeding import RandomSource, resolve_random, resolve_generator
+from utils.log import get_logger
 from .pytypes import ColorArgs
 
+logger = get_logger("color")
+
+COLOR_FORMAT = "{} - rgb({}, {}, {}), hex: {}, hsl({:.2f}, {:.2f}%, {:.2f}%), cmyk({:.2f}%, {:.2f}%, {:.2f}%, {:.2f}%)"
+
 def gen_color(
         args: ColorArgs = {},
-        log: bool = False
+        log: bool = False,
+        *,
+        rng: RandomSource | None = None
     ) -> str:
     """
         Generate a random color, represent it in Hex, RGB, and HSL formats, name the color, and return a formatted string with all this information.
@@ -19,7 +27,13 @@ def gen_color(
         :param min_b: Minimum blue value (0-255)
         :param max_b: Maximum blue value (0-255)
         :param exact_b: If specified, use this exact blue value instead of generating a random one.
+        :param perceptual: If True, name the color by its nearest palette entry in CIELAB instead of raw RGB.
+        :param lut: If True, name the color through the precomputed lookup table; if False, through the KD-tree.
+        If None, the table is used only if it has already been loaded (as --color-lut does).
+        :param rng: The generator to draw from. If None, the global random module is used.
     """
+    rng = resolve_random(rng)
+
     min_r = clamp(args.get('min_r', 0), 0, 255, log)
     max_r = clamp(args.get('max_r', 255), 0, 255, log)
     min_g = clamp(args.get('min_g', 0), 0, 255, log)
@@ -32,14 +46,68 @@ def gen_color(
     exact_b = args.get('exact_b')
 
     rgb: RGB = {
-        'r': clamp(exact_r if exact_r is not None else random.randint(min_r, max_r), 0, 255, log),
-        'g': clamp(exact_g if exact_g is not None else random.randint(min_g, max_g), 0, 255, log),
-        'b': clamp(exact_b if exact_b is not None else random.randint(min_b, max_b), 0, 255, log)
+        'r': clamp(exact_r if exact_r is not None else rng.randint(min_r, max_r), 0, 255, log),
+        'g': clamp(exact_g if exact_g is not None else rng.randint(min_g, max_g), 0, 255, log),
+        'b': clamp(exact_b if exact_b is not None else rng.randint(min_b, max_b), 0, 255, log)
     }
 
     hex: str = rgb_to_hex(rgb)
     hsl: HSL = rgb_to_hsl(rgb)
     cmyk: CMYK = rgb_to_cmyk(rgb)
-    name: str = nearest_color(rgb)
+    name: str = nearest_color(rgb, args.get('perceptual', False), args.get('lut'))
+
+    return COLOR_FORMAT.format(name, rgb['r'], rgb['g'], rgb['b'], hex, hsl['h'], hsl['s'], hsl['l'], cmyk['c'], cmyk['m'], cmyk['y'], cmyk['k'])
+
+def gen_color_batch(
+        args: ColorArgs = {},
+        count: int = 1,
+        rng: RandomSource | None = None,
+        log: bool = False
+    ) -> tuple[np.ndarray, list[str]]:
+    """
+        Batch version of `gen_color`. Draws every channel for all `count` colors at once within the same bounds,
+        and names all of them in a single nearest-neighbour pass.
+
+        :param args: The same bounds accepted by `gen_color`.
+        :param count: The number of colors to generate.
+        :param rng: The generator to draw from. If None, one is seeded from the global random module, so that --seed
+        still makes the output reproducible.
+        :return: The (count, 3) int64 array of RGB values and the color names. Use `format_colors` to get strings.
+    """
+    rng = resolve_generator(rng)
 
-    return f"{name} - rgb({rgb['r']}, {rgb['g']}, {rgb['b']}), hex: {hex}, hsl({hsl['h']:.2f}, {hsl['s']:.2f}%, {hsl['l']:.2f}%), cmyk({cmyk['c']:.2f}%, {cmyk['m']:.2f}%, {cmyk['y']:.2f}%, {cmyk['k']:.2f}%)"
\ No newline at end of file
+    def channel(exact: int | None, min_value: int, max_value: int) -> np.ndarray:
+        if exact is not None:
+            return np.full(count, clamp(exact, 0, 255, log), dtype=np.int64)
+        return rng.integers(clamp(min_value, 0, 255, log), clamp(max_value, 0, 255, log), size=count, endpoint=True)
+
+    rgbs = np.column_stack((
+        channel(args.get('exact_r'), args.get('min_r', 0), args.get('max_r', 255)),
+        channel(args.get('exact_g'), args.get('min_g', 0), args.get('max_g', 255)),
+        channel(args.get('exact_b'), args.get('min_b', 0), args.get('max_b', 255))
+    ))
+    if log: logger.info("Drew %s colors. Converting and naming them in bulk.", count)
+
+    return rgbs, nearest_colors(rgbs, args.get('perceptual', False), args.get('lut'))
+
+def format_colors(rgbs: np.ndarray, names: list[str]) -> list[str]:
+    """
+        Convert colors from `gen_color_batch` to Hex, HSL, and CMYK with vectorized operations, and format them
+        in the same format as `gen_color`.
+    """
+    hsls = rgb_to_hsl_array(rgbs)
+    cmyks = rgb_to_cmyk_array(rgbs)
+    hexes = ["#%06x" % v for v in ((rgbs[:, 0] << 16) | (rgbs[:, 1] << 8) | rgbs[:, 2]).tolist()]
+
+    return list(map(COLOR_FORMAT.format, names, *rgbs.T.tolist(), hexes, *hsls.T.tolist(), *cmyks.T.tolist()))
+
+def gen_colors(
+        args: ColorArgs = {},
+        count: int = 1,
+        rng: RandomSource | None = None,
+        log: bool = False
+    ) -> list[str]:
+    """
+        Generate `count` formatted colors at once. See `gen_color_batch` and `format_colors`.
+    """
+    return format_colors(*gen_color_batch(args, count, rng, log))
@@ -9,4 +9,6 @@ class ColorArgs(TypedDict):
     exact_g: NotRequired[int | None]
     min_b: NotRequired[int]
     max_b: NotRequired[int]
-    exact_b: NotRequired[int | None]
\ No newline at end of file
+    exact_b: NotRequired[int | None]
+    perceptual: NotRequired[bool]
+    lut: NotRequired[bool | None]
\ No newline at end of file
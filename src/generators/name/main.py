@@ -1,12 +1,26 @@
-import random
+from typing import TYPE_CHECKING
 from fake import get_fake
-from faker_music.genres import genre_list
-from faker_music.instruments import instrument_list
+from utils.seeding import RandomSource, resolve_random
+from utils.log import get_logger
 from .vars import *
 from .pytypes import *
 
-def gen_name(type, args: NameArgs, log: bool = False) -> str:
-    fake = get_fake()
+if TYPE_CHECKING:
+    from faker import Faker
+
+logger = get_logger("name")
+
+def gen_name(type, args: NameArgs, log: bool = False, *, rng: RandomSource | None = None, fake: "Faker | None" = None) -> str:
+    """
+        Generate a random name of the given type.
+
+        :param rng: The generator to draw from. If None, the global random module is used.
+        :param fake: The Faker instance to draw from. If None, the shared one is used. Pass one made by
+        `fake.create_fake` with the same `rng` to keep every draw on one stream.
+    """
+    rng = resolve_random(rng)
+    if fake is None:
+        fake = get_fake()
 
     match type:
         case "company":
@@ -17,34 +31,34 @@ def gen_name(type, args: NameArgs, log: bool = False) -> str:
 
             if file_type is not None:
                 if log and category is not None:
-                    print(f"Both file category '{category}' and file type '{file_type}' were provided. The file type will be used for generation, and the category will be ignored.")
+                    logger.debug("Both file category '%s' and file type '%s' were provided. The file type will be used for generation, and the category will be ignored.", category, file_type)
 
                 return fake.file_name(extension=file_type)
             
             if category is not None:
                 if category not in FILE_CATEGORIES:
-                    if log: print(f"Provided file category '{category}' is not valid. Generating a random file name without a category.")
+                    if log: logger.debug("Provided file category '%s' is not valid. Generating a random file name without a category.", category)
                     category = None
                 else:
-                    if log: print(f"Generating a file name with category '{category}'.")
+                    if log: logger.debug("Generating a file name with category '%s'.", category)
             else:
-                if log: print("No file category or type provided. Generating a random file category.")
-                category = random.choice(FILE_CATEGORIES)
-                if log: print(f"Selected file category '{category}'.")
+                if log: logger.debug("No file category or type provided. Generating a random file category.")
+                category = rng.choice(FILE_CATEGORIES)
+                if log: logger.debug("Selected file category '%s'.", category)
 
             return fake.file_name(category=category)
         case "email":
             category = args.get("email_category")
             if category is not None:
                 if category not in EMAIL_CATEGORIES:
-                    if log: print(f"Provided email category '{category}' is not valid. Generating a random email without a category.")
+                    if log: logger.debug("Provided email category '%s' is not valid. Generating a random email without a category.", category)
                     category = None
                 else:
-                    if log: print(f"Generating an email with category '{category}'.")
+                    if log: logger.debug("Generating an email with category '%s'.", category)
             else:
-                if log: print("No email category provided. Generating a random email category.")
-                category = random.choice(EMAIL_CATEGORIES)
-                if log: print(f"Selected email category '{category}'.")
+                if log: logger.debug("No email category provided. Generating a random email category.")
+                category = rng.choice(EMAIL_CATEGORIES)
+                if log: logger.debug("Selected email category '%s'.", category)
 
             if category == "personal":
                 return fake.ascii_email()
@@ -52,7 +66,7 @@ def gen_name(type, args: NameArgs, log: bool = False) -> str:
                 return fake.company_email()
         case "website":
             subdomains = args.get("subdomains", 0)
-            if log: print(f"Generating a website with {subdomains} subdomains.")
+            if log: logger.debug("Generating a website with %s subdomains.", subdomains)
             return fake.domain_name(subdomains)
         case "user_name":
             return fake.user_name()
@@ -60,10 +74,10 @@ def gen_name(type, args: NameArgs, log: bool = False) -> str:
             gender = args.get("gender", "nb")
 
             if gender == "nb":
-                if log: print("No specified gender. Generating a random job title with a random gender.")
-                gender = random.choice(["male", "female"])
+                if log: logger.debug("No specified gender. Generating a random job title with a random gender.")
+                gender = rng.choice(["male", "female"])
 
-            if log: print(f"Generating a job title for gender '{gender}'.")
+            if log: logger.debug("Generating a job title for gender '%s'.", gender)
 
             if gender == "male":
                 return fake.job_male()
@@ -75,17 +89,17 @@ def gen_name(type, args: NameArgs, log: bool = False) -> str:
             gender = args.get("gender")
 
             if gender is None:
-                if log: print("No specified gender. Generating a random gender for the person.")
-                gender = random.choice(["male", "female", "nb"])
+                if log: logger.debug("No specified gender. Generating a random gender for the person.")
+                gender = rng.choice(["male", "female", "nb"])
             
             used_first_name: str | None = None
             used_last_name: str | None = None
 
             if first_name is not None:
                 used_first_name = first_name
-                if log: print(f"Using provided first name '{first_name}'.")
+                if log: logger.debug("Using provided first name '%s'.", first_name)
             else:
-                if log: print(f"No first name provided. Generating a random first name with gender '{gender}'.")
+                if log: logger.debug("No first name provided. Generating a random first name with gender '%s'.", gender)
                 if gender == "nb":
                     used_first_name = fake.first_name_nonbinary()
                 elif gender == "male":
@@ -95,9 +109,9 @@ def gen_name(type, args: NameArgs, log: bool = False) -> str:
 
             if last_name is not None:
                 used_last_name = last_name
-                if log: print(f"Using provided last name '{last_name}'.")
+                if log: logger.debug("Using provided last name '%s'.", last_name)
             else:
-                if log: print(f"No last name provided. Generating a random last name with gender '{gender}'.")
+                if log: logger.debug("No last name provided. Generating a random last name with gender '%s'.", gender)
                 if gender == "nb":
                     used_last_name = fake.last_name_nonbinary()
                 elif gender == "male":
@@ -107,18 +121,21 @@ def gen_name(type, args: NameArgs, log: bool = False) -> str:
 
             return f"{used_first_name} {used_last_name}"
         case "music_genre":
+            from faker_music.genres import genre_list
+            MUSIC_GENRES = get_music_genres()
+
             genre = args.get("music_genre")
             if genre is not None:
                 if genre not in MUSIC_GENRES:
-                    if log: print(f"Provided parent music genre '{genre}' is not valid. Generating a random music genre.")
+                    if log: logger.debug("Provided parent music genre '%s' is not valid. Generating a random music genre.", genre)
                     genre = None
                 else:
-                    if log: print(f"Generating a music genre from the parent genre '{genre}'.")
+                    if log: logger.debug("Generating a music genre from the parent genre '%s'.", genre)
 
             if genre is None:
-                if log: print("No parent music genre provided. Generating a random music genre.")
-                genre = random.choice(MUSIC_GENRES)
-                if log: print(f"Selected parent music genre '{genre}'.")
+                if log: logger.debug("No parent music genre provided. Generating a random music genre.")
+                genre = rng.choice(MUSIC_GENRES)
+                if log: logger.debug("Selected parent music genre '%s'.", genre)
 
             # Get the subgenres for the selected genre
             subgenres: list[str] = []
@@ -127,21 +144,24 @@ def gen_name(type, args: NameArgs, log: bool = False) -> str:
                     subgenres = g["subgenres"]
                     break
 
-            if log: print(f"Found {len(subgenres)} subgenres for parent genre '{genre}'.")
-            return random.choice(subgenres) if subgenres else genre
+            if log: logger.debug("Found %s subgenres for parent genre '%s'.", len(subgenres), genre)
+            return rng.choice(subgenres) if subgenres else genre
         case "music_instrument":
+            from faker_music.instruments import instrument_list
+            INSTRUMENT_CATEGORIES = get_instrument_categories()
+
             category = args.get("music_instrument_category")
             if category is not None:
                 if category not in INSTRUMENT_CATEGORIES:
-                    if log: print(f"Provided music instrument category '{category}' is not valid. Generating a random music instrument.")
+                    if log: logger.debug("Provided music instrument category '%s' is not valid. Generating a random music instrument.", category)
                     category = None
                 else:
-                    if log: print(f"Generating a music instrument from the category '{category}'.")
+                    if log: logger.debug("Generating a music instrument from the category '%s'.", category)
 
             if category is None:
-                if log: print("No music instrument category provided. Generating a random music instrument category.")
-                category = random.choice(INSTRUMENT_CATEGORIES)
-                if log: print(f"Selected music instrument category '{category}'.")
+                if log: logger.debug("No music instrument category provided. Generating a random music instrument category.")
+                category = rng.choice(INSTRUMENT_CATEGORIES)
+                if log: logger.debug("Selected music instrument category '%s'.", category)
 
             # Get the instruments for the selected category
             instruments: list[str] = []
@@ -150,10 +170,14 @@ def gen_name(type, args: NameArgs, log: bool = False) -> str:
                     instruments = i["instruments"]
                     break
 
-            if log: print(f"Found {len(instruments)} instruments for category '{category}'.")
-            return random.choice(instruments)
+            if log: logger.debug("Found %s instruments for category '%s'.", len(instruments), category)
+            return rng.choice(instruments)
         case "vehicle":
-            return fake.vehicle_year_make_model()
+            # Picked here rather than through VehicleProvider, which always draws from the global random module
+            from faker_vehicle.vehicle_dict import vehicles
+
+            vehicle = rng.choice(vehicles)
+            return f"{vehicle['Year']} {vehicle['Make']} {vehicle['Model']}"
         
     raise ValueError(f"Invalid name type '{type}'. Valid types are: {', '.join(NAME_TYPES)}.")
     
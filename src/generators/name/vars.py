@@ -1,6 +1,3 @@
-from faker_music.genres import genre_list
-from faker_music.instruments import instrument_list
-
 NAME_TYPES = [
     "company",
     "file_name",
@@ -27,5 +24,24 @@ EMAIL_CATEGORIES = [
     "personal"
 ]
 
-MUSIC_GENRES = [g["genre"] for g in genre_list]
-INSTRUMENT_CATEGORIES = [i["category"] for i in instrument_list]
\ No newline at end of file
+# faker_music imports Faker, so its genre and instrument lists are only loaded when they are needed.
+music_genres: list[str] | None = None
+instrument_categories: list[str] | None = None
+
+def get_music_genres() -> list[str]:
+    global music_genres
+
+    if music_genres is None:
+        from faker_music.genres import genre_list
+        music_genres = [g["genre"] for g in genre_list]
+
+    return music_genres
+
+def get_instrument_categories() -> list[str]:
+    global instrument_categories
+
+    if instrument_categories is None:
+        from faker_music.instruments import instrument_list
+        instrument_categories = [i["category"] for i in instrument_list]
+
+    return instrument_categories
\ No newline at end of file
@@ -1,6 +1,9 @@
-import random
+import numpy as np
 from warnings import warn
-from utils import clamp, randint_from_input, format_component
+from utils import RandomSource, resolve_random, resolve_generator, clamp, clamp_batch, randint_from_input, randint_from_input_batch, format_component, format_component_batch, format_fixed_width, \
+                  ComponentDomain, component_domain, gen_unique_components, get_logger
+
+logger = get_logger("phone")
 
 AREA_CODE_MIN = 200
 AREA_CODE_MAX = 999
@@ -11,9 +14,17 @@ LINE_MAX = 9999
 RESERVED_CENTRAL = 555
 RESERVED_LINE_MIN = 100
 RESERVED_LINE_MAX = 199
+PHONE_TEMPLATE = "(###) ###-####"
 
 
-def gen_phone(area: int | str | None = None, central: int | str | None = None, line: int | str | None = None, log: bool = False) -> str:
+def gen_phone(
+        area: int | str | None = None,
+        central: int | str | None = None,
+        line: int | str | None = None,
+        log: bool = False,
+        *,
+        rng: RandomSource | None = None
+    ) -> str:
     """
         Generate a random US phone number.
         The range "XXX-555-0100" to "XXX-555-0199" is reserved for fictional use, so if the central office code
@@ -25,7 +36,10 @@ def gen_phone(area: int | str | None = None, central: int | str | None = None, l
         If not reserved, a warning will be issued to indicate a potentially real phone number.
         :param line: The line number (last four digits). Will be clamped to between 0 and 9999. If None, will be randomly decided.
         If this is not reserved while the central number is, a warning will be issued to indicate a potentially real phone number.
+        :param rng: The generator to draw from. If None, the global random module is used.
     """
+    rng = resolve_random(rng)
+
     def is_reserved_central(c: int) -> bool:
         """
             Check if a given central office code is reserved/invalid.
@@ -42,7 +56,7 @@ def gen_phone(area: int | str | None = None, central: int | str | None = None, l
         """
             Get a random central office code.
         """
-        return random.randint(CENTRAL_MIN, CENTRAL_MAX)
+        return rng.randint(CENTRAL_MIN, CENTRAL_MAX)
 
     def is_reserved_line(l: int) -> bool:
         """
@@ -54,26 +68,26 @@ def gen_phone(area: int | str | None = None, central: int | str | None = None, l
         """
             Get a random reserved line number.
         """
-        return random.randint(RESERVED_LINE_MIN, RESERVED_LINE_MAX)
+        return rng.randint(RESERVED_LINE_MIN, RESERVED_LINE_MAX)
 
     def get_random_line() -> int:
         """
             Get a random line number.
         """
-        return random.randint(LINE_MIN, LINE_MAX)
+        return rng.randint(LINE_MIN, LINE_MAX)
 
     def get_random_area() -> int:
         """
             Get a random area code.
         """
-        return random.randint(AREA_CODE_MIN, AREA_CODE_MAX)
+        return rng.randint(AREA_CODE_MIN, AREA_CODE_MAX)
 
-    area, area_str = format_component(area, AREA_CODE_MIN, AREA_CODE_MAX, 3, get_random_area, log)
+    area, area_str = format_component(area, AREA_CODE_MIN, AREA_CODE_MAX, 3, get_random_area, log, rng=rng)
 
     if central is None:
         central = get_random_reserved_central()
     else:
-        central = clamp(randint_from_input(central, get_random_reserved_central, log=log), CENTRAL_MIN, CENTRAL_MAX, log=log)
+        central = clamp(randint_from_input(central, get_random_reserved_central, log=log, rng=rng), CENTRAL_MIN, CENTRAL_MAX, log=log)
         if not is_reserved_central(central):
             warn(f"The specified central office code ({central}) means the generated phone number may correspond to a real person.")
     central_str = str(central).zfill(3)
@@ -85,10 +99,139 @@ def gen_phone(area: int | str | None = None, central: int | str | None = None, l
             # Since the number is already potentially real, use the full range of possible line numbers.
             line = get_random_line()
     else:
-        line = clamp(randint_from_input(line, get_random_reserved_line, log=log), LINE_MIN, LINE_MAX, log=log)
+        line = clamp(randint_from_input(line, get_random_reserved_line, log=log, rng=rng), LINE_MIN, LINE_MAX, log=log)
         # Don't send the warning if the central number is already non-reserved, as that makes this warning misleading.
         if is_reserved_central(central) and not is_reserved_line(line):
             warn(f"The specified line number ({line}) means the generated phone number may correspond to a real person.")
     line_str = str(line).zfill(4)
 
-    return f"({area_str}) {central_str}-{line_str}"
\ No newline at end of file
+    return f"({area_str}) {central_str}-{line_str}"
+
+def gen_phone_batch(
+        n: int,
+        area: int | str | None = None,
+        central: int | str | None = None,
+        line: int | str | None = None,
+        rng: RandomSource | None = None,
+        log: bool = False
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+        Batch version of `gen_phone`. Draws each component for all `n` phone numbers at once as an integer column,
+        following the same reserved ranges (XXX-555-0100 to XXX-555-0199) and component patterns.
+
+        :param n: The number of phone numbers to generate.
+        :param rng: The generator to draw from. If None, one is seeded from the global random module.
+        :return: The (area, central, line) columns as int64 arrays of length `n`. Use `format_phones` to get strings.
+    """
+    rng = resolve_generator(rng)
+
+    def get_random_areas(count: int) -> np.ndarray:
+        return rng.integers(AREA_CODE_MIN, AREA_CODE_MAX, size=count, endpoint=True)
+
+    def get_reserved_centrals(count: int) -> np.ndarray:
+        return np.full(count, RESERVED_CENTRAL, dtype=np.int64)
+
+    def get_random_reserved_lines(count: int) -> np.ndarray:
+        return rng.integers(RESERVED_LINE_MIN, RESERVED_LINE_MAX, size=count, endpoint=True)
+
+    def get_random_lines(count: int) -> np.ndarray:
+        return rng.integers(LINE_MIN, LINE_MAX, size=count, endpoint=True)
+
+    areas = format_component_batch(area, AREA_CODE_MIN, AREA_CODE_MAX, n, get_random_areas, rng, log)
+
+    if central is None:
+        centrals = get_reserved_centrals(n)
+    else:
+        centrals = clamp_batch(randint_from_input_batch(central, n, get_reserved_centrals, rng, log=log), CENTRAL_MIN, CENTRAL_MAX, log=log)
+        unreserved = centrals != RESERVED_CENTRAL
+        if unreserved.any():
+            warn(f"The specified central office code ({central}) means {int(np.count_nonzero(unreserved))} of the generated phone numbers may correspond to real people.")
+    reserved_central = centrals == RESERVED_CENTRAL
+
+    if line is None:
+        # Numbers whose central office code is already potentially real use the full range of possible line numbers.
+        lines = np.where(reserved_central, get_random_reserved_lines(n), get_random_lines(n))
+    else:
+        lines = clamp_batch(randint_from_input_batch(line, n, get_random_reserved_lines, rng, log=log), LINE_MIN, LINE_MAX, log=log)
+        # Don't count numbers whose central number is already non-reserved, as that makes this warning misleading.
+        unreserved = reserved_central & ((lines < RESERVED_LINE_MIN) | (lines > RESERVED_LINE_MAX))
+        if unreserved.any():
+            warn(f"The specified line number ({line}) means {int(np.count_nonzero(unreserved))} of the generated phone numbers may correspond to real people.")
+
+    if log: logger.info("Generated %s phone number(s) in bulk.", n)
+    return areas, centrals, lines
+
+def gen_phone_unique_batch(
+        n: int,
+        area: int | str | None = None,
+        central: int | str | None = None,
+        line: int | str | None = None,
+        key: int = 0,
+        cursor: int = 0,
+        log: bool = False
+    ) -> tuple[tuple[np.ndarray, np.ndarray, np.ndarray], int]:
+    """
+        Like `gen_phone_batch`, but never repeats a phone number. Walks a keyed permutation of every number the
+        components can produce (by default the 800 area codes x 100 reserved lines of XXX-555-01XX), so each is
+        emitted at most once. Unlike the random modes, pattern values that fall outside a component's range
+        are skipped instead of clamped, since clamping would produce duplicates.
+
+        :param key: The permutation key. Runs with the same key and components visit numbers in the same order.
+        :param cursor: Where to resume the permutation from. Pass the cursor returned by the previous call to continue
+        without repeating anything.
+        :return: The (area, central, line) columns, which are shorter than `n` if the space is exhausted, and the next cursor.
+    """
+    reserved_lines = ComponentDomain.from_range(RESERVED_LINE_MIN, RESERVED_LINE_MAX)
+    central_domain = component_domain(central, ComponentDomain.from_values([RESERVED_CENTRAL]))
+
+    if line is None and central is not None:
+        # Numbers whose central office code is already potentially real use the full range of possible line numbers.
+        # Reserved central codes still only get reserved lines (enforced by is_valid below).
+        line_domain = ComponentDomain.from_range(LINE_MIN, LINE_MAX)
+    else:
+        line_domain = component_domain(line, reserved_lines)
+
+    domains = [
+        component_domain(area, ComponentDomain.from_range(AREA_CODE_MIN, AREA_CODE_MAX)),
+        central_domain,
+        line_domain
+    ]
+
+    def is_valid(columns: list[np.ndarray]) -> np.ndarray:
+        areas, centrals, lines = columns
+        valid = (
+            (AREA_CODE_MIN <= areas) & (areas <= AREA_CODE_MAX)
+            & (CENTRAL_MIN <= centrals) & (centrals <= CENTRAL_MAX)
+            & (LINE_MIN <= lines) & (lines <= LINE_MAX)
+        )
+        if line is None:
+            valid &= (centrals != RESERVED_CENTRAL) | ((RESERVED_LINE_MIN <= lines) & (lines <= RESERVED_LINE_MAX))
+        return valid
+
+    (areas, centrals, lines), next_cursor = gen_unique_components(n, domains, key, cursor, is_valid)
+
+    if len(areas) < n:
+        warn(f"Only {len(areas)} of the {n} requested unique phone numbers were left for these components. The space is exhausted.")
+
+    unreserved = centrals != RESERVED_CENTRAL
+    if unreserved.any():
+        warn(f"The specified central office code ({central}) means {int(np.count_nonzero(unreserved))} of the generated phone numbers may correspond to real people.")
+    unreserved = (centrals == RESERVED_CENTRAL) & ((lines < RESERVED_LINE_MIN) | (lines > RESERVED_LINE_MAX))
+    if unreserved.any():
+        warn(f"The specified line number ({line}) means {int(np.count_nonzero(unreserved))} of the generated phone numbers may correspond to real people.")
+
+    if log: logger.info("Generated %s unique phone number(s). Resume from cursor %s.", len(areas), next_cursor)
+    return (areas, centrals, lines), next_cursor
+
+def format_phones(areas: np.ndarray, centrals: np.ndarray, lines: np.ndarray) -> list[str]:
+    """
+        Format phone number columns from `gen_phone_batch` as "(XXX) XXX-XXXX" strings.
+    """
+    return list(map("({:03d}) {:03d}-{:04d}".format, areas.tolist(), centrals.tolist(), lines.tolist()))
+
+def format_phone_buffer(areas: np.ndarray, centrals: np.ndarray, lines: np.ndarray) -> np.ndarray:
+    """
+        Render phone number columns from `gen_phone_batch` straight into a newline-terminated fixed-width byte buffer.
+        See `utils.fixed_width.format_fixed_width`.
+    """
+    return format_fixed_width(PHONE_TEMPLATE + "\n", (areas, centrals, lines))
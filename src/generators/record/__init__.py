@@ -0,0 +1,4 @@
+# Import from subfiles here so that they can be imported directly from the parent package.
+from .main import *
+from .pytypes import *
+from .vars import *
@@ -0,0 +1,178 @@
+import re
+import unicodedata
+import numpy as np
+from typing import TYPE_CHECKING, Any, Iterator
+from fake import get_fake
+from utils import WeightedSampler, get_logger
+from utils.seeding import RandomSource, resolve_generator
+from .pytypes import RecordArgs
+from .vars import *
+
+if TYPE_CHECKING:
+    from faker import Faker
+
+logger = get_logger("record")
+
+# Built by get_name_samplers the first time a batch needs names
+name_samplers: dict[str, WeightedSampler] | None = None
+
+# Anything that cannot appear in the local part of a generated email address
+EMAIL_LOCAL_PART_REGEX = re.compile(r'[^a-z0-9]+')
+
+def get_record_columns(fields: list[str]) -> dict[str, str]:
+    """
+        Get the typed columns (see `utils.columnar.ColumnarSink`) that records with the given fields are written as
+        in columnar output.
+    """
+    columns: dict[str, str] = {}
+    for field in fields:
+        columns.update(RECORD_COLUMNS[field])
+    return columns
+
+def get_name_samplers(fake: "Faker") -> dict[str, WeightedSampler]:
+    """
+        Get samplers over the weighted name lists of Faker's person provider, so that a batch of names can be
+        drawn in bulk instead of one `first_name_*()` call at a time. Keys are the entries of RECORD_GENDERS,
+        plus "last" for last names. Built the first time they are needed, and reused after that.
+    """
+    global name_samplers
+
+    if name_samplers is None:
+        person = fake.provider("faker.providers.person")
+        name_samplers = {
+            "male": WeightedSampler([(weight, name) for name, weight in person.first_names_male.items()]),
+            "female": WeightedSampler([(weight, name) for name, weight in person.first_names_female.items()]),
+            "nb": WeightedSampler([(weight, name) for name, weight in person.first_names_nonbinary.items()]),
+            "last": WeightedSampler([(weight, name) for name, weight in person.last_names.items()])
+        }
+
+    return name_samplers
+
+def make_email_local_part(first_name: str, last_name: str) -> str:
+    """
+        Turn a name into an email local part, e.g. "Zoë O'Neil" -> "zoe.oneil".
+    """
+    def clean(name: str) -> str:
+        ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+        return EMAIL_LOCAL_PART_REGEX.sub("", ascii_name.lower())
+
+    return '.'.join(part for part in (clean(first_name), clean(last_name)) if part) or "user"
+
+def gen_record_batch(
+        n: int,
+        args: RecordArgs = {},
+        rng: RandomSource | None = None,
+        fake: "Faker | None" = None,
+        log: bool = False
+    ) -> dict[str, Any]:
+    """
+        Generate `n` linked records at once, one field at a time: each field is generated for the whole batch,
+        in bulk, before the next. The email address is made from the
+        record's own name.
+
+        :param args: Which fields to generate, and the options passed on to the address and color generators.
+        :param rng: The generator to draw from. If None, one is seeded from the global random module.
+        :param fake: The Faker instance to draw from. If None, the shared one is used.
+        :return: Columns of `n` values each. Every requested field has its formatted strings under its own name,
+        plus its typed parts under the column names in RECORD_COLUMNS.
+    """
+    fields = args.get('fields', RECORD_FIELDS)
+    generator = resolve_generator(rng)
+    if fake is None:
+        fake = get_fake()
+
+    batch: dict[str, Any] = {}
+
+    if "name" in fields or "email" in fields:
+        samplers = get_name_samplers(fake)
+        fixed_gender = args.get('gender')
+        if fixed_gender is None:
+            genders = generator.integers(0, len(RECORD_GENDERS), size=n)
+        else:
+            genders = np.full(n, RECORD_GENDERS.index(fixed_gender))
+
+        first_names = np.empty(n, dtype=object)
+        for i, gender in enumerate(RECORD_GENDERS):
+            in_gender = genders == i
+            first_names[in_gender] = samplers[gender].sample(int(in_gender.sum()), generator)
+        first_names = first_names.tolist()
+        last_names = samplers["last"].sample(n, generator)
+
+        batch["name"] = [f"{first} {last}" for first, last in zip(first_names, last_names)]
+        batch["first_name"] = first_names
+        batch["last_name"] = last_names
+
+    if "email" in fields:
+        domains = fake.provider("faker.providers.internet").free_email_domains
+        # Half of the addresses get a number, as the plain name is often taken
+        numbers = np.where(generator.random(n) < 0.5, generator.integers(1, 10000, size=n), 0).tolist()
+        domain_indices = generator.integers(0, len(domains), size=n).tolist()
+        batch["email"] = [
+            f"{make_email_local_part(first, last)}{number or ''}@{domains[domain_index]}"
+            for first, last, number, domain_index in zip(first_names, last_names, numbers, domain_indices)
+        ]
+
+    # Each field's generator is imported only when the field is requested
+    if "ssn" in fields:
+        from generators.ssn import gen_ssn_batch, format_ssns
+        starts, mids, ends = gen_ssn_batch(n, rng=generator)
+        batch["ssn"] = format_ssns(starts, mids, ends)
+        batch.update(ssn_start=starts, ssn_mid=mids, ssn_end=ends)
+
+    if "phone" in fields:
+        from generators.phone import gen_phone_batch, format_phones
+        areas, centrals, lines = gen_phone_batch(n, rng=generator)
+        batch["phone"] = format_phones(areas, centrals, lines)
+        batch.update(phone_area=areas, phone_central=centrals, phone_line=lines)
+
+    if "address" in fields:
+        from generators.address import gen_address_parts_batch, format_addresses
+        address_parts = gen_address_parts_batch(
+            n,
+            args.get('address', {}),
+            args.get('state_abbr', True),
+            args.get('existing_city', True),
+            population_weighted=args.get('population_weighted', False),
+            rng=generator,
+            fake=fake
+        )
+        batch["address"] = format_addresses(address_parts)
+        batch.update(address_parts)
+
+    if "color" in fields:
+        from generators.color import gen_color_batch
+        rgbs, color_names = gen_color_batch(args.get('color', {}), n, generator)
+        batch["color"] = color_names
+        batch.update(color_r=rgbs[:, 0], color_g=rgbs[:, 1], color_b=rgbs[:, 2])
+
+    if log: logger.info("Generated %s record(s) with fields %s.", n, ', '.join(fields))
+    return batch
+
+def iter_record_batches(
+        count: int,
+        args: RecordArgs = {},
+        batch_size: int = RECORD_BATCH_SIZE,
+        rng: RandomSource | None = None,
+        fake: "Faker | None" = None,
+        log: bool = False
+    ) -> Iterator[dict[str, Any]]:
+    """
+        Lazily generate `count` records as batches from `gen_record_batch`, so that any number of records can be
+        streamed with memory bounded by the batch size. Faker, the location index and the color index are loaded
+        by the first batch and reused by the rest.
+    """
+    fields = args.get('fields', RECORD_FIELDS)
+    for field in fields:
+        if field not in RECORD_FIELDS:
+            raise ValueError(f"Invalid record field '{field}'. Valid fields are: {', '.join(RECORD_FIELDS)}.")
+
+    for batch_start in range(0, count, batch_size):
+        yield gen_record_batch(min(batch_size, count - batch_start), args, rng, fake, log)
+
+def iter_records(batch: dict[str, Any], fields: list[str]) -> Iterator[dict[str, Any]]:
+    """
+        Turn a batch from `gen_record_batch` into one dict per record, holding the given fields (or columns).
+    """
+    columns = [batch[field].tolist() if hasattr(batch[field], "tolist") else batch[field] for field in fields]
+    for row in zip(*columns):
+        yield dict(zip(fields, row))
@@ -0,0 +1,12 @@
+from typing import TypedDict, NotRequired, Literal
+from generators.address.pytypes import AddressArgs
+from generators.color.pytypes import ColorArgs
+
+class RecordArgs(TypedDict):
+    fields: NotRequired[list[str]]
+    gender: NotRequired[Literal["male", "female", "nb"]]
+    address: NotRequired[AddressArgs]
+    state_abbr: NotRequired[bool]
+    existing_city: NotRequired[bool]
+    population_weighted: NotRequired[bool]
+    color: NotRequired[ColorArgs]
@@ -0,0 +1,33 @@
+from utils.columnar import DICTIONARY_COLUMN
+
+# Fields a record can have, in output order
+RECORD_FIELDS = [
+    "name",
+    "email",
+    "ssn",
+    "phone",
+    "address",
+    "color"
+]
+
+# Genders a record's name can be drawn for, as accepted by --gender
+RECORD_GENDERS = ["male", "female", "nb"]
+
+# How many records are generated at a time. Each field is generated for the whole batch before the next one.
+RECORD_BATCH_SIZE = 1 << 14
+
+# Typed columns for each field in columnar output, replacing the field's formatted string
+RECORD_COLUMNS: dict[str, dict[str, str]] = {
+    "name": {"first_name": DICTIONARY_COLUMN, "last_name": DICTIONARY_COLUMN},
+    "email": {"email": DICTIONARY_COLUMN},
+    "ssn": {"ssn_start": "uint16", "ssn_mid": "uint8", "ssn_end": "uint16"},
+    "phone": {"phone_area": "uint16", "phone_central": "uint16", "phone_line": "uint16"},
+    "address": {
+        "building_number": DICTIONARY_COLUMN,
+        "street": DICTIONARY_COLUMN,
+        "city": DICTIONARY_COLUMN,
+        "state": DICTIONARY_COLUMN,
+        "zip": DICTIONARY_COLUMN
+    },
+    "color": {"color": DICTIONARY_COLUMN, "color_r": "uint8", "color_g": "uint8", "color_b": "uint8"}
+}
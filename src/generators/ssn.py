@@ -1,6 +1,9 @@
-import random
+import numpy as np
 from warnings import warn
-from utils import clamp, randint_from_input, format_component
+from utils import RandomSource, resolve_random, resolve_generator, clamp, clamp_batch, randint_from_input, randint_from_input_batch, format_component, format_component_batch, format_fixed_width, \
+                  ComponentDomain, component_domain, gen_unique_components, get_logger
+
+logger = get_logger("ssn")
 
 SSN_START_MIN = 0
 SSN_START_MAX = 999
@@ -9,8 +12,16 @@ SSN_MID_MAX = 99
 SSN_END_MIN = 0
 SSN_END_MAX = 9999
 RESERVED_SSN_START_COUNT = 102  # 000, 666, and 900-999
+SSN_TEMPLATE = "###-##-####"
 
-def gen_ssn(start: int | str | None = None, mid: int  | str | None = None, end: int | str | None = None, log: bool = False) -> str:
+def gen_ssn(
+        start: int | str | None = None,
+        mid: int  | str | None = None,
+        end: int | str | None = None,
+        log: bool = False,
+        *,
+        rng: RandomSource | None = None
+    ) -> str:
     """
         Generate a random US Social Security Number (SSN).
         The SSA reserves 000, 666, and 900-999 in the first three digits as invalid, so they will
@@ -20,7 +31,10 @@ def gen_ssn(start: int | str | None = None, mid: int  | str | None = None, end:
         from reserved ranges to ensure real-life invalidity. If not reserved, a warning will be issued to indicate a potentially real SSN.
         :param mid: The second part of the SSN. Will be clamped to between 0 and 99. If None, will be randomly decided.
         :param end: The third part of the SSN. Will be clamped to between 0 and 9999. If None, will be randomly decided.
+        :param rng: The generator to draw from. If None, the global random module is used.
     """
+    rng = resolve_random(rng)
+
     def is_reserved_start(s: int) -> bool:
         """
             Check if a given SSN start is reserved/invalid.
@@ -43,29 +57,134 @@ def gen_ssn(start: int | str | None = None, mid: int  | str | None = None, end:
         """
             Get a random reserved SSN start value.
         """
-        return get_reserved_start(random.randint(0, RESERVED_SSN_START_COUNT - 1))
+        return get_reserved_start(rng.randint(0, RESERVED_SSN_START_COUNT - 1))
 
     def get_random_mid() -> int:
         """
             Get a random SSN mid value.
         """
-        return random.randint(SSN_MID_MIN, SSN_MID_MAX)
+        return rng.randint(SSN_MID_MIN, SSN_MID_MAX)
 
     def get_random_end() -> int:
         """
             Get a random SSN end value.
         """
-        return random.randint(SSN_END_MIN, SSN_END_MAX)
+        return rng.randint(SSN_END_MIN, SSN_END_MAX)
 
     if start is None:
         start = get_random_reserved_start()
     else:
-        start = clamp(randint_from_input(start, get_random_reserved_start, log=log), SSN_START_MIN, SSN_START_MAX, log=log)
+        start = clamp(randint_from_input(start, get_random_reserved_start, log=log, rng=rng), SSN_START_MIN, SSN_START_MAX, log=log)
         if not is_reserved_start(start):
             warn(f"The specified SSN start ({start}) means the generated SSN may correspond to a real person.")
     start_str = str(start).zfill(3)
 
-    mid, mid_str = format_component(mid, SSN_MID_MIN, SSN_MID_MAX, 2, get_random_mid, log)
-    end, end_str = format_component(end, SSN_END_MIN, SSN_END_MAX, 4, get_random_end, log)
+    mid, mid_str = format_component(mid, SSN_MID_MIN, SSN_MID_MAX, 2, get_random_mid, log, rng=rng)
+    end, end_str = format_component(end, SSN_END_MIN, SSN_END_MAX, 4, get_random_end, log, rng=rng)
+
+    return f"{start_str}-{mid_str}-{end_str}"
+
+def gen_ssn_batch(
+        n: int,
+        start: int | str | None = None,
+        mid: int | str | None = None,
+        end: int | str | None = None,
+        rng: RandomSource | None = None,
+        log: bool = False
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+        Batch version of `gen_ssn`. Draws each component for all `n` SSNs at once as an integer column,
+        following the same reserved ranges and component patterns.
+
+        :param n: The number of SSNs to generate.
+        :param rng: The generator to draw from. If None, one is seeded from the global random module.
+        :return: The (start, mid, end) columns as int64 arrays of length `n`. Use `format_ssns` to get strings.
+    """
+    rng = resolve_generator(rng)
+
+    def get_random_reserved_starts(count: int) -> np.ndarray:
+        """
+            Get random reserved SSN start values. Index 0 is 000, index 1 is 666, and the rest are 900-999.
+        """
+        i = rng.integers(0, RESERVED_SSN_START_COUNT, size=count)
+        return np.where(i == 0, 0, np.where(i == 1, 666, 900 + (i - 2)))
+
+    def get_random_mids(count: int) -> np.ndarray:
+        return rng.integers(SSN_MID_MIN, SSN_MID_MAX, size=count, endpoint=True)
+
+    def get_random_ends(count: int) -> np.ndarray:
+        return rng.integers(SSN_END_MIN, SSN_END_MAX, size=count, endpoint=True)
+
+    if start is None:
+        starts = get_random_reserved_starts(n)
+    else:
+        starts = clamp_batch(randint_from_input_batch(start, n, get_random_reserved_starts, rng, log=log), SSN_START_MIN, SSN_START_MAX, log=log)
+        unreserved = (starts != 0) & (starts != 666) & (starts < 900)
+        if unreserved.any():
+            warn(f"The specified SSN start ({start}) means {int(np.count_nonzero(unreserved))} of the generated SSNs may correspond to real people.")
+
+    mids = format_component_batch(mid, SSN_MID_MIN, SSN_MID_MAX, n, get_random_mids, rng, log)
+    ends = format_component_batch(end, SSN_END_MIN, SSN_END_MAX, n, get_random_ends, rng, log)
 
-    return f"{start_str}-{mid_str}-{end_str}"
\ No newline at end of file
+    if log: logger.info("Generated %s SSN(s) in bulk.", n)
+    return starts, mids, ends
+
+def gen_ssn_unique_batch(
+        n: int,
+        start: int | str | None = None,
+        mid: int | str | None = None,
+        end: int | str | None = None,
+        key: int = 0,
+        cursor: int = 0,
+        log: bool = False
+    ) -> tuple[tuple[np.ndarray, np.ndarray, np.ndarray], int]:
+    """
+        Like `gen_ssn_batch`, but never repeats an SSN. Walks a keyed permutation of every SSN the components can
+        produce (by default the 102 reserved starts x 100 mids x 10,000 ends), so each is emitted at most once.
+        Unlike the random modes, pattern values that fall outside a component's range are skipped instead of clamped,
+        since clamping would produce duplicates.
+
+        :param key: The permutation key. Runs with the same key and components visit SSNs in the same order.
+        :param cursor: Where to resume the permutation from. Pass the cursor returned by the previous call to continue
+        without repeating anything.
+        :return: The (start, mid, end) columns, which are shorter than `n` if the space is exhausted, and the next cursor.
+    """
+    reserved_starts = [0, 666] + list(range(900, SSN_START_MAX + 1))
+    domains = [
+        component_domain(start, ComponentDomain.from_values(reserved_starts)),
+        component_domain(mid, ComponentDomain.from_range(SSN_MID_MIN, SSN_MID_MAX)),
+        component_domain(end, ComponentDomain.from_range(SSN_END_MIN, SSN_END_MAX))
+    ]
+
+    def is_valid(columns: list[np.ndarray]) -> np.ndarray:
+        starts, mids, ends = columns
+        return (
+            (SSN_START_MIN <= starts) & (starts <= SSN_START_MAX)
+            & (SSN_MID_MIN <= mids) & (mids <= SSN_MID_MAX)
+            & (SSN_END_MIN <= ends) & (ends <= SSN_END_MAX)
+        )
+
+    (starts, mids, ends), next_cursor = gen_unique_components(n, domains, key, cursor, is_valid)
+
+    if len(starts) < n:
+        warn(f"Only {len(starts)} of the {n} requested unique SSNs were left for these components. The space is exhausted.")
+
+    unreserved = (starts != 0) & (starts != 666) & (starts < 900)
+    if unreserved.any():
+        warn(f"The specified SSN start ({start}) means {int(np.count_nonzero(unreserved))} of the generated SSNs may correspond to real people.")
+
+    if log: logger.info("Generated %s unique SSN(s). Resume from cursor %s.", len(starts), next_cursor)
+    return (starts, mids, ends), next_cursor
+
+def format_ssns(starts: np.ndarray, mids: np.ndarray, ends: np.ndarray) -> list[str]:
+    """
+        Format SSN columns from `gen_ssn_batch` as "XXX-XX-XXXX" strings.
+    """
+    return list(map("{:03d}-{:02d}-{:04d}".format, starts.tolist(), mids.tolist(), ends.tolist()))
+
+def format_ssn_buffer(starts: np.ndarray, mids: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+        Render SSN columns from `gen_ssn_batch` straight into a newline-terminated fixed-width byte buffer.
+        See `utils.fixed_width.format_fixed_width`.
+    """
+    return format_fixed_width(SSN_TEMPLATE + "\n", (starts, mids, ends))
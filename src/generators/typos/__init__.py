@@ -1,3 +1,4 @@
 # Import from subfiles here so that they can be imported directly from the parent package.
 from .main import *
+from .corpus import *
 from .pytypes import *
\ No newline at end of file
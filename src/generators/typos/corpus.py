@@ -0,0 +1,117 @@
+import io
+import os
+import random
+import re
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterator, TextIO
+from utils import WeightedSampler, derive_seed, get_logger
+from .main import stream_typos
+
+logger = get_logger("typos")
+
+# Lines per chunk. This is fixed (never derived from the worker count) so that every chunk, and so every
+# chunk seed, is the same however many workers there are.
+CORPUS_CHUNK_LINES = 1024
+
+# Line breaks a typo may produce inside a line (see apply_chunk_typos)
+LINE_BREAK_REGEX = re.compile(r'\r\n|[\r\n]')
+
+# Seed stream for the corpus chunks; chunk i is seeded from (master seed, CORPUS_SEED_STREAM, i)
+CORPUS_SEED_STREAM = "typos-corpus"
+
+# Set up once per worker process by init_corpus_worker()
+corpus_worker_args: tuple[WeightedSampler, float, int] | None = None
+
+def iter_line_chunks(source: TextIO, chunk_lines: int = CORPUS_CHUNK_LINES) -> Iterator[list[str]]:
+    """
+        Read a text stream as chunks of `chunk_lines` lines (the last one may be shorter). Line endings are kept.
+    """
+    chunk: list[str] = []
+    for line in source:
+        chunk.append(line)
+        if len(chunk) == chunk_lines:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def init_corpus_worker(typo_distrb: list[tuple[int, str]], rate: float, typos_per_word: int) -> None:
+    global corpus_worker_args
+    corpus_worker_args = (WeightedSampler(typo_distrb), rate, typos_per_word)
+
+def apply_chunk_typos(chunk_seed: int, lines: list[str]) -> str:
+    """
+        Apply typos to every line of a chunk, as an independent piece of text each (so no filler word is added
+        after the last word of a line). Line breaks produced by typos are replaced with spaces. Runs in a worker
+        process, which was set up by `init_corpus_worker`.
+
+        :return: The chunk's lines with typos applied, joined back together.
+    """
+    assert corpus_worker_args is not None
+    typo_sampler, rate, typos_per_word = corpus_worker_args
+
+    rng = random.Random(chunk_seed)
+    output: list[str] = []
+    for line in lines:
+        text = line.rstrip("\r\n")
+        line_output = io.StringIO()
+        stream_typos(io.StringIO(text), line_output, typo_sampler, rate, typos_per_word, chunk_size=len(text) + 1, rng=rng)
+
+        # Keyboard typos can hit Enter, but each input line must stay exactly one output line
+        output.append(LINE_BREAK_REGEX.sub(" ", line_output.getvalue()))
+        output.append(line[len(text):])
+    return ''.join(output)
+
+def gen_typos_corpus(
+        source: TextIO,
+        sink: TextIO,
+        typo_distrb: list[tuple[int, str]],
+        rate: float = 0.1,
+        typos_per_word: int = 1,
+        master_seed: int | None = None,
+        workers: int | None = None,
+        chunk_offset: int = 0,
+        log: bool = False
+    ) -> int:
+    """
+        Apply typos to every line of a line-oriented corpus, spreading fixed-size chunks of lines across a process pool.
+        Output is written in the original line order. Each chunk is seeded from the master seed and its index alone,
+        so a seeded run gives exactly the same output with any number of workers.
+
+        :param source: The corpus to read.
+        :param sink: Where to write the lines with typos applied.
+        :param master_seed: The seed to derive every chunk's seed from. Random if not given.
+        :param workers: How many worker processes to use. Defaults to the number of CPUs. With 1, everything runs in this process.
+        :param chunk_offset: Index of the first chunk, so that several passes over the same corpus get different typos.
+        :return: The number of chunks processed.
+    """
+    if master_seed is None:
+        master_seed = random.getrandbits(128)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    chunks = enumerate(iter_line_chunks(source), chunk_offset)
+    chunk_count = 0
+
+    if workers <= 1:
+        init_corpus_worker(typo_distrb, rate, typos_per_word)
+        for chunk_index, lines in chunks:
+            sink.write(apply_chunk_typos(derive_seed(master_seed, CORPUS_SEED_STREAM, chunk_index), lines))
+            chunk_count += 1
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_corpus_worker, initargs=(typo_distrb, rate, typos_per_word)) as executor:
+            # Keep a bounded window of chunks in flight, and write results in submission order
+            pending: deque[Future[str]] = deque()
+            for chunk_index, lines in chunks:
+                pending.append(executor.submit(apply_chunk_typos, derive_seed(master_seed, CORPUS_SEED_STREAM, chunk_index), lines))
+                if len(pending) >= workers * 4:
+                    sink.write(pending.popleft().result())
+                    chunk_count += 1
+            while pending:
+                sink.write(pending.popleft().result())
+                chunk_count += 1
+
+    sink.flush()
+    if log: logger.info("Applied typos to %s chunk(s) of up to %s lines using %s worker(s).", chunk_count, CORPUS_CHUNK_LINES, workers)
+    return chunk_count
@@ -1,5 +1,8 @@
+from typing import TextIO
 from typo import *
-from utils import rand_pick_dstrb
+from utils import WeightedSampler, RandomSource, resolve_random, get_logger
+
+logger = get_logger("typos")
 
 # Set of available typo generators
 TYPO_GENERATORS: dict[str, TypoGenerator] = {
@@ -31,54 +34,152 @@ TYPO_GENERATORS: dict[str, TypoGenerator] = {
     "homophone": TypoHomophoneGenerator()
 }
 
-def gen_typos(text: str, typo_distrb: list[tuple[int, str]], rate: float=0.1, typos_per_word: int=1, log: bool = False) -> str:
+def apply_word_typos(
+        word: str,
+        typo_sampler: WeightedSampler,
+        rate: float = 0.1,
+        typos_per_word: int = 1,
+        is_last: bool = False,
+        rng: RandomSource | None = None,
+        log: bool = False
+    ) -> list[str]:
+    """
+        Possibly apply typos to a single word. Typos that produce several words (e.g. word repetition or filler words)
+        are applied one after another, each to the last word produced so far.
+
+        :param is_last: Whether this is the last word of the text. Filler words are not inserted after it
+        unless there is no other option.
+        :param rng: The generator to draw from. If None, the global random module is used.
+        :return: The word(s) to output in place of the original word.
+    """
+    rng = resolve_random(rng)
+    result = [word]
+
+    # if we're at the end, refuse to do filler word typos unless it's the only option.
+    def cannot_do_filler_ins() -> bool:
+        return is_last
+
+    # if we're generating homophones and the word has no homophones, refuse to do that typo unless it's the only option.
+    def cannot_do_homophone() -> bool:
+        meaningful_word = make_word_meaningful(result[-1])
+        return meaningful_word is None or not has_homophones(meaningful_word)
+
+    if rng.random() < rate:
+        num_typos = rng.randint(1, typos_per_word)
+        if log: logger.debug("Generating %s typos to word '%s'.", num_typos, word)
+
+        for _ in range(num_typos):
+            typo_type = typo_sampler.draw(rng)
+            if log: logger.debug("Picked typo type '%s' for word '%s'.", typo_type, result[-1])
+
+            attempts = 0
+            while (
+                (typo_type == "filler-ins" and cannot_do_filler_ins())
+                or (typo_type == "homophone" and cannot_do_homophone())
+            ) and len(typo_sampler) > 1 and attempts < 10:
+                typo_type = typo_sampler.draw(rng)
+                attempts += 1
+                if log:
+                    if typo_type == "filler-ins":
+                        logger.debug("Refused to apply 'filler-ins' typo to last word. Picked new typo type '%s' instead.", typo_type)
+                    elif typo_type == "homophone":
+                        logger.debug("Refused to apply 'homophone' typo to word '%s' with no homophones. Picked new typo type '%s' instead.", result[-1], typo_type)
+
+            if (typo_type == "filler-ins" and cannot_do_filler_ins()) or (typo_type == "homophone" and cannot_do_homophone()):
+                if log: logger.debug("Could not find a suitable typo type for word '%s' after 10 attempts. Skipping typo generation for this word.", result[-1])
+                continue
+
+            typo_generator = TYPO_GENERATORS[typo_type]
+            new_words = typo_generator.generate([result[-1]], rng)
+            if log: logger.debug("Generated new word(s) %s from original word '%s' using typo type '%s'.", new_words, result[-1], typo_type)
+
+            # Replace the current word in place; the last new word becomes the current word
+            result[-1:] = new_words
+
+    return result
+
+def gen_typos(
+        text: str,
+        typo_distrb: list[tuple[int, str]] | WeightedSampler,
+        rate: float=0.1,
+        typos_per_word: int=1,
+        log: bool = False,
+        *,
+        rng: RandomSource | None = None
+    ) -> str:
+    """
+        Apply random typos to the words of a text. Words are joined back together with single spaces.
+
+        :param typo_distrb: (weight, typo type) pairs, or a WeightedSampler already built from them.
+        Pass a sampler when calling this repeatedly with the same distribution, so it is only built once.
+        :param rng: The generator to draw from. If None, the global random module is used.
+    """
+    typo_sampler = typo_distrb if isinstance(typo_distrb, WeightedSampler) else WeightedSampler(typo_distrb)
+
     words = process_words(text)
-    if log: print(f"Got {len(words)} words from input text for typo generation.")
-    result = words.copy()
-    offset = 0  # Track how much result list has grown/shrunk
-    
-    for i in range(len(words)):
-        # if we're at the end, refuse to do filler word typos unless it's the only option.
-        def cannot_do_filler_ins() -> bool:
-            return i + offset == len(result) - 1
-        
-        # if we're generating homophones and the word has no homophones, refuse to do that typo unless it's the only option.
-        def cannot_do_homophone() -> bool:
-            homophone_gen = TYPO_GENERATORS["homophone"]
-            return isinstance(homophone_gen, TypoHomophoneGenerator) and not homophone_gen.has_any_homophones(result[i + offset])
-
-        if random.random() < rate:
-            num_typos = random.randint(1, typos_per_word)
-            if log: print(f"Generating {num_typos} typos to word '{words[i]}' at original index {i}.")
-
-            for _ in range(num_typos):
-                typo_type = rand_pick_dstrb(typo_distrb)
-                if log: print(f"Picked typo type '{typo_type}' for word '{result[i + offset]}' at current index {i + offset}.")
-
-                attempts = 0
-                while (
-                    (typo_type == "filler-ins" and cannot_do_filler_ins())
-                    or (typo_type == "homophone" and cannot_do_homophone())
-                ) and len(typo_distrb) > 1 and attempts < 10:
-                    typo_type = rand_pick_dstrb(typo_distrb)
-                    attempts += 1
-                    if log:
-                        if typo_type == "filler-ins":
-                            print(f"Refused to apply 'filler-ins' typo to last word. Picked new typo type '{typo_type}' instead.")
-                        elif typo_type == "homophone":
-                            print(f"Refused to apply 'homophone' typo to word '{result[i + offset]}' with no homophones. Picked new typo type '{typo_type}' instead.")
-
-                if (typo_type == "filler-ins" and cannot_do_filler_ins()) or (typo_type == "homophone" and cannot_do_homophone()):
-                    if log: print(f"Could not find a suitable typo type for word '{result[i + offset]}' after 10 attempts. Skipping typo generation for this word.")
-                    continue
-
-                typo_generator = TYPO_GENERATORS[typo_type]
-                new_words = typo_generator.generate([result[i + offset]])
-                if log: print(f"Generated new word(s) {new_words} from original word '{result[i + offset]}' using typo type '{typo_type}'.")
-                
-                # Calculate new offset based on word count change
-                word_count_diff = len(new_words) - 1
-                result = result[:i + offset] + new_words + result[i + offset + 1:]
-                offset += word_count_diff
-    
-    return ' '.join(result)
\ No newline at end of file
+    if log: logger.debug("Got %s words from input text for typo generation.", len(words))
+
+    result: list[str] = []
+    for i, word in enumerate(words):
+        result.extend(apply_word_typos(word, typo_sampler, rate, typos_per_word, i == len(words) - 1, rng, log))
+
+    return ' '.join(result)
+
+def stream_typos(
+        source: TextIO,
+        sink: TextIO,
+        typo_distrb: list[tuple[int, str]] | WeightedSampler,
+        rate: float = 0.1,
+        typos_per_word: int = 1,
+        chunk_size: int = 1 << 16,
+        rng: RandomSource | None = None,
+        log: bool = False
+    ) -> int:
+    """
+        Apply random typos to a text stream of any size, in linear time and bounded memory. The text is read
+        in chunks and split into words lazily, and the output is written as it is produced. Unlike `gen_typos`,
+        the original whitespace (including line breaks) between words is kept exactly.
+
+        :param source: The text stream to read.
+        :param sink: The text stream to write the result to.
+        :param chunk_size: How many characters to read, and roughly how many to buffer before each write.
+        :param rng: The generator to draw from. If None, the global random module is used.
+        :param log: Log a summary once the stream is done. Per-word details are not logged, as streams can be huge.
+        :return: The number of words processed.
+    """
+    typo_sampler = typo_distrb if isinstance(typo_distrb, WeightedSampler) else WeightedSampler(typo_distrb)
+
+    output: list[str] = []
+    output_size = 0
+    word_count = 0
+
+    def emit(word: str, separator: str, is_last: bool) -> None:
+        nonlocal output_size, word_count
+
+        # Whitespace before the first word is not a word of its own
+        if word:
+            word = ' '.join(apply_word_typos(word, typo_sampler, rate, typos_per_word, is_last, rng))
+            word_count += 1
+
+        output.append(word)
+        output.append(separator)
+        output_size += len(word) + len(separator)
+        if output_size >= chunk_size:
+            sink.write(''.join(output))
+            output.clear()
+            output_size = 0
+
+    # Hold back one word, so that the last one is known to be last when it is processed
+    previous: tuple[str, str] | None = None
+    for word, separator in iter_words(source, chunk_size):
+        if previous is not None:
+            emit(*previous, False)
+        previous = (word, separator)
+    if previous is not None:
+        emit(*previous, True)
+
+    sink.write(''.join(output))
+    sink.flush()
+
+    if log: logger.info("Applied typos to %s word(s) from the stream.", word_count)
+    return word_count
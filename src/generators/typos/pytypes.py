@@ -1,7 +1,13 @@
-from typing import TypedDict
+from typing import TypedDict, NotRequired
 
 class TypoArgs(TypedDict):
     text: str
+    # Read the text from this file ('-' for stdin) and stream it instead of using `text`
+    text_file: NotRequired[str | None]
+    # Apply typos to every line of this file ('-' for stdin) in parallel instead of using `text`
+    corpus_file: NotRequired[str | None]
+    # Worker processes for `corpus_file`. Defaults to the number of CPUs.
+    workers: NotRequired[int | None]
     typos: list[str]
     typo_weights: list[int]
     typo_rate: float
@@ -10,7 +10,7 @@ if __name__ == "__main__":
     print(f"States with Springfield: {states_with_springfield}")
     
     # Select a random state to demonstrate city retrieval
-    target_state = random.choice(states)['abbr']
+    target_state = random.choice(states).abbr
     print(f"\n--- Cities in randomly selected state/territory ({normalize_state_name(target_state)}) ---")
     cities = get_cities_by_state(target_state)
 
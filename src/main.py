@@ -1,35 +1,59 @@
 import argparse
+import atexit
 import random
 import os
-import faker
+import sys
+import time
+from contextlib import redirect_stdout
 from warnings import warn
+from typing import TYPE_CHECKING, Callable, Iterator, TextIO
 import utils.output as output_utils
-from utils import clean_dirty_colors
-from generators import gen_ssn, gen_phone, gen_name, gen_address, gen_typos, gen_color, \
-                       AddressArgs, TypoArgs, ColorArgs, NameArgs, TYPO_GENERATORS, NAME_TYPES, \
-                       FILE_CATEGORIES, EMAIL_CATEGORIES, MUSIC_GENRES, INSTRUMENT_CATEGORIES
+from utils import WeightedSampler, RecordSink, SUMMARY, LOG_LEVELS, DEFAULT_LOG_LEVEL, configure_logging, get_logger, RUN_LOG_FILE, start_run_log, stop_run_log, TextSink, ColumnarSink, DICTIONARY_COLUMN, OUTPUT_FORMATS, open_sink, resolve_generator
+from fake import seed_fake
+from generators.record.vars import RECORD_FIELDS
+from generators.name.vars import NAME_TYPES, FILE_CATEGORIES, EMAIL_CATEGORIES, get_music_genres, get_instrument_categories
 from pytypes import *
 
-# Put any files that are an output of the script here. "log.txt" will already exist.
+# Each generator type imports what it needs (Faker, NLTK, scipy...) only when it runs.
+if TYPE_CHECKING:
+    from generators.address import AddressArgs
+    from generators.typos import TypoArgs
+    from generators.color import ColorArgs
+    from generators.name import NameArgs
+    from generators.record import RecordArgs
+    from schema import DatasetSchema
+
+def get_typo_generator_names() -> list[str]:
+    from generators.typos import TYPO_GENERATORS
+    return list(TYPO_GENERATORS.keys())
+
+logger = get_logger("main")
+
+# How many records the bulk generators (SSN, phone, color) produce at a time
+RECORD_BATCH_SIZE = 1 << 16
+
+# Put any files that are an output of the script here. The run log (RUN_LOG_FILE) is written here too.
 OUTPUTS_DIR = output_utils.get_latest_outputs_dir("main")
 
 def main(
         val_type: str = "ssn",
         count: int = 1,
         components: list[str] | None = None,
-        address_args: AddressArgs={},
+        address_args: "AddressArgs" = {},
         state_abbr: bool = True,
         existing_city: bool = True,
-        typo_args: TypoArgs = {
-            'text': "Example text for typo generation.",
-            'typos': list(TYPO_GENERATORS.keys()),
-            'typo_weights': [1] * len(TYPO_GENERATORS),
-            'typo_rate': 0.1,
-            'typos_per_word': 1
-        },
-        color_args: ColorArgs = {},
-        name_args: NameArgs = {},
-        name_type: str = "person"
+        population_weighted: bool = False,
+        typo_args: "TypoArgs | None" = None,
+        color_args: "ColorArgs" = {},
+        name_args: "NameArgs" = {},
+        name_type: str = "person",
+        unique: bool = False,
+        cursor: int = 0,
+        seed: int | None = None,
+        output_format: str = "text",
+        output_path: str | None = None,
+        record_args: "RecordArgs" = {},
+        schema: "DatasetSchema | None" = None
     ):
     if components is None:
         components = []
@@ -41,44 +65,262 @@ def main(
             return components[index]
         return default
 
-    results = []
+    # Records are generated lazily and written to the sink as they are produced (in batches of RECORD_BATCH_SIZE
+    # for the bulk generators), so memory stays flat however large `count` is.
+    fields: list[str] = []
+    # Typed columns for the columnar format. If None, every field is written as a dictionary-encoded column.
+    columns: dict[str, str] | None = None
+    write_records: Callable[[RecordSink], None] | None = None
+    # Streamed typo output is text written straight to the output stream instead of going through a sink.
+    stream_output: Callable[[TextIO], None] | None = None
+
+    def batch_sizes() -> Iterator[int]:
+        for batch_start in range(0, count, RECORD_BATCH_SIZE):
+            yield min(RECORD_BATCH_SIZE, count - batch_start)
 
     if val_type == "ssn":
+        from generators.ssn import gen_ssn_batch, gen_ssn_unique_batch, format_ssns, format_ssn_buffer
+
         start = component_or_default(0)
         mid = component_or_default(1)
         end = component_or_default(2)
-        for _ in range(count):
-            results.append(gen_ssn(start, mid, end, log=True))
+        fields = ["ssn"]
+        columns = {"ssn_start": "uint16", "ssn_mid": "uint8", "ssn_end": "uint16"}
+        unique_key = random.getrandbits(64) if unique else 0
+        rng = resolve_generator()
+
+        def write_ssns(sink: RecordSink):
+            nonlocal cursor
+            for batch_size in batch_sizes():
+                if unique:
+                    batch, cursor = gen_ssn_unique_batch(batch_size, start, mid, end, key=unique_key, cursor=cursor, log=True)
+                else:
+                    batch = gen_ssn_batch(batch_size, start, mid, end, rng, log=True)
+
+                # Plain text skips per-record strings entirely and renders each batch into one fixed-width buffer.
+                if isinstance(sink, TextSink):
+                    sink.write_fixed_width(format_ssn_buffer(*batch))
+                elif isinstance(sink, ColumnarSink):
+                    sink.write_columns(dict(zip(sink.fields, batch)))
+                else:
+                    sink.write_many({"ssn": ssn} for ssn in format_ssns(*batch))
+
+                if unique and len(batch[0]) < batch_size:
+                    break
+
+        write_records = write_ssns
 
     if val_type == "phone":
+        from generators.phone import gen_phone_batch, gen_phone_unique_batch, format_phones, format_phone_buffer
+
         area = component_or_default(0)
         central = component_or_default(1)
         line = component_or_default(2)
-        for _ in range(count):
-            results.append(gen_phone(area, central, line, log=True))
+        fields = ["phone"]
+        columns = {"phone_area": "uint16", "phone_central": "uint16", "phone_line": "uint16"}
+        unique_key = random.getrandbits(64) if unique else 0
+        rng = resolve_generator()
+
+        def write_phones(sink: RecordSink):
+            nonlocal cursor
+            for batch_size in batch_sizes():
+                if unique:
+                    batch, cursor = gen_phone_unique_batch(batch_size, area, central, line, key=unique_key, cursor=cursor, log=True)
+                else:
+                    batch = gen_phone_batch(batch_size, area, central, line, rng, log=True)
+
+                if isinstance(sink, TextSink):
+                    sink.write_fixed_width(format_phone_buffer(*batch))
+                elif isinstance(sink, ColumnarSink):
+                    sink.write_columns(dict(zip(sink.fields, batch)))
+                else:
+                    sink.write_many({"phone": phone} for phone in format_phones(*batch))
+
+                if unique and len(batch[0]) < batch_size:
+                    break
+
+        write_records = write_phones
 
     if val_type == "address":
-        for _ in range(count):
-            results.append(gen_address(address_args, state_abbr, existing_city, log=True))
+        from generators.address import gen_address_parts, format_address
+
+        fields = ["address"]
+        # Columnar output keeps the parts of each address apart
+        columns = {
+            "building_number": DICTIONARY_COLUMN,
+            "street": DICTIONARY_COLUMN,
+            "city": DICTIONARY_COLUMN,
+            "state": DICTIONARY_COLUMN,
+            "zip": DICTIONARY_COLUMN
+        }
+
+        def write_addresses(sink: RecordSink):
+            for _ in range(count):
+                parts = gen_address_parts(address_args, state_abbr, existing_city, log=True, population_weighted=population_weighted)
+                sink.write({"address": format_address(parts), **parts})
+
+        write_records = write_addresses
 
     if val_type == "typos":
-        typo_distrb = [(int(typo_args['typo_weights'][i]), typo) for i, typo in enumerate(typo_args['typos'])]
-        for _ in range(count):
-            results.append(gen_typos(typo_args['text'], typo_distrb, typo_args['typo_rate'], typo_args['typos_per_word'], log=True))
+        from generators.typos import gen_typos, stream_typos, gen_typos_corpus
+
+        if typo_args is None:
+            typo_names = get_typo_generator_names()
+            typo_args = {
+                'text': "Example text for typo generation.",
+                'typos': typo_names,
+                'typo_weights': [1] * len(typo_names),
+                'typo_rate': 0.1,
+                'typos_per_word': 1
+            }
+
+        # Built once and shared by every generated text
+        typo_distrb = WeightedSampler([(int(typo_args['typo_weights'][i]), typo) for i, typo in enumerate(typo_args['typos'])])
+        text_file = typo_args.get('text_file')
+        corpus_file = typo_args.get('corpus_file')
+        fields = ["text"]
+
+        if (text_file is not None or corpus_file is not None) and output_format != "text":
+            warn(f"Streamed typo output keeps the original text as it is, so it is always plain text. Ignoring output format '{output_format}'.")
+
+        if corpus_file is not None:
+            if corpus_file == "-" and count > 1:
+                warn("Standard input can only be read once. Generating a single typo variation.")
+                count = 1
+
+            # The pool's workers rebuild the sampler from the plain pairs
+            corpus_distrb = [(int(typo_args['typo_weights'][i]), typo) for i, typo in enumerate(typo_args['typos'])]
+            corpus_seed = seed if seed is not None else random.getrandbits(128)
+
+            def stream_corpus_output(output_stream: TextIO):
+                chunk_offset = 0
+                for _ in range(count):
+                    if corpus_file == "-":
+                        chunk_offset += gen_typos_corpus(sys.stdin, output_stream, corpus_distrb, typo_args['typo_rate'], typo_args['typos_per_word'], corpus_seed, typo_args.get('workers'), chunk_offset, log=True)
+                    else:
+                        with open(corpus_file, "r", encoding="utf-8", newline="") as f:
+                            chunk_offset += gen_typos_corpus(f, output_stream, corpus_distrb, typo_args['typo_rate'], typo_args['typos_per_word'], corpus_seed, typo_args.get('workers'), chunk_offset, log=True)
+
+            stream_output = stream_corpus_output
+        elif text_file is None:
+            def write_typos(sink: RecordSink):
+                sink.write_many(
+                    {"text": gen_typos(typo_args['text'], typo_distrb, typo_args['typo_rate'], typo_args['typos_per_word'], log=True)}
+                    for _ in range(count)
+                )
+
+            write_records = write_typos
+        else:
+            if text_file == "-" and count > 1:
+                warn("Standard input can only be read once. Generating a single typo variation.")
+                count = 1
+
+            def stream_typos_output(output_stream: TextIO):
+                for _ in range(count):
+                    if text_file == "-":
+                        stream_typos(sys.stdin, output_stream, typo_distrb, typo_args['typo_rate'], typo_args['typos_per_word'], log=True)
+                    else:
+                        # newline='' keeps the file's line endings as they are
+                        with open(text_file, "r", encoding="utf-8", newline="") as f:
+                            stream_typos(f, output_stream, typo_distrb, typo_args['typo_rate'], typo_args['typos_per_word'], log=True)
+
+            stream_output = stream_typos_output
 
     if val_type == "color":
-        for _ in range(count):
-            results.append(gen_color(color_args, log=True))
+        from generators.color import gen_color_batch, format_colors
+
+        fields = ["color"]
+        columns = {"r": "uint8", "g": "uint8", "b": "uint8", "name": DICTIONARY_COLUMN}
+        rng = resolve_generator()
+
+        def write_colors(sink: RecordSink):
+            # Each batch of colors is drawn, converted, and named in bulk rather than one at a time.
+            for batch_size in batch_sizes():
+                rgbs, names = gen_color_batch(color_args, batch_size, rng, log=True)
+                if isinstance(sink, ColumnarSink):
+                    sink.write_columns({"r": rgbs[:, 0], "g": rgbs[:, 1], "b": rgbs[:, 2], "name": names})
+                else:
+                    sink.write_many({"color": color} for color in format_colors(rgbs, names))
+
+        write_records = write_colors
 
     if val_type == "name":
-        for _ in range(count):
-            results.append(gen_name(name_type, name_args, log=True))
+        from generators.name import gen_name
+
+        fields = ["name"]
 
-    print("------- Output -------")
-    for result in results:
-        print(result)
+        def write_names(sink: RecordSink):
+            sink.write_many({"name": gen_name(name_type, name_args, log=True)} for _ in range(count))
+
+        write_records = write_names
+
+    if val_type == "record":
+        from generators.record import iter_record_batches, iter_records, get_record_columns
+
+        fields = record_args.get('fields', RECORD_FIELDS)
+        # Columnar output stores the parts of each field rather than its formatted string
+        columns = get_record_columns(fields)
+
+        def write_record_batches(sink: RecordSink):
+            # Every field is generated for a whole batch at a time, and the name, location and color indexes
+            # loaded by the first batch are reused by the rest.
+            for batch in iter_record_batches(count, record_args, log=True):
+                if isinstance(sink, ColumnarSink):
+                    sink.write_columns({column: batch[column] for column in sink.fields})
+                else:
+                    sink.write_many(iter_records(batch, sink.fields))
+
+        write_records = write_record_batches
+
+    if val_type == "schema" and schema is not None:
+        from schema import compile_schema
+
+        plan = compile_schema(schema, seed, log=True)
+        fields = plan.fields
+        columns = plan.columnar_columns
+
+        def write_plan(sink: RecordSink):
+            plan.write(sink, log=True)
+
+        write_records = write_plan
+
+    # When the records go to standard output, everything else goes to standard error, so that the output can be
+    # redirected (e.g. `> out.csv`) without stray lines
+    messages = sys.stderr if output_path is None else sys.stdout
+
+    if output_path is None:
+        print("------- Output -------", file=messages)
+    else:
+        print(f"Writing output to: {output_path}")
+
+    if stream_output is not None:
+        if output_path is None:
+            stream_output(sys.stdout)
+        else:
+            with open(output_path, "w", encoding="utf-8", newline="") as f:
+                stream_output(f)
+    elif write_records is not None:
+        start_time = time.perf_counter()
+        with open_sink(output_format, fields, output_path, columns) as sink:
+            # Anything printed while generating goes to standard error (like the log), so that standard output
+            # only carries records
+            with redirect_stdout(sys.stderr):
+                write_records(sink)
+        elapsed = time.perf_counter() - start_time
+        if output_path is not None:
+            print(f"Wrote {sink.count} record(s) to {output_path}.")
+        logger.log(SUMMARY, "Generated %d %s record(s) in %.2fs (%.0f records/s).", sink.count, val_type, elapsed, sink.count / elapsed if elapsed > 0 else 0)
+
+    if unique and val_type in ["ssn", "phone"]:
+        print("----------------------", file=messages)
+        print(f"Unique cursor: {cursor}. Run again with the same --seed and components plus --cursor {cursor} to continue without repeats.", file=messages)
 
 if __name__ == "__main__":
+    # Everything printed from here on (help and argument errors included) is also written to the run log, without
+    # colors. Stopped at exit, so that the traceback of a crash is logged as well.
+    run_log = start_run_log(os.path.join(OUTPUTS_DIR, RUN_LOG_FILE))
+    atexit.register(stop_run_log)
+
     parser = argparse.ArgumentParser(
         description="Generate fake but realistic US Social Security Numbers, phone numbers, addresses, typos, and colors for testing purposes.",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -91,9 +333,15 @@ if __name__ == "__main__":
         help="If set, will clean up the file at `assets/colors-dirty.json` by extracting valid color entries (and only the parts we need) and writing them to `assets/colors.json`, then abort without running further."
     )
 
+    parser.add_argument(
+        "--build-homophones", "-bh",
+        action="store_true",
+        help="If set, will compile the CMU pronouncing dictionary into the memory-mapped homophone table at `assets/homophones.bin` used by homophone typos, then abort without running further."
+    )
+
     parser.add_argument(
         'type',
-        choices=['ssn', 'phone', 'address', 'typos', 'color', 'name'],
+        choices=['ssn', 'phone', 'address', 'typos', 'color', 'name', 'record'],
         default='ssn',
         nargs='?',
         help="Type of information to generate (default: ssn)"
@@ -131,6 +379,50 @@ if __name__ == "__main__":
         help="Number of random bytes to use for seed generation if no seed is provided (default: 16)."
     )
 
+    parser.add_argument(
+        '--schema', '-sc',
+        default=None,
+        metavar="FILE",
+        help="Generate the dataset described by a JSON or TOML schema file (its columns, their types and options, and the row count) instead of TYPE and COUNT. The schema's seed is used unless --seed is given."
+    )
+
+    parser.add_argument(
+        '--log-level', '-ll',
+        choices=list(LOG_LEVELS.keys()),
+        default=DEFAULT_LOG_LEVEL,
+        help=f"How much to log to standard error: debug (a line per generated item), info (a line per batch or step), summary (only the end-of-run summary), warning or error (only problems) (default: {DEFAULT_LOG_LEVEL})."
+    )
+
+    def log_size_type(s: str) -> float:
+        try:
+            value = float(s)
+            if value <= 0:
+                raise argparse.ArgumentTypeError("Run log size must be a positive number of megabytes.")
+            return value
+        except ValueError:
+            raise argparse.ArgumentTypeError("Run log size must be a positive number of megabytes.")
+
+    parser.add_argument(
+        '--log-max-size', '-lms',
+        type=log_size_type,
+        default=None,
+        metavar="MB",
+        help=f"Rotate the run log ({RUN_LOG_FILE} in the run's output directory) once it grows past this many megabytes, keeping the previous ones as {RUN_LOG_FILE}.1, {RUN_LOG_FILE}.2, ... (default: never rotate)."
+    )
+
+    parser.add_argument(
+        '--format', '-f',
+        choices=OUTPUT_FORMATS,
+        default="text",
+        help="Output format: plain text (one value per line), CSV with a header row, JSON Lines, or columnar (a directory of typed .npy columns plus schema.json, for --output DIR) (default: text)."
+    )
+
+    parser.add_argument(
+        '--output', '-o',
+        default=None,
+        help="Write the output to this file (replaced if it exists) instead of standard output. Records are written as they are generated, so memory use does not grow with the count."
+    )
+
     # Common arguments for SSN and phone (freeform components)
     parser.add_argument(
         '--components', '-c',
@@ -138,6 +430,27 @@ if __name__ == "__main__":
         help="Optional components with patterns for SSN/phone. Use digits for fixed values, non-digits (like 'x') for random digits. Separate with spaces or dashes."
     )
 
+    parser.add_argument(
+        '--unique', '-u',
+        action='store_true',
+        help="For SSN/phone, never repeat a value: walk a seeded permutation of every value the components can produce. Stops early with a warning if the space runs out."
+    )
+
+    def cursor_type(s: str) -> int:
+        try:
+            value = int(s)
+            if value < 0:
+                raise argparse.ArgumentTypeError("Cursor must be a non-negative integer.")
+            return value
+        except ValueError:
+            raise argparse.ArgumentTypeError("Cursor must be a non-negative integer.")
+
+    parser.add_argument(
+        '--cursor', '-cu',
+        type=cursor_type,
+        help="With --unique, resume the permutation from this cursor (printed at the end of the previous run). Requires the same --seed and components. (default: 0)"
+    )
+
     # Specific arguments for address generation
     parser.add_argument('--building_number', '-bn', help="Building number for address")
     parser.add_argument('--street', '-ste', help="Street name for address")
@@ -146,6 +459,11 @@ if __name__ == "__main__":
     parser.add_argument('--zip', '-z', help="ZIP code for address")
     parser.add_argument('--no-state-abbr', action='store_true', help="Do not convert state names to abbreviations")
     parser.add_argument('--no-existing-city', action='store_true', help="Do not use existing city names; generate random city names instead")
+    parser.add_argument(
+        '--population-weighted', '-pw',
+        action='store_true',
+        help="Pick random states, cities and zip codes in proportion to their real population instead of uniformly"
+    )
 
     # Specific arguments for typo generation
     parser.add_argument(
@@ -155,12 +473,41 @@ if __name__ == "__main__":
         help="The text to apply typos to. Should be only keyboard characters and spaces. (default: 'Example text for typo generation.')"
     )
 
+    parser.add_argument(
+        "--text-file", "-tf",
+        default=None,
+        help="Read the text to apply typos to from this file ('-' for standard input) instead of --text. The file is streamed in chunks, so it can be any size, and its whitespace and line breaks are kept as they are."
+    )
+
+    parser.add_argument(
+        "--corpus", "-co",
+        default=None,
+        help="Apply typos to every line of this file ('-' for standard input) independently, spread across worker processes. Lines are written in their original order, and a seeded run gives the same output with any number of workers."
+    )
+
+    def worker_count_type(s: str) -> int:
+        try:
+            value = int(s)
+            if value < 1:
+                raise argparse.ArgumentTypeError("Worker count must be a positive integer.")
+            return value
+        except ValueError:
+            raise argparse.ArgumentTypeError("Worker count must be a positive integer.")
+
+    parser.add_argument(
+        "--workers", "-w",
+        type=worker_count_type,
+        default=None,
+        help="Number of worker processes for --corpus (default: the number of CPUs)."
+    )
+
     parser.add_argument(
         '--typos', '-ts',
         nargs="+",
-        choices=TYPO_GENERATORS.keys(),
-        default=TYPO_GENERATORS.keys(),
-        help="Categories of typos to apply (default: all types)."
+        choices=LazyChoices(get_typo_generator_names),
+        default=None,
+        metavar="TYPO",
+        help="Categories of typos to apply (default: all types). Choices: %(choices)s."
     )
 
     parser.add_argument(
@@ -182,6 +529,16 @@ if __name__ == "__main__":
     parser.add_argument('--min-b', '-mnb', type=rgb_bound_type, default=0, help="Minimum blue value for color generation (0-255, default: 0)")
     parser.add_argument('--max-b', '-mxb', type=rgb_bound_type, default=255, help="Maximum blue value for color generation (0-255, default: 255)")
     parser.add_argument('--exact-b', '-b', type=rgb_bound_type, default=None, help="Exact blue value for color generation (0-255). If specified, overrides min and max blue values.")
+    parser.add_argument(
+        '--perceptual-naming', '-pn',
+        action='store_true',
+        help="Name colors by their nearest palette entry in CIELAB space (perceptual distance) instead of raw RGB."
+    )
+    parser.add_argument(
+        '--color-lut', '-cl',
+        action='store_true',
+        help="Name colors through a precomputed lookup table covering every 24-bit RGB value (`assets/colors-lut.bin`) instead of a KD-tree query. The table is built on first use and rebuilt whenever `assets/colors.json` changes."
+    )
 
     # Specific arguments for name generation
     parser.add_argument(
@@ -212,46 +569,97 @@ if __name__ == "__main__":
         help="Email category for email generation"
     )
     parser.add_argument('--subdomains', '-sd', type=subdomain_count_type, default=1, help="Number of subdomains for website generation (default: 1)")
+    # Loaded from faker_music only when a value is given or help is printed. The explicit metavars
+    # stop argparse from listing (and so loading) the choices while the parser is being built.
+    music_genres = LazyChoices(get_music_genres)
+    instrument_categories = LazyChoices(get_instrument_categories)
     parser.add_argument(
         '--parent-music-genre', '-pmg',
-        choices=MUSIC_GENRES,
+        choices=music_genres,
         default=None,
-        type=case_insensitive_choice_type(MUSIC_GENRES),
-        help="Parent music genre for music_genre generation"
+        type=case_insensitive_choice_type(music_genres),
+        metavar="GENRE",
+        help="Parent music genre for music_genre generation. Choices: %(choices)s."
     )
     parser.add_argument(
         '--music-instrument-category', '-mic',
-        choices=INSTRUMENT_CATEGORIES,
+        choices=instrument_categories,
+        default=None,
+        type=case_insensitive_choice_type(instrument_categories),
+        metavar="CATEGORY",
+        help="Instrument category for music_instrument generation. Choices: %(choices)s."
+    )
+
+    # Specific arguments for record generation
+    parser.add_argument(
+        '--record-fields', '-rf',
+        nargs='+',
+        choices=RECORD_FIELDS,
         default=None,
-        type=case_insensitive_choice_type(INSTRUMENT_CATEGORIES),
-        help="Instrument category for music_instrument generation"
+        help="Fields of each generated record, in output order (default: all of them). Address fields take the address arguments, color fields the color arguments, and names --gender."
     )
 
     # Argument processing
     args = parser.parse_args()
+    if args.log_max_size is not None:
+        run_log.max_bytes = int(args.log_max_size * (1 << 20))
+    configure_logging(args.log_level)
+
+    if args.format == "columnar" and args.output in [None, "-"]:
+        parser.error("--format columnar writes a directory of column files, so it requires --output DIR.")
+
+    if args.cursor is not None and not args.unique:
+        parser.error("--cursor resumes a --unique run, so it requires --unique.")
 
     if args.clean_dirty_colors:
+        from utils import clean_dirty_colors
         clean_dirty_colors()
         print("Exiting after cleaning dirty colors.")
         exit(0)
 
+    if args.build_homophones:
+        from typo import build_homophone_table
+        print(f"Homophone table written to: {build_homophone_table()}")
+        print("Exiting after building homophone table.")
+        exit(0)
+
+    # Like in main, messages stay off standard output when the records are written there
+    messages = sys.stderr if args.output in [None, "-"] else sys.stdout
+
+    schema: "DatasetSchema | None" = None
+    if args.schema is not None:
+        from schema import load_schema
+
+        try:
+            schema = load_schema(args.schema)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+
+        if args.seed is None and 'seed' in schema:
+            print(f"Using the seed from schema file '{args.schema}'.", file=messages)
+            args.seed = schema['seed']
+
     if args.seed is not None:
-        print(f"Using provided seed: {args.seed}")
-        faker.Faker.seed(args.seed)
+        print(f"Using provided seed: {args.seed}", file=messages)
+        seed_fake(args.seed)
         random.seed(args.seed)
     else:
-        seed = int.from_bytes(os.urandom(args.seed_byte_size), 'big')
-        print(f"No seed provided. Generated random seed {seed} from {args.seed_byte_size} bytes of entropy.")
-        faker.Faker.seed(seed)
+        args.seed = seed = int.from_bytes(os.urandom(args.seed_byte_size), 'big')
+        print(f"No seed provided. Generated random seed {seed} from {args.seed_byte_size} bytes of entropy.", file=messages)
+        seed_fake(seed)
         random.seed(seed)
 
     if args.type == 'color':
         warn("Color generation will pick random values, but all will correspond to an actual color.")
 
+    if args.type in ['color', 'record'] and args.color_lut:
+        from utils import load_color_lut
+        load_color_lut(perceptual=args.perceptual_naming)
+
     if args.type == 'name' and args.name_type in ['job', 'music_genre', 'music_instrument', 'vehicle']:
         warn(f"{args.name_type} generation will pick random values, but all will correspond to real entries in the Faker database for that category.")
 
-    address_args: AddressArgs = {
+    address_args: "AddressArgs" = {
         'building_number': str(args.building_number) if args.building_number is not None else None,
         'street': str(args.street) if args.street is not None else None,
         'city': str(args.city) if args.city is not None else None,
@@ -259,9 +667,16 @@ if __name__ == "__main__":
         'zip': str(args.zip) if args.zip is not None else None
     }
 
-    typo_args: TypoArgs = {
+    # Typo generator names are only resolved (and the typo engine imported) for typo runs
+    if args.type == "typos" and args.typos is None:
+        args.typos = get_typo_generator_names()
+
+    typo_args: "TypoArgs" = {
         'text': args.text,
-        'typos': args.typos,
+        'text_file': args.text_file,
+        'corpus_file': args.corpus,
+        'workers': args.workers,
+        'typos': args.typos if args.typos else [],
         'typo_weights': args.typo_weights if args.typo_weights else [],
         'typo_rate': args.typo_rate,
         'typos_per_word': args.typos_per_word
@@ -281,7 +696,7 @@ if __name__ == "__main__":
             else:
                 components.append(component)
 
-    color_args: ColorArgs = {
+    color_args: "ColorArgs" = {
         'min_r': args.min_r,
         'max_r': args.max_r,
         'exact_r': args.exact_r,
@@ -291,9 +706,10 @@ if __name__ == "__main__":
         'min_b': args.min_b,
         'max_b': args.max_b,
         'exact_b': args.exact_b,
+        'perceptual': args.perceptual_naming,
     }
 
-    name_args: NameArgs = {}
+    name_args: "NameArgs" = {}
     if args.first_name is not None:
         name_args['first_name'] = args.first_name
     if args.last_name is not None:
@@ -312,4 +728,20 @@ if __name__ == "__main__":
     if args.music_instrument_category is not None:
         name_args['music_instrument_category'] = args.music_instrument_category
 
-    main(args.type, args.count, components, address_args, not args.no_state_abbr, not args.no_existing_city, typo_args, color_args, name_args=name_args, name_type=args.name_type)
\ No newline at end of file
+    record_args: "RecordArgs" = {
+        'address': address_args,
+        'state_abbr': not args.no_state_abbr,
+        'existing_city': not args.no_existing_city,
+        'population_weighted': args.population_weighted,
+        'color': color_args
+    }
+    if args.record_fields is not None:
+        # Repeated fields are only generated once
+        record_args['fields'] = list(dict.fromkeys(args.record_fields))
+    if args.gender is not None:
+        record_args['gender'] = args.gender
+
+    # The same warning can be raised for every generated value, so each kind is shown once and counted after that
+    with output_utils.aggregate_warnings():
+        main("schema" if schema is not None else args.type, args.count, components, address_args, not args.no_state_abbr, not args.no_existing_city, args.population_weighted, typo_args, color_args, name_args=name_args, name_type=args.name_type, unique=args.unique, cursor=args.cursor or 0, seed=args.seed,
+             output_format=args.format, output_path=None if args.output in [None, "-"] else args.output, record_args=record_args, schema=schema)
\ No newline at end of file
@@ -0,0 +1,186 @@
+from utils import *
+from generators.ssn import gen_ssn_batch, format_ssns
+from generators.record import iter_record_batches, iter_records, get_record_columns, make_email_local_part
+from generators.address import ADDRESS_PARTS, gen_address_parts, gen_address_parts_batch, format_address
+import utils.location as location_utils
+from fake import create_fake
+from colorama import Fore
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import warnings
+
+if __name__ == "__main__":
+    failures = 0
+
+    def check(description: str, passed: bool):
+        global failures
+        print(f"{'PASS' if passed else 'FAIL'}: {description}")
+        if not passed:
+            failures += 1
+
+    records = [
+        {"name": "Alice Smith", "zip": "04101"},
+        {"name": 'Bob "Bobby" Jones, Jr.', "zip": "90001"},
+        {"name": "Zoë Ölander", "zip": None}
+    ]
+
+    print("--- Record Sinks ---")
+    outputs: dict[str, str] = {}
+    for output_format in ["text", "csv", "jsonl"]:
+        stream = io.BytesIO()
+        with SINK_TYPES[output_format](stream, ["name", "zip"]) as sink:
+            sink.write_many(records)
+        outputs[output_format] = stream.getvalue().decode("utf-8")
+        print(f"{output_format}:\n{outputs[output_format]}")
+
+    check("Text output has one tab-separated line per record", outputs["text"].splitlines() == ["Alice Smith\t04101", 'Bob "Bobby" Jones, Jr.\t90001', "Zoë Ölander\t"])
+    check("CSV output round-trips through the csv module", list(csv.DictReader(io.StringIO(outputs["csv"]))) == [{**record, "zip": record["zip"] or ""} for record in records])
+    check("JSONL output round-trips through the json module", [json.loads(line) for line in outputs["jsonl"].splitlines()] == records)
+
+    print("\n--- Columnar Output ---")
+    rng = np.random.default_rng(0)
+    starts, mids, ends = gen_ssn_batch(COLUMNAR_BATCH_SIZE + 5, rng=rng)
+    names = [f"Person {i % 7}" for i in range(len(starts))]
+
+    with tempfile.TemporaryDirectory() as directory:
+        with open_sink("columnar", [], directory, {"ssn_start": "uint16", "ssn_mid": "uint8", "ssn_end": "uint16", "name": DICTIONARY_COLUMN}) as sink:
+            # Half as whole columns, half one record at a time
+            half = len(starts) // 2
+            sink.write_columns({"ssn_start": starts[:half], "ssn_mid": mids[:half], "ssn_end": ends[:half], "name": names[:half]})
+            sink.write_many(
+                {"ssn_start": s, "ssn_mid": m, "ssn_end": e, "name": n}
+                for s, m, e, n in zip(starts[half:].tolist(), mids[half:].tolist(), ends[half:].tolist(), names[half:])
+            )
+
+        with open(os.path.join(directory, COLUMNAR_SCHEMA_FILE), "r", encoding="utf-8") as f:
+            schema = json.load(f)
+        print(f"Schema: { {column['name']: (column['dtype'], column['encoding']) for column in schema['columns']} }")
+
+        columns = load_columnar(directory)
+        decoded = load_columnar(directory, decode=True)
+
+        check("Every column has every row", schema["count"] == len(starts) and all(len(column) == len(starts) for column in columns.values()))
+        check("Integer columns keep their narrow dtypes", columns["ssn_mid"].dtype == np.uint8 and columns["ssn_start"].dtype == np.uint16)
+        check("Integer columns are memory-mapped", isinstance(columns["ssn_start"], np.memmap))
+        check("Integer columns round-trip", format_ssns(columns["ssn_start"].astype(np.int64), columns["ssn_mid"].astype(np.int64), columns["ssn_end"].astype(np.int64)) == format_ssns(starts, mids, ends))
+        check("String columns are stored once per distinct value", len(schema["columns"][3]["dictionary"]) == 7)
+        check("String columns decode back to the original values", decoded["name"].tolist() == names)
+
+        try:
+            with open_sink("columnar", [], directory, {"tiny": "uint8"}) as sink:
+                sink.write_columns({"tiny": np.array([256])})
+            check("Values that do not fit a column's dtype are refused", False)
+        except ValueError:
+            check("Values that do not fit a column's dtype are refused", True)
+
+    print("\n--- Records ---")
+    def gen_records(seed: int, fields: list[str]) -> list[dict]:
+        rng = np.random.default_rng(seed)
+        fake = create_fake(rng=rng)
+        return [
+            record
+            for batch in iter_record_batches(25, {'fields': fields, 'population_weighted': True}, batch_size=10, rng=rng, fake=fake)
+            for record in iter_records(batch, fields + list(get_record_columns(fields)))
+        ]
+
+    fields = ["name", "email", "ssn", "phone", "color"]
+    generated = gen_records(0, fields)
+    for record in generated[:2]:
+        print({field: record[field] for field in fields})
+
+    check("Every batch is generated", len(generated) == 25)
+    check("The same seed gives the same records", generated == gen_records(0, fields))
+    check("Emails are made from the record's own name", all(record["email"].startswith(make_email_local_part(record["first_name"], record["last_name"])) for record in generated))
+    check("Formatted fields match their parts", all(record["ssn"] == f"{record['ssn_start']:03}-{record['ssn_mid']:02}-{record['ssn_end']:04}" for record in generated))
+    check("Only the requested fields are generated", set(next(iter_record_batches(1, {'fields': ["phone"]}))) == {"phone", "phone_area", "phone_central", "phone_line"})
+    check("Email local parts are plain ASCII", make_email_local_part("Zoë", "O'Neil") == "zoe.oneil")
+
+    address_fields = ["address"] + list(get_record_columns(["address"]))
+    addresses = gen_records(1, ["address"])
+    print(addresses[0]["address"])
+    check("Batched addresses match their parts", all(record["address"] == format_address({part: record[part] for part in ADDRESS_PARTS}) for record in addresses))
+    check("The same seed gives the same addresses", [{field: record[field] for field in address_fields} for record in addresses] == [{field: record[field] for field in address_fields} for record in gen_records(1, ["address"])])
+    zip_columns = get_record_columns(["address"])
+    zip_batch = next(iter_record_batches(3, {'fields': ["address"], 'address': {'zip': "02134"}}))
+    with tempfile.TemporaryDirectory() as directory:
+        with open_sink("columnar", [], directory, zip_columns) as sink:
+            sink.write_columns({column: zip_batch[column] for column in zip_columns})
+        check("Columnar zip codes keep their leading zeros", load_columnar(directory, decode=True)["zip"].tolist() == ["02134"] * 3)
+    empty_state = next(state.abbr for state in location_utils.get_all_us_states() if len(location_utils.get_cities_by_state(state.abbr)) == 0)
+    check("States with no listed cities get a made-up city on both paths", gen_address_parts({'state': empty_state})["state"] == empty_state and gen_address_parts_batch(2, {'state': empty_state})["state"] == [empty_state] * 2)
+    zip_batch = gen_address_parts_batch(5, {'zip': "abc"}, population_weighted=True, rng=np.random.default_rng(0))
+    check("An invalid zip code is replaced by a random one per address", len(set(zip_batch["zip"])) > 1 and all(len(zip) == 5 and zip.isdigit() for zip in zip_batch["zip"]))
+
+    print("\n--- Logging ---")
+    def gen_logged(level: str) -> str:
+        stream = io.StringIO()
+        configure_logging(level, stream)
+        clamp_batch(np.array([-5, 5, 50]), 0, 10, log=True)
+        clamp(-5, 0, 10, log=True)
+        get_logger("output_test").log(SUMMARY, "Done.")
+        return stream.getvalue()
+
+    logged = {level: gen_logged(level) for level in LOG_LEVELS}
+    print(logged["debug"], end="")
+
+    check("Per-value messages are only logged at the debug level", "Clamping value" in logged["debug"] and "Clamping value" not in logged["info"])
+    check("Per-batch messages are logged at the info level", "Clamping 1 value(s)" in logged["info"] and "Clamping 1 value(s)" not in logged["summary"])
+    check("The summary level only logs the summary", logged["summary"] == "Done.\n")
+    check("Nothing below warning is logged at the warning level", logged["warning"] == "")
+    configure_logging(DEFAULT_LOG_LEVEL)
+
+    print("\n--- Warning Aggregation ---")
+    shown: list[str] = []
+    original_showwarning = warnings.showwarning
+    def record_warning(message, *args, **kwargs):
+        shown.append(str(message))
+    warnings.showwarning = record_warning
+    with aggregate_warnings() as aggregator:
+        for start in [123, 123, 456]:
+            warnings.warn(f"The specified SSN start ({start}) means the generated SSN may correspond to a real person.")
+        warnings.warn("Colors file not found.")
+        warnings.warn("Colors file not found.", RuntimeWarning)
+    restored = warnings.showwarning
+    warnings.showwarning = original_showwarning
+    print(aggregator.counts)
+
+    check("Only the first warning of each kind is shown", shown == ["The specified SSN start (123) means the generated SSN may correspond to a real person.", "Colors file not found.", "Colors file not found."])
+    check("Warnings are counted by message template", aggregator.counts[(UserWarning, "The specified SSN start (<n>) means the generated SSN may correspond to a real person.")] == 3)
+    check("Warnings are counted by category", len(aggregator.counts) == 3)
+    check("The previous warning handler is restored", restored is record_warning)
+    check("Quoted values are templated", get_warning_template("The specified street address ('12 Main St') may correspond to a real location.") == "The specified street address ('<value>') may correspond to a real location.")
+
+    print("\n--- Run Log ---")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, RUN_LOG_FILE)
+        terminal_stdout = sys.stdout
+        run_log = start_run_log(path)
+        print(Fore.YELLOW + "Colored line" + Fore.RESET)
+        sys.stdout.flush()
+        sys.stdout.buffer.write(b"Binary line\n")
+        sys.stdout.buffer.flush()
+        stop_run_log()
+
+        with open(path, "r", encoding="utf-8") as f:
+            logged_text = f.read()
+        print(repr(logged_text))
+
+        check("Printed text is logged without color codes", logged_text == "Colored line\nBinary line\n")
+        check("Standard output is restored once the run log stops", sys.stdout is terminal_stdout and run_log.file is None)
+
+        writer = RunLogWriter(path, max_bytes=10, backup_count=2)
+        for i in range(4):
+            writer.write_text(f"line {i}\n")
+        writer.close()
+        rotated = [open(f"{path}{suffix}", encoding="utf-8").read() for suffix in ["", ".1", ".2"]]
+        print(rotated)
+
+        check("The run log is rotated once it grows past its size limit", rotated == ["line 3\n", "line 2\n", "line 1\n"])
+        check("Only backup_count rotated logs are kept", not os.path.exists(f"{path}.3"))
+
+    print(f"\n{failures} check(s) failed.")
+    sys.exit(1 if failures else 0)
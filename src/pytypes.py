@@ -1,4 +1,4 @@
-from typing import TypedDict, NotRequired
+from typing import TypedDict, NotRequired, Callable, Iterable, Iterator
 from typo.vars import all_characters
 import argparse
 import re
@@ -42,4 +42,29 @@ def case_insensitive_choice_type(choices: list[str]):
             if s.lower() == choice.lower():
                 return choice
         raise argparse.ArgumentTypeError(f"Invalid choice '{s}'. Valid choices are: {', '.join(choices)}.")
-    return validator
\ No newline at end of file
+    return validator
+
+class LazyChoices:
+    """
+        An argparse `choices` container that only loads its values the first time argparse needs them
+        (to validate a value or to print help), so that building the parser never imports the generators.
+
+        :param load: Returns the valid choices.
+    """
+    def __init__(self, load: Callable[[], Iterable[str]]):
+        self.load = load
+        self.choices: list[str] | None = None
+
+    def get(self) -> list[str]:
+        if self.choices is None:
+            self.choices = list(self.load())
+        return self.choices
+
+    def __contains__(self, value: object) -> bool:
+        return value in self.get()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.get())
+
+    def __len__(self) -> int:
+        return len(self.get())
@@ -0,0 +1,527 @@
+import json
+import os
+import random
+import tomllib
+import numpy as np
+from typing import TYPE_CHECKING, Any, Iterator
+from warnings import warn
+from utils import RecordSink, ColumnarSink, DICTIONARY_COLUMN, WeightedSampler, derive_seed, derive_random, derive_generator, get_logger
+from .pytypes import *
+from .vars import *
+
+if TYPE_CHECKING:
+    from faker import Faker
+
+logger = get_logger("schema")
+
+def is_integer(value: Any) -> bool:
+    # bool is a subclass of int, but `true` is not a valid count or channel value
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def parse_components(value: list[str | int] | str | None) -> list[str | int | None]:
+    """
+        Turn a column's `components` option into exactly three component values, the same way --components is read:
+        strings are split at dashes, "none" or "null" leaves a component unspecified, and missing components are None.
+    """
+    if value is None:
+        return [None, None, None]
+
+    components: list[str | int | None] = []
+    for component in ([value] if isinstance(value, str) else value):
+        if isinstance(component, str):
+            components.extend(None if part.lower() in ["none", "null"] else part for part in component.split('-'))
+        else:
+            components.append(component)
+
+    return components + [None] * (3 - len(components))
+
+class ColumnPlan:
+    """
+        One column of a compiled schema. Options are validated by `check_options` and resolved once, when the plan
+        is built: lookups and samplers the column needs are loaded up front and reused by every batch. Each column
+        draws from its own streams derived from the plan's seed and the column's name.
+
+        :param name: The column's name, used as the field name in the output.
+        :param options: The column's options, already checked by `check_options`.
+        :param seed: The plan's master seed.
+    """
+    name: str
+    options: dict[str, Any]
+    # Column name to type (see `utils.columnar.ColumnarSink`) for columnar output
+    columnar_columns: dict[str, str]
+    # Typed parts kept apart from the formatted value, each written as its own column named "<name>_<part>"
+    parts: tuple[str, ...] = ()
+
+    def __init__(self, name: str, options: dict[str, Any], seed: int):
+        self.name = name
+        self.options = options
+        self.random = derive_random(seed, SCHEMA_SEED_STREAM, name)
+        self.generator = derive_generator(seed, SCHEMA_SEED_STREAM, name)
+        self.columnar_columns = {name: DICTIONARY_COLUMN}
+
+    @classmethod
+    def check_options(cls, options: dict[str, Any]) -> list[str]:
+        """
+            Check the values of a column's options, once their names and types are known to be valid.
+
+            :return: A description of each problem found.
+        """
+        return []
+
+    @classmethod
+    def get_part_names(cls, name: str) -> list[str]:
+        """
+            Get the names that a column with the given name writes its typed parts under, besides its own name.
+        """
+        return [f"{name}_{part}" for part in cls.parts]
+
+    def generate(self, n: int, formatted: bool = True) -> dict[str, Any]:
+        """
+            Generate the column's next `n` values.
+
+            :param formatted: Whether to format values whose typed parts are kept apart. Columnar output only
+            needs the parts.
+            :return: The formatted values under the column's name, plus any typed parts under their names in
+            `columnar_columns`. Unique columns may return fewer than `n` values once they run out.
+        """
+        raise NotImplementedError("Subclasses must implement the generate method")
+
+class ComponentColumnPlan(ColumnPlan):
+    """
+        Base for the columns made of three numeric components (SSN and phone), which accept the same
+        `components` and `unique` options as the command line.
+    """
+    parts: tuple[str, str, str]
+    part_dtypes: tuple[str, str, str]
+
+    def __init__(self, name: str, options: dict[str, Any], seed: int):
+        super().__init__(name, options, seed)
+        self.components = parse_components(options.get('components'))
+        self.unique = options.get('unique', False)
+        self.unique_key = derive_seed(seed, SCHEMA_SEED_STREAM, name, "unique", bits=64)
+        self.cursor = 0
+        self.columnar_columns = dict(zip(self.get_part_names(name), self.part_dtypes))
+
+    @classmethod
+    def check_options(cls, options: dict[str, Any]) -> list[str]:
+        problems: list[str] = []
+
+        components = options.get('components')
+        if isinstance(components, list):
+            for component in components:
+                if not isinstance(component, str) and not is_integer(component):
+                    problems.append(f"Option 'components' must only hold strings and integers, but got {component!r}.")
+        if len(parse_components(components)) > 3:
+            problems.append(f"Option 'components' has more than 3 components ({', '.join(cls.parts)}).")
+
+        return problems
+
+    def gen_parts(self, n: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        raise NotImplementedError("Subclasses must implement the gen_parts method")
+
+    def format_parts(self, parts: tuple[np.ndarray, np.ndarray, np.ndarray]) -> list[str]:
+        raise NotImplementedError("Subclasses must implement the format_parts method")
+
+    def generate(self, n: int, formatted: bool = True) -> dict[str, Any]:
+        parts = self.gen_parts(n)
+        batch: dict[str, Any] = dict(zip(self.columnar_columns, parts))
+        if formatted:
+            batch[self.name] = self.format_parts(parts)
+        return batch
+
+class SsnColumnPlan(ComponentColumnPlan):
+    parts = ("start", "mid", "end")
+    part_dtypes = ("uint16", "uint8", "uint16")
+
+    def gen_parts(self, n: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        from generators.ssn import gen_ssn_batch, gen_ssn_unique_batch
+
+        if self.unique:
+            parts, self.cursor = gen_ssn_unique_batch(n, *self.components, key=self.unique_key, cursor=self.cursor)
+            return parts
+        return gen_ssn_batch(n, *self.components, self.generator)
+
+    def format_parts(self, parts: tuple[np.ndarray, np.ndarray, np.ndarray]) -> list[str]:
+        from generators.ssn import format_ssns
+        return format_ssns(*parts)
+
+class PhoneColumnPlan(ComponentColumnPlan):
+    parts = ("area", "central", "line")
+    part_dtypes = ("uint16", "uint16", "uint16")
+
+    def gen_parts(self, n: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        from generators.phone import gen_phone_batch, gen_phone_unique_batch
+
+        if self.unique:
+            parts, self.cursor = gen_phone_unique_batch(n, *self.components, key=self.unique_key, cursor=self.cursor)
+            return parts
+        return gen_phone_batch(n, *self.components, self.generator)
+
+    def format_parts(self, parts: tuple[np.ndarray, np.ndarray, np.ndarray]) -> list[str]:
+        from generators.phone import format_phones
+        return format_phones(*parts)
+
+class AddressColumnPlan(ColumnPlan):
+    parts = ("building_number", "street", "city", "state", "zip")
+
+    def __init__(self, name: str, options: dict[str, Any], seed: int):
+        from fake import create_fake
+        import utils.location as location_utils
+
+        super().__init__(name, options, seed)
+        self.address_args = {
+            part: str(options[part])
+            for part in self.parts
+            if options.get(part) is not None
+        }
+        self.fake = create_fake(rng=self.random)
+        self.columnar_columns = {part: DICTIONARY_COLUMN for part in self.get_part_names(name)}
+
+        # Loaded now rather than by the first batch
+        location_utils.get_location_index()
+
+    def generate(self, n: int, formatted: bool = True) -> dict[str, Any]:
+        from generators.address import gen_address_parts_batch, format_addresses
+
+        address_parts = gen_address_parts_batch(
+            n,
+            self.address_args,
+            self.options.get('state_abbr', True),
+            self.options.get('existing_city', True),
+            population_weighted=self.options.get('population_weighted', False),
+            rng=self.generator,
+            fake=self.fake
+        )
+
+        batch: dict[str, Any] = {}
+        if formatted:
+            batch[self.name] = format_addresses(address_parts)
+        for part, column in zip(self.parts, self.get_part_names(self.name)):
+            batch[column] = address_parts[part]
+        return batch
+
+class ColorColumnPlan(ColumnPlan):
+    parts = ("r", "g", "b", "name")
+
+    def __init__(self, name: str, options: dict[str, Any], seed: int):
+        from utils import get_color_index, load_color_lut
+
+        super().__init__(name, options, seed)
+        # Set either way, so that a table loaded for another column is not used by this one
+        self.color_args = {**options, 'lut': bool(options.get('lut', False))}
+        self.columnar_columns = dict(zip(self.get_part_names(name), ["uint8"] * 3 + [DICTIONARY_COLUMN]))
+
+        perceptual = options.get('perceptual', False)
+        if self.color_args['lut']:
+            load_color_lut(perceptual=perceptual)
+        else:
+            get_color_index(perceptual)
+
+    @classmethod
+    def check_options(cls, options: dict[str, Any]) -> list[str]:
+        return [
+            f"Option '{option}' must be between 0 and 255, but got {value}."
+            for option, value in options.items()
+            if is_integer(value) and not (0 <= value <= 255)
+        ]
+
+    def generate(self, n: int, formatted: bool = True) -> dict[str, Any]:
+        from generators.color import gen_color_batch, format_colors
+
+        rgbs, names = gen_color_batch(self.color_args, n, self.generator)
+        batch: dict[str, Any] = {
+            f"{self.name}_r": rgbs[:, 0],
+            f"{self.name}_g": rgbs[:, 1],
+            f"{self.name}_b": rgbs[:, 2],
+            f"{self.name}_name": names
+        }
+        if formatted:
+            batch[self.name] = format_colors(rgbs, names)
+        return batch
+
+class NameColumnPlan(ColumnPlan):
+    def __init__(self, name: str, options: dict[str, Any], seed: int):
+        from fake import create_fake
+
+        super().__init__(name, options, seed)
+        self.name_type = options.get('name_type', "person")
+        self.name_args = {'subdomains': 1, **{option: value for option, value in options.items() if option != "name_type"}}
+        self.fake = create_fake(rng=self.random)
+
+        if self.name_type in ["job", "music_genre", "music_instrument", "vehicle"]:
+            warn(f"{self.name_type} generation will pick random values, but all will correspond to real entries in the Faker database for that category.")
+
+    @classmethod
+    def check_options(cls, options: dict[str, Any]) -> list[str]:
+        from generators.name.vars import NAME_TYPES, FILE_CATEGORIES, EMAIL_CATEGORIES
+
+        problems: list[str] = []
+        for option, choices in [("name_type", NAME_TYPES), ("gender", ["male", "female", "nb"]), ("file_category", FILE_CATEGORIES), ("email_category", EMAIL_CATEGORIES)]:
+            if option in options and options[option] not in choices:
+                problems.append(f"Option '{option}' must be one of: {', '.join(choices)}. Got '{options[option]}'.")
+        if options.get('subdomains', 1) < 1:
+            problems.append("Option 'subdomains' must be at least 1.")
+
+        return problems
+
+    def generate(self, n: int, formatted: bool = True) -> dict[str, Any]:
+        from generators.name import gen_name
+        return {self.name: [gen_name(self.name_type, self.name_args, rng=self.random, fake=self.fake) for _ in range(n)]}
+
+class TyposColumnPlan(ColumnPlan):
+    def __init__(self, name: str, options: dict[str, Any], seed: int):
+        from generators.typos import TYPO_GENERATORS
+
+        super().__init__(name, options, seed)
+        self.text = options.get('text', "Example text for typo generation.")
+        typos = options.get('typos', list(TYPO_GENERATORS.keys()))
+        # Missing weights are 1, as on the command line
+        typo_weights = options.get('typo_weights', []) + [1] * (len(typos) - len(options.get('typo_weights', [])))
+        self.typo_sampler = WeightedSampler([(weight, typo) for weight, typo in zip(typo_weights, typos)])
+
+    @classmethod
+    def check_options(cls, options: dict[str, Any]) -> list[str]:
+        from generators.typos import TYPO_GENERATORS
+        from typo.vars import all_characters
+
+        problems: list[str] = []
+
+        text = options.get('text', "")
+        if any(c not in all_characters for c in text):
+            problems.append(f"Option 'text' must only contain the following characters or a space: {all_characters.strip()}")
+
+        typos = options.get('typos', list(TYPO_GENERATORS.keys()))
+        for typo in typos:
+            if not isinstance(typo, str) or typo not in TYPO_GENERATORS:
+                problems.append(f"Unknown typo type {typo!r}. Valid types are: {', '.join(TYPO_GENERATORS.keys())}.")
+
+        typo_weights = options.get('typo_weights', [])
+        if any(not is_integer(weight) or weight < 0 for weight in typo_weights):
+            problems.append("Option 'typo_weights' must only hold non-negative integers.")
+        elif len(typo_weights) > len(typos):
+            problems.append(f"Option 'typo_weights' has {len(typo_weights)} weights for {len(typos)} typo types.")
+        elif sum(typo_weights) + len(typos) - len(typo_weights) <= 0:
+            problems.append("At least one typo type must have a weight greater than 0.")
+
+        if not 0 <= options.get('typo_rate', 0.1) <= 1:
+            problems.append("Option 'typo_rate' must be between 0 and 1.")
+        if options.get('typos_per_word', 1) < 1:
+            problems.append("Option 'typos_per_word' must be at least 1.")
+
+        return problems
+
+    def generate(self, n: int, formatted: bool = True) -> dict[str, Any]:
+        from generators.typos import gen_typos
+
+        rate = self.options.get('typo_rate', 0.1)
+        typos_per_word = self.options.get('typos_per_word', 1)
+        return {self.name: [gen_typos(self.text, self.typo_sampler, rate, typos_per_word, rng=self.random) for _ in range(n)]}
+
+# The plan each column type compiles to
+COLUMN_PLAN_TYPES: dict[str, type[ColumnPlan]] = {
+    "ssn": SsnColumnPlan,
+    "phone": PhoneColumnPlan,
+    "address": AddressColumnPlan,
+    "color": ColorColumnPlan,
+    "name": NameColumnPlan,
+    "typos": TyposColumnPlan
+}
+
+class GenerationPlan:
+    """
+        A compiled schema, ready to run. Rows are generated in batches: each column generates its values for the
+        whole batch, then the batch is written out, so memory is bounded by the batch size however many rows there are.
+    """
+    rows: int
+    seed: int
+    batch_size: int
+    columns: list[ColumnPlan]
+
+    def __init__(self, rows: int, seed: int, columns: list[ColumnPlan], batch_size: int = SCHEMA_BATCH_SIZE):
+        self.rows = rows
+        self.seed = seed
+        self.columns = columns
+        self.batch_size = batch_size
+
+    @property
+    def fields(self) -> list[str]:
+        return [column.name for column in self.columns]
+
+    @property
+    def columnar_columns(self) -> dict[str, str]:
+        columns: dict[str, str] = {}
+        for column in self.columns:
+            columns.update(column.columnar_columns)
+        return columns
+
+    def iter_batches(self, formatted: bool = True, log: bool = False) -> Iterator[dict[str, Any]]:
+        """
+            Lazily generate the plan's rows as batches of columns (see `ColumnPlan.generate`). Stops early, with a
+            warning, if a unique column runs out of values.
+        """
+        for batch_start in range(0, self.rows, self.batch_size):
+            n = min(self.batch_size, self.rows - batch_start)
+            batch: dict[str, Any] = {}
+            produced = n
+            for column in self.columns:
+                column_batch = column.generate(n, formatted)
+                produced = min(produced, *(len(values) for values in column_batch.values()))
+                batch.update(column_batch)
+
+            if produced < n:
+                # Cut every column down to the rows the shortest one could fill
+                batch = {key: values[:produced] for key, values in batch.items()}
+                warn(f"A unique column ran out of values. Stopping after {batch_start + produced} of {self.rows} rows.")
+
+            if log: logger.info("Generated rows %s to %s of %s.", batch_start + 1, batch_start + produced, self.rows)
+            yield batch
+
+            if produced < n:
+                break
+
+    def write(self, sink: RecordSink, log: bool = False) -> None:
+        """
+            Run the plan, writing every batch to the sink as soon as it is generated.
+        """
+        columnar = isinstance(sink, ColumnarSink)
+        for batch in self.iter_batches(not columnar, log):
+            if columnar:
+                sink.write_columns({column: batch[column] for column in sink.fields})
+            else:
+                sink.write_many(dict(zip(sink.fields, row)) for row in zip(*(batch[field] for field in sink.fields)))
+
+def check_column_options(column_type: str, options: dict[str, Any]) -> list[str]:
+    """
+        Check a column's options against COLUMN_OPTIONS, then against its plan's own checks.
+
+        :return: A description of each problem found.
+    """
+    problems: list[str] = []
+    accepted = COLUMN_OPTIONS[column_type]
+    well_typed: dict[str, Any] = {}
+    for option, value in options.items():
+        if option not in accepted:
+            problems.append(f"Unknown option '{option}' for a {column_type} column. Valid options are: {', '.join(accepted)}.")
+        elif not isinstance(value, accepted[option]) or (isinstance(value, bool) and bool not in accepted[option]):
+            problems.append(f"Option '{option}' must be of type {' or '.join(t.__name__ for t in accepted[option])}, but got {value!r}.")
+        else:
+            well_typed[option] = value
+
+    # The plan's checks only see options of the right type, so they can rely on it
+    problems.extend(COLUMN_PLAN_TYPES[column_type].check_options(well_typed))
+
+    return problems
+
+def validate_schema(schema: Any, source: str = "schema") -> DatasetSchema:
+    """
+        Check that a loaded schema describes a valid dataset, before anything is generated.
+
+        :param source: What to call the schema in the error message, e.g. its file name.
+        :raises ValueError: If the schema is invalid. The message lists every problem found, not just the first.
+    """
+    if not isinstance(schema, dict):
+        raise ValueError(f"Invalid {source}: it must be an object with 'rows' and 'columns'.")
+
+    problems: list[str] = []
+    for key in schema:
+        if key not in SCHEMA_KEYS:
+            problems.append(f"Unknown key '{key}'. Valid keys are: {', '.join(SCHEMA_KEYS)}.")
+
+    if not is_integer(schema.get('rows')) or schema['rows'] < 1:
+        problems.append("'rows' must be a positive integer.")
+    if 'seed' in schema and not is_integer(schema['seed']):
+        problems.append("'seed' must be an integer.")
+    if 'batch_size' in schema and (not is_integer(schema['batch_size']) or schema['batch_size'] < 1):
+        problems.append("'batch_size' must be a positive integer.")
+
+    columns = schema.get('columns')
+    if not isinstance(columns, list) or len(columns) == 0:
+        problems.append("'columns' must be a non-empty list.")
+        columns = []
+
+    names: set[str] = set()
+    # Every name written by a column (its own and its parts'), mapped to the first column that writes it
+    owners: dict[str, str] = {}
+    for i, column in enumerate(columns):
+        where = f"columns[{i}]"
+        if not isinstance(column, dict):
+            problems.append(f"{where}: Must be an object with 'name' and 'type'.")
+            continue
+
+        name = column.get('name')
+        if not isinstance(name, str) or not name:
+            problems.append(f"{where}: 'name' must be a non-empty string.")
+            name = None
+        else:
+            where = f"columns[{i}] ('{name}')"
+            if name in names:
+                problems.append(f"{where}: Another column has the same name.")
+            names.add(name)
+            # Columnar output writes each column to "<name>.npy" in the output directory
+            if any(separator in name for separator in COLUMN_NAME_SEPARATORS):
+                problems.append(f"{where}: 'name' must not contain path separators.")
+
+        for key in column:
+            if key not in COLUMN_KEYS:
+                problems.append(f"{where}: Unknown key '{key}'. Valid keys are: {', '.join(COLUMN_KEYS)}.")
+
+        column_type = column.get('type')
+        if column_type not in COLUMN_TYPES:
+            problems.append(f"{where}: 'type' must be one of: {', '.join(COLUMN_TYPES)}.")
+            continue
+
+        if name is not None:
+            for written in [name, *COLUMN_PLAN_TYPES[column_type].get_part_names(name)]:
+                owner = owners.setdefault(written, name)
+                # Columns with the same name were already reported
+                if owner != name:
+                    problems.append(f"{where}: Writes a column named '{written}', which column '{owner}' also writes.")
+
+        options = column.get('options', {})
+        if not isinstance(options, dict):
+            problems.append(f"{where}: 'options' must be an object.")
+            continue
+
+        problems.extend(f"{where}: {problem}" for problem in check_column_options(column_type, options))
+
+    if problems:
+        raise ValueError(f"Invalid {source}:\n" + "\n".join(f"  - {problem}" for problem in problems))
+
+    return schema
+
+def load_schema(path: str) -> DatasetSchema:
+    """
+        Read and validate a schema file. JSON and TOML are supported, picked by the file's extension.
+
+        :raises ValueError: If the file cannot be parsed or the schema is invalid (see `validate_schema`).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SCHEMA_EXTENSIONS:
+        raise ValueError(f"Schema file '{path}' must have one of the extensions: {', '.join(SCHEMA_EXTENSIONS)}.")
+
+    try:
+        if extension == ".toml":
+            with open(path, "rb") as f:
+                schema = tomllib.load(f)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                schema = json.load(f)
+    except (json.JSONDecodeError, tomllib.TOMLDecodeError) as e:
+        raise ValueError(f"Could not parse schema file '{path}': {e}") from e
+
+    return validate_schema(schema, f"schema file '{path}'")
+
+def compile_schema(schema: DatasetSchema, seed: int | None = None, log: bool = False) -> GenerationPlan:
+    """
+        Compile a validated schema into a plan. Every column's options are resolved, and the lookups and samplers
+        it needs are loaded, once here rather than per batch.
+
+        :param seed: The master seed for every column. If None, the schema's own seed is used, or a random one if it has none.
+    """
+    if seed is None:
+        seed = schema['seed'] if 'seed' in schema else random.getrandbits(128)
+
+    columns = [COLUMN_PLAN_TYPES[column['type']](column['name'], column.get('options', {}), seed) for column in schema['columns']]
+    if log: logger.info("Compiled a plan for %s row(s) with columns: %s.", schema['rows'], ', '.join(column.name for column in columns))
+
+    return GenerationPlan(schema['rows'], seed, columns, schema.get('batch_size', SCHEMA_BATCH_SIZE))
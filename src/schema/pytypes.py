@@ -0,0 +1,14 @@
+from typing import TypedDict, NotRequired, Any
+
+class ColumnSchema(TypedDict):
+    name: str
+    type: str
+    # Type-specific options (see COLUMN_OPTIONS). Anything left out takes the same default as on the command line.
+    options: NotRequired[dict[str, Any]]
+
+class DatasetSchema(TypedDict):
+    rows: int
+    columns: list[ColumnSchema]
+    # Makes the schema reproducible on its own. --seed overrides it.
+    seed: NotRequired[int]
+    batch_size: NotRequired[int]
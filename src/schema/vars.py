@@ -0,0 +1,80 @@
+# Schema files are read according to their extension
+SCHEMA_EXTENSIONS = [".json", ".toml"]
+
+# Keys a schema and each of its columns may have. Anything else is reported as a mistake.
+SCHEMA_KEYS = ["rows", "columns", "seed", "batch_size"]
+COLUMN_KEYS = ["name", "type", "options"]
+
+# Characters a column name may not contain, since columnar output writes a file named after each column
+COLUMN_NAME_SEPARATORS = ["/", "\\"]
+
+# How many rows are generated at a time. Every column is generated for the whole batch before it is written.
+SCHEMA_BATCH_SIZE = 1 << 14
+
+# Each column draws from its own stream under the plan's seed, keyed by the column's name, so adding,
+# removing or reordering columns does not change the values of the others.
+SCHEMA_SEED_STREAM = "schema-column"
+
+# Types a schema option may be given as. JSON and TOML numbers load as int or float.
+CHANNEL_OPTION = (int,)
+TEXT_OPTION = (str,)
+FLAG_OPTION = (bool,)
+
+# Options accepted by each column type, mapped to the types they may be given as
+COLUMN_OPTIONS: dict[str, dict[str, tuple[type, ...]]] = {
+    "ssn": {
+        # Patterns for START, MID and END, as a list or one dash-separated string (e.g. "666-xx-xxxx")
+        "components": (list, str),
+        "unique": FLAG_OPTION
+    },
+    "phone": {
+        # Patterns for AREA, CENTRAL and LINE, as a list or one dash-separated string (e.g. "xxx-555-01xx")
+        "components": (list, str),
+        "unique": FLAG_OPTION
+    },
+    "address": {
+        "building_number": (str, int),
+        "street": TEXT_OPTION,
+        "city": TEXT_OPTION,
+        "state": TEXT_OPTION,
+        "zip": (str, int),
+        "state_abbr": FLAG_OPTION,
+        "existing_city": FLAG_OPTION,
+        "population_weighted": FLAG_OPTION
+    },
+    "color": {
+        "min_r": CHANNEL_OPTION,
+        "max_r": CHANNEL_OPTION,
+        "exact_r": CHANNEL_OPTION,
+        "min_g": CHANNEL_OPTION,
+        "max_g": CHANNEL_OPTION,
+        "exact_g": CHANNEL_OPTION,
+        "min_b": CHANNEL_OPTION,
+        "max_b": CHANNEL_OPTION,
+        "exact_b": CHANNEL_OPTION,
+        "perceptual": FLAG_OPTION,
+        "lut": FLAG_OPTION
+    },
+    "name": {
+        "name_type": TEXT_OPTION,
+        "first_name": TEXT_OPTION,
+        "last_name": TEXT_OPTION,
+        "gender": TEXT_OPTION,
+        "file_category": TEXT_OPTION,
+        "file_type": TEXT_OPTION,
+        "email_category": TEXT_OPTION,
+        "subdomains": (int,),
+        "music_genre": TEXT_OPTION,
+        "music_instrument_category": TEXT_OPTION
+    },
+    "typos": {
+        "text": TEXT_OPTION,
+        "typos": (list,),
+        "typo_weights": (list,),
+        "typo_rate": (int, float),
+        "typos_per_word": (int,)
+    }
+}
+
+# Column types a schema can use
+COLUMN_TYPES = list(COLUMN_OPTIONS.keys())
@@ -0,0 +1,109 @@
+from schema import *
+from utils import SINK_TYPES
+from typing import Any
+import numpy as np
+import importlib
+import random
+import io
+import json
+import os
+import sys
+import tempfile
+
+if __name__ == "__main__":
+    failures = 0
+
+    def check(description: str, passed: bool):
+        global failures
+        print(f"{'PASS' if passed else 'FAIL'}: {description}")
+        if not passed:
+            failures += 1
+
+    def run(schema: DatasetSchema, seed: int | None = None) -> list[dict]:
+        plan = compile_schema(validate_schema(schema), seed)
+        stream = io.BytesIO()
+        with SINK_TYPES["jsonl"](stream, plan.fields) as sink:
+            plan.write(sink)
+        return [json.loads(line) for line in stream.getvalue().decode("utf-8").splitlines()]
+
+    columns: list[ColumnSchema] = [
+        {"name": "id", "type": "ssn", "options": {"components": "666-xx-xxxx", "unique": True}},
+        {"name": "mobile", "type": "phone", "options": {"components": ["xxx", 555, "01xx"]}},
+        {"name": "favorite", "type": "color", "options": {"min_r": 200}},
+        {"name": "note", "type": "typos", "options": {"text": "Please call me back", "typos": ["del", "trans"], "typo_rate": 0.5}}
+    ]
+    schema: DatasetSchema = {"rows": 50, "seed": 7, "batch_size": 16, "columns": columns}
+
+    print("--- Plans ---")
+    rows = run(schema)
+    for row in rows[:2]:
+        print(row)
+
+    check("Every row is generated", len(rows) == 50)
+    check("Rows have the schema's columns in order", list(rows[0].keys()) == ["id", "mobile", "favorite", "note"])
+    check("The schema's seed makes it reproducible", rows == run(schema))
+    check("An explicit seed overrides the schema's", rows != run(schema, 8))
+    random.seed(1)
+    run(schema)
+    check("A schema with its own seed leaves the global random state alone", random.random() == random.Random(1).random())
+    check("Column options are applied", all(row["id"].startswith("666-") and row["mobile"][6:11] == "555-0" for row in rows))
+    check("Unique columns never repeat", len({row["id"] for row in rows}) == len(rows))
+
+    reordered = run({**schema, "columns": [columns[2], {"name": "extra", "type": "name"}, columns[0]]})
+    check(
+        "Adding and reordering columns leaves the other columns' values alone",
+        [(row["favorite"], row["id"]) for row in reordered] == [(row["favorite"], row["id"]) for row in rows]
+    )
+
+    # utils re-exports the colors module's `colors` cache, which hides the subpackage as an attribute
+    colors_module = importlib.import_module("utils.colors.main")
+    # Stand in for a table loaded by another column, mapping every color to the first palette entry
+    colors_module.color_lut = np.zeros(1 << 24, dtype="<u2")
+    check("A color column without lut ignores a table loaded for another column", [row["favorite"] for row in run(schema)] == [row["favorite"] for row in rows])
+    colors_module.color_lut = None
+
+    print("\n--- Validation ---")
+    def problems(schema: Any) -> str:
+        try:
+            validate_schema(schema)
+            return ""
+        except ValueError as e:
+            return str(e)
+
+    check("A valid schema passes", problems(schema) == "")
+    invalid = problems({"rows": -1, "columns": [{"name": "a", "type": "ssn", "options": {"unique": "yes"}}, {"name": "a", "type": "colour"}]})
+    print(invalid)
+    check("Every problem is reported at once", all(part in invalid for part in ["'rows'", "'unique'", "same name", "'type'"]))
+    check("Out-of-range options are refused", "between 0 and 255" in problems({"rows": 1, "columns": [{"name": "c", "type": "color", "options": {"exact_g": 256}}]}))
+    collision = problems({"rows": 1, "columns": [{"name": "c_r", "type": "ssn"}, {"name": "c", "type": "color"}]})
+    print(collision)
+    check("Names that collide with another column's parts are refused", "'c_r', which column 'c_r' also writes" in collision)
+    check("Part names that collide with each other are refused", problems({"rows": 1, "columns": [{"name": "a", "type": "address"}, {"name": "a_zip", "type": "ssn"}, {"name": "a_zip_start", "type": "name"}]}).count("also writes") == 2)
+    check("Names with path separators are refused", "path separators" in problems({"rows": 1, "columns": [{"name": "../c", "type": "name"}]}))
+    check("Booleans are not accepted as integers", "'min_r'" in problems({"rows": 1, "columns": [{"name": "c", "type": "color", "options": {"min_r": True}}]}))
+
+    print("\n--- Schema Files ---")
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, "people.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(schema, f)
+
+        toml_path = os.path.join(directory, "people.toml")
+        with open(toml_path, "w", encoding="utf-8") as f:
+            f.write('rows = 50\nseed = 7\nbatch_size = 16\n')
+            for column in columns:
+                f.write(f'\n[[columns]]\nname = "{column["name"]}"\ntype = "{column["type"]}"\n[columns.options]\n')
+                for option, value in column["options"].items():
+                    f.write(f"{option} = {json.dumps(value)}\n")
+
+        check("JSON schema files load", run(load_schema(json_path)) == rows)
+        check("TOML schema files load", run(load_schema(toml_path)) == rows)
+
+        try:
+            load_schema(os.path.join(directory, "people.yaml"))
+            check("Unsupported extensions are refused", False)
+        except ValueError:
+            check("Unsupported extensions are refused", True)
+
+    print(f"\n{failures} check(s) failed.")
+    sys.exit(1 if failures else 0)
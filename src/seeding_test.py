@@ -0,0 +1,92 @@
+from utils.seeding import *
+from generators.typos import TYPO_GENERATORS, gen_typos, gen_typos_corpus, CORPUS_CHUNK_LINES
+from generators.ssn import gen_ssn
+from generators.phone import gen_phone
+from utils import ComponentDomain, clamp, clamp_batch, randint_from_input, randint_from_input_batch
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import random
+import io
+import sys
+
+if __name__ == "__main__":
+    failures = 0
+
+    def check(description: str, passed: bool):
+        global failures
+        print(f"{'PASS' if passed else 'FAIL'}: {description}")
+        if not passed:
+            failures += 1
+
+    master_seed = random.randint(-(1 << 64), 1 << 64)
+    print(f"Master seed: {master_seed}\n")
+
+    print("--- Derived Seeds ---")
+    check("The same key path always gives the same seed", derive_seed(master_seed, "shard", 3) == derive_seed(master_seed, "shard", 3))
+    check("Different key paths give different seeds", len({derive_seed(master_seed, "shard", i) for i in range(1000)}) == 1000)
+    check("Different stream names give different seeds", derive_seed(master_seed, "a", 0) != derive_seed(master_seed, "b", 0))
+    check("A seed and its negation give different seeds", derive_seed(5, "shard") != derive_seed(-5, "shard"))
+    check("Spawned seeds do not depend on how many are spawned", spawn_seeds(master_seed, 4, "batch") == spawn_seeds(master_seed, 64, "batch")[:4])
+    check(
+        "Derived generators repeat",
+        derive_random(master_seed, "r").random() == derive_random(master_seed, "r").random()
+        and derive_generator(master_seed, "g").integers(0, 1 << 62) == derive_generator(master_seed, "g").integers(0, 1 << 62)
+    )
+
+    print("\n--- Injected Generators ---")
+    typo_distrb = [(1, typo) for typo in TYPO_GENERATORS.keys()]
+
+    def generate_stream(i: int) -> list[str]:
+        # Alternate between the two kinds of generator the `rng` parameters accept
+        rng = derive_random(master_seed, "threads", i) if i % 2 else derive_generator(master_seed, "threads", i)
+        return [
+            gen_ssn(rng=rng),
+            gen_phone(line="01##", rng=rng),
+            gen_typos("the quick brown fox jumps over the lazy dog", typo_distrb, 1, 2, rng=rng)
+        ]
+
+    sequential = [generate_stream(i) for i in range(16)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        threaded = list(executor.map(generate_stream, range(16)))
+    for stream in sequential[:2]:
+        print(stream)
+
+    check("Generators given their own rng give the same output on threads as sequentially", threaded == sequential)
+    check("Different streams give different output", len({tuple(stream) for stream in sequential}) == len(sequential))
+
+    random.seed(master_seed)
+    positional = [gen_ssn(None, None, None, True), gen_phone(None, None, None, True), clamp(randint_from_input("##", None, True), 0, 99, True)]
+    random.seed(master_seed)
+    check("A positional log argument is still taken as log", positional == [gen_ssn(log=True), gen_phone(log=True), clamp(randint_from_input("##", log=True), 0, 99, log=True)])
+
+    print("\n--- Worker Count Independence ---")
+    words = ["the", "right", "way", "to", "do", "things", "keyboard", "example", "write", "for", "book"]
+    corpus_random = random.Random(0)
+    corpus = "".join(
+        " ".join(corpus_random.choice(words) for _ in range(corpus_random.randint(1, 12))) + "\n"
+        for _ in range(CORPUS_CHUNK_LINES * 3 + 17)
+    )
+    outputs: dict[int, str] = {}
+    for workers in [1, 64]:
+        sink = io.StringIO()
+        gen_typos_corpus(io.StringIO(corpus), sink, typo_distrb, rate=0.3, typos_per_word=2, master_seed=master_seed, workers=workers)
+        outputs[workers] = sink.getvalue()
+        print(f"Processed {len(corpus.splitlines())} lines with {workers} worker(s).")
+
+    check("The corpus keeps its line count", len(outputs[1].splitlines()) == len(corpus.splitlines()))
+    check("Typos were applied", outputs[1] != corpus)
+    check("A seeded corpus run gives the same output with 1 and 64 workers", outputs[1] == outputs[64])
+
+    print("\n--- Long Components ---")
+    long_number = "1" * 25
+    long_pattern = "x" * 20
+    batch_values = clamp_batch(randint_from_input_batch(long_pattern, 1000, rng=derive_generator(master_seed, "long-components")), 0, 9999)
+    print(f"Clamped values of '{long_pattern}': {sorted(set(batch_values.tolist()))}")
+
+    check("Numbers too long for an int64 clamp like the scalar path", clamp_batch(randint_from_input_batch(long_number, 3), 0, 9999).tolist() == [clamp(randint_from_input(long_number), 0, 9999)] * 3)
+    check("Patterns too long for an int64 do not wrap around", bool(np.all(batch_values == 9999)))
+    check("Long patterns keep their value when the leading digits are zeros", randint_from_input_batch("0" * 20 + "12", 2).tolist() == [12, 12])
+    check("Long unique patterns only keep the values that fit", ComponentDomain.from_pattern("0" * 20 + "1x").decode(np.arange(10)).tolist() == list(range(10, 20)))
+
+    print(f"\n{failures} check(s) failed.")
+    sys.exit(1 if failures else 0)
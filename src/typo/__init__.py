@@ -1,4 +1,5 @@
 # Import from subfiles here so that they can be imported directly from the parent package.
 from .main import *
 from .pytypes import *
+from .table import *
 from .vars import *
\ No newline at end of file
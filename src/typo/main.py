@@ -1,7 +1,9 @@
 import random
 import re
-import nltk
+from typing import Iterator, TextIO
 from .vars import *
+from .table import load_cmudict_entries, get_homophone_table
+from utils.seeding import RandomSource, resolve_random
 
 MEANINGFUL_WORD_CHAR_REGEX = re.compile(r'[a-zA-Z\-\']')
 
@@ -18,30 +20,139 @@ def make_word_meaningful(word: str) -> str | None:
 def process_words(s: str) -> list[str]:
     return re.split(r'\s+', s)
 
+def find_last_word_start(chunk: str, after_whitespace: bool) -> int | None:
+    """
+        Find where the last word of a chunk of streamed text (with its trailing whitespace) starts. That word may
+        still continue in the next chunk, while everything before it is made of complete words. Only the chunk
+        itself is scanned, so a word spanning many chunks costs time linear in its length.
+
+        :param after_whitespace: Whether the text before the chunk ends with whitespace.
+        :return: The index in the chunk, or None if the last word started before the chunk (the chunk only
+        continues it, or its trailing whitespace).
+    """
+    i = len(chunk)
+    while i > 0 and chunk[i - 1].isspace():
+        i -= 1
+    if i == 0:
+        return None
+
+    while i > 0 and not chunk[i - 1].isspace():
+        i -= 1
+    if i == 0 and not after_whitespace:
+        return None
+    return i
+
+WORD_SEPARATOR_REGEX = re.compile(r'(\S*)(\s*)', re.DOTALL)
+
+def iter_words(source: TextIO, chunk_size: int = 1 << 16) -> Iterator[tuple[str, str]]:
+    """
+        Lazily split a text stream into words, reading it in chunks so memory stays bounded by the chunk size
+        (plus the longest word).
+
+        :param source: The text stream to read.
+        :param chunk_size: How many characters to read at a time.
+        :return: An iterator of (word, separator) pairs, where the separator is the exact whitespace that
+        followed the word. Joining every pair gives back the original text. If the text starts with
+        whitespace, the first word is empty.
+    """
+    # Pieces of the last, possibly unfinished, word and its whitespace. Only joined once the word is complete.
+    pending: list[str] = []
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+
+        split = find_last_word_start(chunk, bool(pending) and pending[-1][-1].isspace())
+        if split is None:
+            pending.append(chunk)
+            continue
+
+        complete = ''.join(pending) + chunk[:split]
+        pending = [chunk[split:]]
+        for match in WORD_SEPARATOR_REGEX.finditer(complete):
+            if match.end() > match.start():
+                yield match.group(1), match.group(2)
+
+    for match in WORD_SEPARATOR_REGEX.finditer(''.join(pending)):
+        if match.end() > match.start():
+            yield match.group(1), match.group(2)
+
+# Built once per process by get_homophone_index(). Maps each word to its pronunciations,
+# and each pronunciation to every word that shares it.
+word_pronunciations: dict[str, list[tuple[str, ...]]] | None = None
+pronunciation_index: dict[tuple[str, ...], list[str]] | None = None
+
+def get_homophone_index() -> tuple[dict[str, list[tuple[str, ...]]], dict[tuple[str, ...], list[str]]]:
+    """
+        Build (or return the already built) word -> pronunciations map and pronunciation -> words
+        inverted index from the CMU pronouncing dictionary. The dictionary is only walked once per process.
+        This is the fallback used when the prebuilt homophone table (see `typo.table`) is not available.
+
+        :return: A (word_pronunciations, pronunciation_index) tuple.
+    """
+    global word_pronunciations
+    global pronunciation_index
+
+    if word_pronunciations is not None and pronunciation_index is not None:
+        return word_pronunciations, pronunciation_index
+
+    # The dictionary format is a list of tuples: ('word', ['PHONE', 'LIST'])
+    entries = load_cmudict_entries()
+    words_to_prons: dict[str, list[tuple[str, ...]]] = {}
+    prons_to_words: dict[tuple[str, ...], list[str]] = {}
+    for w, pron in entries:
+        key = tuple(pron)
+
+        prons = words_to_prons.setdefault(w, [])
+        if key not in prons:
+            prons.append(key)
+
+        words = prons_to_words.setdefault(key, [])
+        if w not in words:
+            words.append(w)
+
+    word_pronunciations = words_to_prons
+    pronunciation_index = prons_to_words
+    return word_pronunciations, pronunciation_index
+
+def has_homophones(word: str) -> bool:
+    """
+        Check whether a word shares at least one of its pronunciations with a different word.
+    """
+    table = get_homophone_table()
+    if table is not None:
+        return table.has_homophones(word)
+
+    words_to_prons, prons_to_words = get_homophone_index()
+    # Every pronunciation lists the word itself, so any other entry is a homophone.
+    return any(len(prons_to_words[pron]) > 1 for pron in words_to_prons.get(word.lower(), []))
+
 def get_homophones(word: str) -> list[str] | None:
-    # Ensure you have the dictionary downloaded
-    try:
-        entries = nltk.corpus.cmudict.entries()
-    except LookupError:
-        nltk.download('cmudict')
-        entries = nltk.corpus.cmudict.entries()
-    
+    """
+        Get all words that share a pronunciation with the given word.
+
+        :return: A sorted list of homophones (possibly empty), or None if the word is not in the dictionary.
+    """
+    table = get_homophone_table()
+    if table is not None:
+        return table.get_homophones(word)
+
+    words_to_prons, prons_to_words = get_homophone_index()
+    word = word.lower()
+
     # 1. Find the pronunciation(s) of the input word
-    # The dictionary format is a list of tuples: ('word', ['PHONE', 'LIST'])
-    pronunciations = [pron for w, pron in entries if w == word.lower()]
-    
+    pronunciations = words_to_prons.get(word)
     if not pronunciations:
         return None
-    
+
     # 2. Find all other words that share those pronunciations
-    homophones = []
+    homophones = set()
     for target_pron in pronunciations:
-        for w, pron in entries:
-            # Check if pronunciation matches AND it's not the same word
-            if pron == target_pron and w != word.lower():
-                homophones.append(w)
-                
-    return list(set(homophones)) # Remove duplicates
+        homophones.update(prons_to_words[target_pron])
+    homophones.discard(word)
+
+    # Sorted so that seeded runs pick the same homophone regardless of set ordering
+    return sorted(homophones)
 
 class TypoGenerator:
     words_accepted: int = 1
@@ -49,14 +160,20 @@ class TypoGenerator:
     def __init__(self, words_accepted: int = 1):
         self.words_accepted = words_accepted
 
-    def __generate__(self, words: list[str]) -> list[str]:
+    def __generate__(self, words: list[str], rng: random.Random) -> list[str]:
         raise NotImplementedError("Subclasses must implement the __generate__ method")
     
-    def generate(self, words: list[str]) -> list[str]:
+    def generate(self, words: list[str], rng: RandomSource | None = None) -> list[str]:
+        """
+            Apply this typo to the given words.
+
+            :param rng: The generator to draw from. If None, the global random module is used. Generators keep no
+            random state of their own, so one instance can be shared by threads that each pass their own `rng`.
+        """
         if len(words) != self.words_accepted:
             raise ValueError(f"Generator expects {self.words_accepted} words, but got {len(words)}")
         
-        return self.__generate__(words)
+        return self.__generate__(words, resolve_random(rng))
 
 class TypoInsertionGenerator(TypoGenerator):
     letter_set: str
@@ -68,12 +185,12 @@ class TypoInsertionGenerator(TypoGenerator):
         super().__init__(1)
         self.letter_set = letter_set
 
-    def __generate__(self, words: list[str]) -> list[str]:
+    def __generate__(self, words: list[str], rng: random.Random) -> list[str]:
         word = words[0]
 
         # Insert exactly one letter at a random position
-        insert_position = random.randint(0, len(word))
-        insert_letter = random.choice(self.letter_set)
+        insert_position = rng.randint(0, len(word))
+        insert_letter = rng.choice(self.letter_set)
         word = word[:insert_position] + insert_letter + word[insert_position:]
 
         return [word]
@@ -88,11 +205,11 @@ class TypoKeyboardProximityInsertionGenerator(TypoGenerator):
         super().__init__(1)
         self.accidental_shift = accidental_shift
 
-    def __generate__(self, words: list[str]) -> list[str]:
+    def __generate__(self, words: list[str], rng: random.Random) -> list[str]:
         word = words[0]
 
         # Insert exactly one letter based on keyboard proximity at a random position
-        insert_position = random.randint(0, len(word))
+        insert_position = rng.randint(0, len(word))
         
         # Determine the possible letters to insert based on the neighboring characters
         neighboring_chars = set()
@@ -113,9 +230,10 @@ class TypoKeyboardProximityInsertionGenerator(TypoGenerator):
         if not possible_insertions:
             return [word]
 
-        insert_letter = random.choice(list(possible_insertions))
+        # Sorted so that seeded runs pick the same letter regardless of set ordering
+        insert_letter = rng.choice(sorted(possible_insertions))
 
-        before_or_after = random.choice(['before', 'after'])
+        before_or_after = rng.choice(['before', 'after'])
         if before_or_after == 'before':
             word = word[:insert_position] + insert_letter + word[insert_position:]
         else:
@@ -133,15 +251,15 @@ class TypoSubstitutionGenerator(TypoGenerator):
         super().__init__(1)
         self.letter_set = letter_set
 
-    def __generate__(self, words: list[str]) -> list[str]:
+    def __generate__(self, words: list[str], rng: random.Random) -> list[str]:
         word = words[0]
 
         if len(word) == 0:
             return [word]
 
         # Substitute exactly one letter at a random position
-        substitute_position = random.randint(0, len(word) - 1)
-        substitute_letter = random.choice(self.letter_set)
+        substitute_position = rng.randint(0, len(word) - 1)
+        substitute_letter = rng.choice(self.letter_set)
         word = word[:substitute_position] + substitute_letter + word[substitute_position + 1:]
 
         return [word]
@@ -156,7 +274,7 @@ class TypoKeyboardProximitySubstitutionGenerator(TypoGenerator):
         super().__init__(1)
         self.accidental_shift = accidental_shift
 
-    def __generate__(self, words: list[str]) -> list[str]:
+    def __generate__(self, words: list[str], rng: random.Random) -> list[str]:
         word = words[0]
 
         if len(word) == 0:
@@ -167,7 +285,7 @@ class TypoKeyboardProximitySubstitutionGenerator(TypoGenerator):
         max_attempts = len(word)
         remaining_word = word
         for _ in range(max_attempts):
-            substitute_position = random.randint(0, len(remaining_word) - 1)
+            substitute_position = rng.randint(0, len(remaining_word) - 1)
             original_letter = remaining_word[substitute_position]
 
             if original_letter not in keyboard_proximity_map:
@@ -188,7 +306,7 @@ class TypoKeyboardProximitySubstitutionGenerator(TypoGenerator):
                     return [word]
                 continue
 
-            substitute_letter = random.choice(possible_substitutes)
+            substitute_letter = rng.choice(possible_substitutes)
 
             # Substitute the letter at the chosen position
             word = word[:substitute_position] + substitute_letter + word[substitute_position + 1:]
@@ -202,14 +320,14 @@ class TypoTranspositionGenerator(TypoGenerator):
     def __init__(self):
         super().__init__(1)
 
-    def __generate__(self, words: list[str]) -> list[str]:
+    def __generate__(self, words: list[str], rng: random.Random) -> list[str]:
         word = words[0]
 
         if len(word) < 2:
             return [word]
         
         # Transpose two adjacent letters at a random position
-        transpose_position = random.randint(0, len(word) - 2)
+        transpose_position = rng.randint(0, len(word) - 2)
         word = (word[:transpose_position] + word[transpose_position + 1] + word[transpose_position] + word[transpose_position + 2:])
         return [word]
     
@@ -217,14 +335,14 @@ class TypoDeletionGenerator(TypoGenerator):
     def __init__(self):
         super().__init__(1)
 
-    def __generate__(self, words: list[str]) -> list[str]:
+    def __generate__(self, words: list[str], rng: random.Random) -> list[str]:
         word = words[0]
 
         if len(word) == 0:
             return [word]
 
         # Delete exactly one letter at a random position
-        delete_position = random.randint(0, len(word) - 1)
+        delete_position = rng.randint(0, len(word) - 1)
         word = word[:delete_position] + word[delete_position + 1:]
 
         return [word]
@@ -233,14 +351,14 @@ class TypoCaseChangeGenerator(TypoGenerator):
     def __init__(self):
         super().__init__(1)
 
-    def __generate__(self, words: list[str]) -> list[str]:
+    def __generate__(self, words: list[str], rng: random.Random) -> list[str]:
         word = words[0]
 
         if len(word) == 0:
             return [word]
 
         # Change the case of exactly one letter at a random position
-        change_position = random.randint(0, len(word) - 1)
+        change_position = rng.randint(0, len(word) - 1)
         original_letter = word[change_position]
         if original_letter.islower():
             substitute_letter = original_letter.upper()
@@ -257,7 +375,7 @@ class TypoWordRepetitionGenerator(TypoGenerator):
     def __init__(self):
         super().__init__(1)
 
-    def __generate__(self, words: list[str]) -> list[str]:
+    def __generate__(self, words: list[str], rng: random.Random) -> list[str]:
         word = words[0]
 
         if len(word) == 0:
@@ -270,7 +388,7 @@ class TypoMissedDoubleGenerator(TypoGenerator):
     def __init__(self):
         super().__init__(1)
 
-    def __generate__(self, words: list[str]) -> list[str]:
+    def __generate__(self, words: list[str], rng: random.Random) -> list[str]:
         word = words[0]
 
         if len(word) < 2:
@@ -282,7 +400,7 @@ class TypoMissedDoubleGenerator(TypoGenerator):
         if not double_letter_positions:
             return [word]
 
-        missed_position = random.choice(double_letter_positions)
+        missed_position = rng.choice(double_letter_positions)
         word = word[:missed_position] + word[missed_position + 1:]
 
         return [word]
@@ -291,14 +409,14 @@ class TypoExtraDoubleGenerator(TypoGenerator):
     def __init__(self):
         super().__init__(1)
 
-    def __generate__(self, words: list[str]) -> list[str]:
+    def __generate__(self, words: list[str], rng: random.Random) -> list[str]:
         word = words[0]
 
         if len(word) == 0:
             return [word]
 
         # Randomly choose a letter to double
-        double_position = random.randint(0, len(word) - 1)
+        double_position = rng.randint(0, len(word) - 1)
         word = word[:double_position] + word[double_position] + word[double_position:]
 
         return [word]
@@ -313,28 +431,26 @@ class TypoHomophoneGenerator(TypoGenerator):
         meaningful_word = make_word_meaningful(word)
         if meaningful_word is None:
             return False
-        
+
         homophones = self.homophone_map.get(meaningful_word)
-        if homophones is None:
-            homophones = get_homophones(meaningful_word)
-            if homophones is None:
-                homophones = []
-            self.homophone_map[meaningful_word] = homophones
+        if homophones is not None:
+            return len(homophones) > 0
 
-        return len(homophones) > 0
+        return has_homophones(meaningful_word)
     
     def get_homophones(self, word: str) -> list[str]:
         meaningful_word = make_word_meaningful(word)
         if meaningful_word is None:
             return []
         
-        # Calling this will fetch and cache the homophones if they haven't been fetched already
-        if self.has_any_homophones(meaningful_word):
-            return self.homophone_map[meaningful_word]
+        homophones = self.homophone_map.get(meaningful_word)
+        if homophones is None:
+            homophones = get_homophones(meaningful_word) or []
+            self.homophone_map[meaningful_word] = homophones
 
-        return self.homophone_map[meaningful_word]
+        return homophones
 
-    def __generate__(self, words: list[str]) -> list[str]:
+    def __generate__(self, words: list[str], rng: random.Random) -> list[str]:
         word = words[0]
 
         if len(word) == 0:
@@ -347,7 +463,7 @@ class TypoHomophoneGenerator(TypoGenerator):
         if not self.has_any_homophones(meaningful_word):
             return [word]
 
-        substitute_word = random.choice(self.get_homophones(meaningful_word))
+        substitute_word = rng.choice(self.get_homophones(meaningful_word))
 
         return [substitute_word]
     
@@ -358,15 +474,15 @@ class TypoFillerWordInsertionGenerator(TypoGenerator):
         super().__init__(1)
         self.filler_words = filler_words
 
-    def __generate__(self, words: list[str]) -> list[str]:
+    def __generate__(self, words: list[str], rng: random.Random) -> list[str]:
         word = words[0]
 
         if len(word) == 0:
             return [word]
 
         # Insert a random filler word before or after the original word
-        filler_word = random.choice(self.filler_words)
-        before_or_after = random.choice(['before', 'after'])
+        filler_word = rng.choice(self.filler_words)
+        before_or_after = rng.choice(['before', 'after'])
         if before_or_after == 'before':
             return [filler_word, word]
         else:
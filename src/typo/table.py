@@ -0,0 +1,216 @@
+import array
+import mmap
+import os
+import struct
+import sys
+from warnings import warn
+
+# Compiled by `build_homophone_table()` (`make build-homophones`) so that the typo engine
+# never needs to import NLTK or parse cmudict at runtime.
+HOMOPHONE_TABLE_PATH = "./src/assets/homophones.bin"
+
+HOMOPHONE_TABLE_MAGIC = b"IGHOMO01"
+
+# magic, word count, word blob size, word-group link count, group count, group member count
+HOMOPHONE_TABLE_HEADER = struct.Struct("<8sIIIII")
+
+homophone_table: "HomophoneTable | None" = None
+homophone_table_checked: bool = False
+
+def load_cmudict_entries() -> list[tuple[str, list[str]]]:
+    """
+        Load the raw (word, phones) entries of the CMU pronouncing dictionary through NLTK,
+        downloading the corpus first if it is not present.
+    """
+    # NLTK is slow to import, so only pay for it when the corpus actually has to be parsed.
+    import nltk
+
+    # Ensure you have the dictionary downloaded
+    try:
+        return nltk.corpus.cmudict.entries()
+    except LookupError:
+        nltk.download('cmudict')
+        return nltk.corpus.cmudict.entries()
+
+def build_homophone_table(path: str = HOMOPHONE_TABLE_PATH) -> str:
+    """
+        Compile cmudict into a compact binary homophone table that can be memory-mapped by `HomophoneTable`.
+
+        Layout (little-endian, every section 4-byte aligned):
+        - header: magic + counts (see HOMOPHONE_TABLE_HEADER)
+        - word_offsets: uint32[word_count + 1] into the word blob. Words are sorted, so their index is their id.
+        - word_group_offsets: uint32[word_count + 1] into word_groups
+        - word_groups: uint32[link_count], the homophone groups each word belongs to
+        - group_offsets: uint32[group_count + 1] into group_members
+        - group_members: uint32[member_count], word ids of every word sharing one pronunciation
+        - has_homophones: a bitset with one bit per word id
+        - word blob: the UTF-8 encoded words, concatenated
+
+        Only pronunciations shared by at least two words become groups.
+
+        :param path: Where to write the table. The file is replaced atomically.
+        :return: The path the table was written to.
+    """
+    prons_to_words: dict[tuple[str, ...], set[str]] = {}
+    words: set[str] = set()
+    for w, pron in load_cmudict_entries():
+        words.add(w)
+        prons_to_words.setdefault(tuple(pron), set()).add(w)
+
+    encoded_words = sorted(w.encode("utf-8") for w in words)
+    word_ids = {w.decode("utf-8"): i for i, w in enumerate(encoded_words)}
+
+    # Sort the groups so the file is byte-for-byte reproducible
+    groups = sorted(sorted(word_ids[w] for w in group) for group in prons_to_words.values() if len(group) > 1)
+
+    groups_by_word: list[list[int]] = [[] for _ in encoded_words]
+    for group_id, members in enumerate(groups):
+        for word_id in members:
+            groups_by_word[word_id].append(group_id)
+
+    word_offsets = array.array("I", [0])
+    for w in encoded_words:
+        word_offsets.append(word_offsets[-1] + len(w))
+
+    word_group_offsets = array.array("I", [0])
+    word_groups = array.array("I")
+    for word_group_ids in groups_by_word:
+        word_groups.extend(word_group_ids)
+        word_group_offsets.append(len(word_groups))
+
+    group_offsets = array.array("I", [0])
+    group_members = array.array("I")
+    for members in groups:
+        group_members.extend(members)
+        group_offsets.append(len(group_members))
+
+    bitset = bytearray((len(encoded_words) + 7) // 8)
+    for word_id, word_group_ids in enumerate(groups_by_word):
+        if word_group_ids:
+            bitset[word_id >> 3] |= 1 << (word_id & 7)
+
+    blob = b"".join(encoded_words)
+
+    sections: list[bytes] = []
+    for section in (word_offsets, word_group_offsets, word_groups, group_offsets, group_members):
+        if sys.byteorder != "little":
+            section.byteswap()
+        sections.append(section.tobytes())
+    sections.append(bytes(bitset) + b"\0" * (-len(bitset) % 4))
+    sections.append(blob)
+
+    header = HOMOPHONE_TABLE_HEADER.pack(
+        HOMOPHONE_TABLE_MAGIC, len(encoded_words), len(blob), len(word_groups), len(groups), len(group_members)
+    )
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for section in sections:
+            f.write(section)
+    # Replace atomically so processes that already mapped the old file keep a consistent view.
+    os.replace(tmp_path, path)
+
+    return path
+
+class HomophoneTable:
+    """
+        A read-only, memory-mapped view of a table written by `build_homophone_table()`.
+        Nothing is copied out of the file, so any number of processes can share the same pages.
+    """
+    def __init__(self, path: str = HOMOPHONE_TABLE_PATH):
+        if sys.byteorder != "little":
+            raise ValueError("Memory-mapped homophone tables are only supported on little-endian platforms.")
+
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, word_count, blob_size, link_count, group_count, member_count = HOMOPHONE_TABLE_HEADER.unpack_from(self._mmap, 0)
+        if magic != HOMOPHONE_TABLE_MAGIC:
+            raise ValueError(f"'{path}' is not a homophone table. Rebuild it with `make build-homophones`.")
+
+        view = memoryview(self._mmap)
+        position = HOMOPHONE_TABLE_HEADER.size
+
+        def take_uint32(count: int) -> memoryview:
+            nonlocal position
+            section = view[position:position + count * 4].cast("I")
+            position += count * 4
+            return section
+
+        self.word_count: int = word_count
+        self._word_offsets = take_uint32(word_count + 1)
+        self._word_group_offsets = take_uint32(word_count + 1)
+        self._word_groups = take_uint32(link_count)
+        self._group_offsets = take_uint32(group_count + 1)
+        self._group_members = take_uint32(member_count)
+
+        bitset_size = (word_count + 7) // 8
+        self._bitset = view[position:position + bitset_size]
+        position += bitset_size + (-bitset_size % 4)
+
+        self._blob = view[position:position + blob_size]
+
+    def word(self, word_id: int) -> str:
+        return str(self._blob[self._word_offsets[word_id]:self._word_offsets[word_id + 1]], "utf-8")
+
+    def word_id(self, word: str) -> int | None:
+        """
+            Binary search the sorted word blob for a word, returning its id or None if it is not in the table.
+        """
+        target = word.lower().encode("utf-8")
+        offsets = self._word_offsets
+        lo, hi = 0, self.word_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            candidate = self._blob[offsets[mid]:offsets[mid + 1]].tobytes()
+            if candidate < target:
+                lo = mid + 1
+            elif candidate > target:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def has_homophones(self, word: str) -> bool:
+        word_id = self.word_id(word)
+        if word_id is None:
+            return False
+        return bool(self._bitset[word_id >> 3] & (1 << (word_id & 7)))
+
+    def get_homophones(self, word: str) -> list[str] | None:
+        """
+            :return: A sorted list of homophones (possibly empty), or None if the word is not in the table.
+        """
+        word_id = self.word_id(word)
+        if word_id is None:
+            return None
+
+        homophone_ids: set[int] = set()
+        for link in range(self._word_group_offsets[word_id], self._word_group_offsets[word_id + 1]):
+            group_id = self._word_groups[link]
+            homophone_ids.update(self._group_members[self._group_offsets[group_id]:self._group_offsets[group_id + 1]])
+        homophone_ids.discard(word_id)
+
+        # Ids follow the sort order of the words, so this is already sorted
+        return [self.word(i) for i in sorted(homophone_ids)]
+
+def get_homophone_table() -> HomophoneTable | None:
+    """
+        Memory-map the prebuilt homophone table the first time it is needed.
+        Returns None (after warning once) if the table has not been built.
+    """
+    global homophone_table
+    global homophone_table_checked
+
+    if homophone_table_checked:
+        return homophone_table
+    homophone_table_checked = True
+
+    if not os.path.exists(HOMOPHONE_TABLE_PATH):
+        warn(f"Homophone table not found at {HOMOPHONE_TABLE_PATH}. Falling back to parsing cmudict through NLTK; run `make build-homophones` to avoid this.")
+        return None
+
+    homophone_table = HomophoneTable(HOMOPHONE_TABLE_PATH)
+    return homophone_table
@@ -1,5 +1,12 @@
 # Import from subfiles here so that they can be imported directly from the parent package.
 from .colors import *
+from .columnar import *
 from .component import *
+from .fixed_width import *
+from .log import *
 from .math import *
-from .output import *
\ No newline at end of file
+from .output import *
+from .permutation import *
+from .run_log import *
+from .seeding import *
+from .sink import *
\ No newline at end of file
@@ -1,14 +1,49 @@
-from scipy.spatial import KDTree
 from warnings import warn
+from typing import TYPE_CHECKING
+import numpy as np
+import hashlib
 import json
 import random
 import os
-import requests
 import sys
 from .pytypes import *
+from ..log import get_logger
+
+# scipy is slow to import, so the KD-trees below only import it when they are first built.
+if TYPE_CHECKING:
+    from scipy.spatial import KDTree
+
+logger = get_logger("colors")
 
 colors: dict[str, RGB] | None = None
 colors_tuples: list[tuple[int, int, int]] | None = None
+# Built alongside the colors cache so that name lookups never rebuild the index.
+color_names: list[str] | None = None
+color_tree: "KDTree | None" = None
+
+COLORS_PATH = "./src/assets/colors.json"
+COLOR_LUT_PATH = "./src/assets/colors-lut.bin"
+COLOR_LUT_MAGIC = b"IGCLUT01"
+# magic (8 bytes) + SHA-256 of the palette file (32 bytes) + palette size (uint32), padded to 64 bytes
+COLOR_LUT_HEADER_SIZE = 64
+COLOR_LUT_SIZE = 1 << 24
+
+COLOR_LAB_LUT_PATH = "./src/assets/colors-lut-lab.bin"
+
+# Optional RGB -> palette index tables covering every 24-bit color, by RGB and CIELAB distance. See load_color_lut().
+color_lut: np.ndarray | None = None
+color_lab_lut: np.ndarray | None = None
+
+# KD-tree over the palette converted to CIELAB. Built on first perceptual lookup.
+color_lab_tree: "KDTree | None" = None
+
+# sRGB (D65) -> CIE XYZ
+SRGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041]
+])
+D65_WHITE = np.array([0.95047, 1.0, 1.08883])
 
 def clean_dirty_colors():
     # Get the current colors file, which is in the `assets` folder and is JSON.
@@ -21,14 +56,15 @@ def clean_dirty_colors():
             dirty_colors = data.get("colors", [])
     else:
         # Fetch the colors from the API and save them to the dirty colors file.
-        print(f"Dirty colors file not found at {dirty_colors_path}. Fetching from API endpoint https://api.color.pizza/v1/?list=default")
+        logger.info("Dirty colors file not found at %s. Fetching from API endpoint https://api.color.pizza/v1/?list=default", dirty_colors_path)
+        import requests
         response = requests.get("https://api.color.pizza/v1/?list=default")
         if response.status_code == 200:
             data = response.json()
             dirty_colors = data.get("colors", [])
             with open(dirty_colors_path, "w") as f:
                 json.dump({"colors": dirty_colors}, f)
-            print(f"Dirty colors fetched and saved to {dirty_colors_path}")
+            logger.info("Dirty colors fetched and saved to %s", dirty_colors_path)
         else:
             warn(f"Failed to fetch colors from API. Status code: {response.status_code}. No colors will be available.")
 
@@ -44,25 +80,27 @@ def clean_dirty_colors():
         new_colors.append(new_color)
     
     # Write the new colors to a new JSON file in the assets directory.
-    new_colors_path = f"./src/assets/colors.json"
+    new_colors_path = COLORS_PATH
     with open(new_colors_path, "w") as f:
         json.dump({"colors": new_colors}, f)
     
-    print(f"Clean colors file written to: {new_colors_path}")
+    logger.info("Clean colors file written to: %s", new_colors_path)
 
 def get_colors():
     global colors
     global colors_tuples
+    global color_names
 
     if colors is not None:
         return colors
     
-    if not os.path.exists("./src/assets/colors.json"):
+    if not os.path.exists(COLORS_PATH):
         warn("Colors file not found. Please run clean_dirty_colors() to fetch and clean the color data.")
         sys.exit(1)
 
-    colors = {}
-    with open("./src/assets/colors.json", "r") as f:
+    # Built in locals and published at the end, so that other threads never see a half-loaded palette
+    loaded_colors = {}
+    with open(COLORS_PATH, "r") as f:
         """
             We get the fololowing:
             {
@@ -81,23 +119,180 @@ def get_colors():
         data = json.load(f)
 
     for color in data["colors"]:
-        colors[color["name"]] = color["rgb"]
+        loaded_colors[color["name"]] = color["rgb"]
     
-    colors_tuples = [(color["r"], color["g"], color["b"]) for color in colors.values()]
+    colors_tuples = [(color["r"], color["g"], color["b"]) for color in loaded_colors.values()]
+    color_names = list(loaded_colors.keys())
+    colors = loaded_colors
     
     return colors
 
-def nearest_color(other_rgb: RGB) -> str:
-    global colors_tuples
+def get_color_index(perceptual: bool = False) -> tuple["KDTree", list[str]]:
+    """
+        Get the KD-tree over the palette and the color names in the same order as its points.
+        The tree is built once, the first time it is requested.
+
+        :param perceptual: If True, get the tree over the palette converted to CIELAB instead of raw RGB.
+    """
+    global color_tree
+    global color_lab_tree
+
+    get_colors()
+    assert color_names is not None and colors_tuples is not None
+
+    if not perceptual:
+        if color_tree is None:
+            from scipy.spatial import KDTree
+            color_tree = KDTree(colors_tuples)
+        return color_tree, color_names
+
+    if color_lab_tree is None:
+        from scipy.spatial import KDTree
+        color_lab_tree = KDTree(rgb_to_lab_array(np.array(colors_tuples)))
+    return color_lab_tree, color_names
+
+def get_palette_digest() -> bytes:
+    with open(COLORS_PATH, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+def build_color_lut(path: str = COLOR_LUT_PATH, perceptual: bool = False) -> str:
+    """
+        Precompute the nearest palette index for all 16,777,216 RGB values and write them as a uint16 table,
+        indexed by (r << 16) | (g << 8) | b. The header records a digest of the palette file and the distance
+        metric so that a stale table can be detected and rebuilt.
+
+        :param path: Where to write the table. The file is replaced atomically.
+        :param perceptual: If True, measure distances in CIELAB instead of raw RGB.
+        :return: The path the table was written to.
+    """
+    tree, names = get_color_index(perceptual)
+    if len(names) > np.iinfo(np.uint16).max + 1:
+        raise ValueError(f"The palette has {len(names)} colors, but the lookup table can only index {np.iinfo(np.uint16).max + 1}.")
+
+    header = bytearray(COLOR_LUT_HEADER_SIZE)
+    header[0:8] = COLOR_LUT_MAGIC
+    header[8:40] = get_palette_digest()
+    header[40:44] = len(names).to_bytes(4, "little")
+    header[44] = int(perceptual)
+
+    # Query one block of red values at a time to keep memory bounded
+    reds_per_block = 16
+    gb = np.arange(1 << 16, dtype=np.uint32)
+    g = (gb >> 8).astype(np.uint8)
+    b = (gb & 0xFF).astype(np.uint8)
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for r_start in range(0, 256, reds_per_block):
+            r = np.repeat(np.arange(r_start, r_start + reds_per_block, dtype=np.uint8), 1 << 16)
+            block = np.column_stack((r, np.tile(g, reds_per_block), np.tile(b, reds_per_block)))
+            _, indices = tree.query(rgb_to_lab_array(block) if perceptual else block, workers=-1)
+            f.write(np.asarray(indices, dtype="<u2").tobytes())
+    # Replace atomically so processes that already mapped the old table keep a consistent view.
+    os.replace(tmp_path, path)
+
+    return path
+
+def load_color_lut(path: str | None = None, perceptual: bool = False) -> np.ndarray:
+    """
+        Memory-map the RGB lookup table, (re)building it first if it is missing or was built from
+        a different palette. Once loaded, `nearest_color` and `nearest_colors` resolve names with a single
+        array index instead of a tree query. The mapping is read-only, so processes share its pages.
+
+        :param path: Where the table lives. Defaults to a separate file per distance metric.
+        :param perceptual: If True, load the table built with CIELAB distances.
+    """
+    global color_lut
+    global color_lab_lut
+
+    loaded = color_lab_lut if perceptual else color_lut
+    if loaded is not None:
+        return loaded
+
+    if path is None:
+        path = COLOR_LAB_LUT_PATH if perceptual else COLOR_LUT_PATH
+
+    digest = get_palette_digest()
+    stale = True
+    if os.path.exists(path) and os.path.getsize(path) == COLOR_LUT_HEADER_SIZE + COLOR_LUT_SIZE * 2:
+        with open(path, "rb") as f:
+            header = f.read(COLOR_LUT_HEADER_SIZE)
+        stale = header[0:8] != COLOR_LUT_MAGIC or header[8:40] != digest or header[44] != int(perceptual)
 
-    colors = get_colors()
-    names = list(colors.keys())
+    if stale:
+        logger.info("Color lookup table at %s is missing or out of date. Building it (this takes a while)...", path)
+        build_color_lut(path, perceptual)
+        logger.info("Color lookup table written to: %s", path)
 
-    tree = KDTree(colors_tuples)
-    _, index = tree.query((other_rgb["r"], other_rgb["g"], other_rgb["b"]))
+    loaded = np.memmap(path, dtype="<u2", mode="r", offset=COLOR_LUT_HEADER_SIZE, shape=(COLOR_LUT_SIZE,))
+    if perceptual:
+        color_lab_lut = loaded
+    else:
+        color_lut = loaded
+    return loaded
+
+def get_loaded_color_lut(perceptual: bool = False, lut: bool | None = None) -> np.ndarray | None:
+    """
+        Get the lookup table a name lookup should use, if any.
+
+        :param lut: If True, load the table (see `load_color_lut`). If False, use none, so the KD-tree is queried.
+        If None, use the table only if one has already been loaded.
+    """
+    if lut:
+        return load_color_lut(perceptual=perceptual)
+    if lut is None:
+        return color_lab_lut if perceptual else color_lut
+    return None
+
+def nearest_color(other_rgb: RGB, perceptual: bool = False, lut: bool | None = None) -> str:
+    """
+        Find the name of the palette color closest to the given color.
+
+        :param perceptual: If True, measure distance in CIELAB (CIE76 delta E), which tracks how different
+        colors look far better than Euclidean distance in raw RGB.
+        :param lut: Whether to look the name up in the precomputed table. See `get_loaded_color_lut`.
+    """
+    lut = get_loaded_color_lut(perceptual, lut)
+    if lut is not None:
+        get_colors()
+        assert color_names is not None
+        return color_names[lut[(other_rgb["r"] << 16) | (other_rgb["g"] << 8) | other_rgb["b"]]]
+
+    tree, names = get_color_index(perceptual)
+    point = (other_rgb["r"], other_rgb["g"], other_rgb["b"])
+    _, index = tree.query(rgb_to_lab_array(np.array(point))[0] if perceptual else point)
             
     return names[index]
 
+def nearest_color_indices(rgbs: np.ndarray, perceptual: bool = False, lut: bool | None = None) -> np.ndarray:
+    """
+        Find the palette index of the nearest color for every row of an (N, 3) array of RGB values,
+        answering all N queries with a single vectorized tree query.
+
+        :param perceptual: If True, convert the queries to CIELAB (vectorized) and query the CIELAB tree.
+        :param lut: Whether to look the indices up in the precomputed table. See `get_loaded_color_lut`.
+    """
+    rgbs = np.asarray(rgbs).reshape(-1, 3)
+
+    lut = get_loaded_color_lut(perceptual, lut)
+    if lut is not None:
+        rgbs = rgbs.astype(np.uint32)
+        return lut[(rgbs[:, 0] << 16) | (rgbs[:, 1] << 8) | rgbs[:, 2]].astype(np.intp)
+
+    tree, _ = get_color_index(perceptual)
+    _, indices = tree.query(rgb_to_lab_array(rgbs) if perceptual else rgbs, workers=-1)
+    return np.asarray(indices, dtype=np.intp)
+
+def nearest_colors(rgbs: np.ndarray, perceptual: bool = False, lut: bool | None = None) -> list[str]:
+    """
+        Batch version of `nearest_color`. Takes an (N, 3) array of RGB values and returns the N color names.
+    """
+    indices = nearest_color_indices(rgbs, perceptual, lut)
+    get_colors()
+    assert color_names is not None
+    return [color_names[i] for i in indices.tolist()]
+
 def rgb_to_hex(rgb: RGB) -> str:
     return "#{:02x}{:02x}{:02x}".format(rgb["r"], rgb["g"], rgb["b"])
 
@@ -169,7 +364,7 @@ def rgb_to_cmyk(rgb: RGB) -> CMYK:
 
     k = 1 - max(r, g, b)
     if k == 1:
-        return {"c": 0, "m": 0, "y": 0, "k": 1}
+        return {"c": 0, "m": 0, "y": 0, "k": 100}
 
     c = (1 - r - k) / (1 - k)
     m = (1 - g - k) / (1 - k)
@@ -177,6 +372,64 @@ def rgb_to_cmyk(rgb: RGB) -> CMYK:
 
     return {"c": c * 100, "m": m * 100, "y": y * 100, "k": k * 100}
 
+def rgb_to_hsl_array(rgbs: np.ndarray) -> np.ndarray:
+    """
+        Vectorized `rgb_to_hsl`. Takes an (N, 3) array of RGB values and returns an (N, 3) array of (h, s, l).
+    """
+    rgb = np.asarray(rgbs, dtype=np.float64).reshape(-1, 3) / 255.0
+    r, g, b = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+
+    max_color = rgb.max(axis=1)
+    min_color = rgb.min(axis=1)
+    l = (max_color + min_color) / 2.0
+    d = max_color - min_color
+    chromatic = d > 0
+
+    # Avoid dividing by zero for achromatic colors; their hue and saturation are forced to 0 below.
+    safe_d = np.where(chromatic, d, 1.0)
+    s = np.where(chromatic, d / np.where(chromatic, 1 - np.abs(2 * l - 1), 1.0), 0.0)
+
+    h = np.where(
+        max_color == r,
+        (g - b) / safe_d + np.where(g < b, 6, 0),
+        np.where(max_color == g, (b - r) / safe_d + 2, (r - g) / safe_d + 4)
+    )
+    h = np.where(chromatic, h / 6, 0.0)
+
+    return np.column_stack((h * 360, s * 100, l * 100))
+
+def rgb_to_cmyk_array(rgbs: np.ndarray) -> np.ndarray:
+    """
+        Vectorized `rgb_to_cmyk`. Takes an (N, 3) array of RGB values and returns an (N, 4) array of (c, m, y, k).
+    """
+    rgb = np.asarray(rgbs, dtype=np.float64).reshape(-1, 3) / 255.0
+
+    k = 1 - rgb.max(axis=1)
+    black = k == 1
+    # Black has no defined c/m/y, so leave those at 0 instead of dividing by zero.
+    cmy = np.where(black[:, None], 0.0, (1 - rgb - k[:, None]) / np.where(black, 1.0, 1 - k)[:, None])
+
+    return np.column_stack((cmy * 100, k * 100))
+
+def rgb_to_lab_array(rgbs: np.ndarray) -> np.ndarray:
+    """
+        Convert an (N, 3) array of sRGB values (0-255) to an (N, 3) array of CIELAB (L*, a*, b*) values
+        under the D65 illuminant.
+    """
+    rgb = np.asarray(rgbs, dtype=np.float64).reshape(-1, 3) / 255.0
+
+    # Undo the sRGB gamma curve
+    linear = np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    xyz = (linear @ SRGB_TO_XYZ.T) / D65_WHITE
+
+    delta = 6 / 29
+    f = np.where(xyz > delta ** 3, np.cbrt(xyz), xyz / (3 * delta ** 2) + 4 / 29)
+
+    l = 116 * f[:, 1] - 16
+    a = 500 * (f[:, 0] - f[:, 1])
+    b = 200 * (f[:, 1] - f[:, 2])
+    return np.column_stack((l, a, b))
+
 def cmyk_to_rgb(cmyk: CMYK) -> RGB:
     c = cmyk["c"] / 100.0
     m = cmyk["m"] / 100.0
@@ -0,0 +1,168 @@
+import json
+import os
+import struct
+import numpy as np
+from typing import Any, BinaryIO, Sequence
+from .sink import RecordSink
+
+# A columnar output directory holds one .npy file per column plus this schema file, which lists the columns
+# and holds the dictionaries of dictionary-encoded columns. Every column can be memory-mapped with
+# numpy.load(path, mmap_mode='r') without parsing anything.
+COLUMNAR_SCHEMA_FILE = "schema.json"
+COLUMNAR_FORMAT_VERSION = 1
+
+# Column type for strings: each value is stored as a uint32 code into the column's dictionary
+DICTIONARY_COLUMN = "dictionary"
+DICTIONARY_CODE_DTYPE = np.dtype("<u4")
+
+# Every .npy header is padded to this size, so it can be rewritten in place with the final length
+NPY_HEADER_SIZE = 128
+
+# Records written one at a time are collected into batches of this many rows before being encoded
+COLUMNAR_BATCH_SIZE = 1 << 16
+
+def npy_header(dtype: np.dtype, length: int) -> bytes:
+    """
+        Build a version 1.0 .npy header for a 1-D array, padded to NPY_HEADER_SIZE bytes.
+    """
+    header = repr({'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (length,)})
+    # Magic string (6) + version (2) + header length (2), and the header ends with a newline
+    header = header.ljust(NPY_HEADER_SIZE - 10 - 1) + '\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1')
+
+class ColumnarSink(RecordSink):
+    """
+        Writes records as typed, fixed-width columns: one .npy file per column in a directory, plus a
+        schema.json describing them. Integer columns use the given NumPy dtype. String columns are
+        dictionary-encoded: the column holds uint32 codes and schema.json holds each distinct value once.
+        Columns are appended to as batches arrive, so memory only grows with the number of distinct strings.
+
+        :param directory: The directory to write to. Created if it does not exist. Existing column files are replaced.
+        :param columns: Column name to type: a NumPy integer dtype name (e.g. "uint16") or DICTIONARY_COLUMN.
+    """
+    directory: str
+    columns: dict[str, str]
+
+    def __init__(self, directory: str, columns: dict[str, str]):
+        self.directory = directory
+        self.columns = columns
+        self.fields = list(columns.keys())
+        self.count = 0
+
+        self._dtypes: dict[str, np.dtype] = {}
+        self._dictionaries: dict[str, dict[str, int]] = {}
+        for name, column_type in columns.items():
+            if column_type == DICTIONARY_COLUMN:
+                self._dtypes[name] = DICTIONARY_CODE_DTYPE
+                self._dictionaries[name] = {}
+            else:
+                dtype = np.dtype(column_type).newbyteorder('<')
+                if dtype.kind not in "iu":
+                    raise ValueError(f"Column '{name}' must be an integer dtype or '{DICTIONARY_COLUMN}', but got '{column_type}'.")
+                self._dtypes[name] = dtype
+
+        os.makedirs(directory, exist_ok=True)
+        self._files: dict[str, BinaryIO] = {}
+        for name, dtype in self._dtypes.items():
+            f = open(os.path.join(directory, f"{name}.npy"), "wb")
+            f.write(npy_header(dtype, 0))
+            self._files[name] = f
+
+        self._pending: dict[str, list[Any]] = {name: [] for name in self.fields}
+        self._pending_rows = 0
+
+    def write(self, record: dict[str, Any]) -> None:
+        for name in self.fields:
+            self._pending[name].append(record.get(name))
+        self._pending_rows += 1
+        if self._pending_rows >= COLUMNAR_BATCH_SIZE:
+            self.flush()
+
+    def write_columns(self, batch: dict[str, np.ndarray | Sequence[Any]]) -> None:
+        """
+            Write a batch of rows given as whole columns, all of the same length. This skips building
+            per-record dicts, so bulk generators should prefer it.
+        """
+        self.flush()
+
+        lengths = {len(batch[name]) for name in self.fields}
+        if len(lengths) != 1:
+            raise ValueError(f"Every column of a batch must have the same length, but got lengths {sorted(lengths)}.")
+
+        for name in self.fields:
+            self._files[name].write(self.encode_column(name, batch[name]).tobytes())
+        self.count += lengths.pop()
+
+    def encode_column(self, name: str, values: np.ndarray | Sequence[Any]) -> np.ndarray:
+        """
+            Turn one column of a batch into the array stored on disk.
+        """
+        if name in self._dictionaries:
+            codes = self._dictionaries[name]
+            # setdefault assigns the next free code to values seen for the first time
+            return np.fromiter((codes.setdefault(str(value), len(codes)) for value in values), dtype=DICTIONARY_CODE_DTYPE, count=len(values))
+
+        dtype = self._dtypes[name]
+        array = np.asarray(values, dtype=np.int64)
+        info = np.iinfo(dtype)
+        if len(array) and (array.min() < info.min or array.max() > info.max):
+            raise ValueError(f"Column '{name}' has values outside the range of {dtype.name} ({info.min} to {info.max}).")
+        return array.astype(dtype)
+
+    def flush(self) -> None:
+        if self._pending_rows:
+            batch = self._pending
+            self._pending = {name: [] for name in self.fields}
+            self._pending_rows = 0
+            self.write_columns(batch)
+
+        for f in self._files.values():
+            f.flush()
+
+    def close(self) -> None:
+        self.flush()
+
+        # Now that the length is known, fill it into every header
+        for name, f in self._files.items():
+            f.seek(0)
+            f.write(npy_header(self._dtypes[name], self.count))
+            f.close()
+
+        schema = {
+            'format': "info-gen-columnar",
+            'version': COLUMNAR_FORMAT_VERSION,
+            'count': self.count,
+            'columns': [
+                {
+                    'name': name,
+                    'file': f"{name}.npy",
+                    'dtype': self._dtypes[name].name,
+                    'encoding': DICTIONARY_COLUMN if name in self._dictionaries else "plain",
+                    **({'dictionary': list(self._dictionaries[name])} if name in self._dictionaries else {})
+                }
+                for name in self.fields
+            ]
+        }
+        with open(os.path.join(self.directory, COLUMNAR_SCHEMA_FILE), "w", encoding="utf-8") as f:
+            json.dump(schema, f, ensure_ascii=False)
+
+def load_columnar(directory: str, decode: bool = False) -> dict[str, np.ndarray]:
+    """
+        Memory-map every column of a directory written by `ColumnarSink`.
+
+        :param decode: Whether to turn dictionary-encoded columns back into arrays of strings. This copies them
+        into memory; without it they are returned as their uint32 codes.
+        :return: Column name to array, in schema order.
+    """
+    with open(os.path.join(directory, COLUMNAR_SCHEMA_FILE), "r", encoding="utf-8") as f:
+        schema = json.load(f)
+
+    columns: dict[str, np.ndarray] = {}
+    for column in schema['columns']:
+        # Zero-length files cannot be memory-mapped
+        values = np.load(os.path.join(directory, column['file']), mmap_mode='r' if schema['count'] else None)
+        if decode and column['encoding'] == DICTIONARY_COLUMN:
+            values = np.array(column['dictionary'], dtype=object)[values]
+        columns[column['name']] = values
+
+    return columns
@@ -1,5 +1,8 @@
-from .math import clamp, randint_from_input
+from .math import INT64_MAX, INT64_SAFE_DIGITS, clamp, clamp_batch, randint_from_input, randint_from_input_batch, saturate_int64
+from .permutation import FeistelPermutation
+from .seeding import RandomSource
 from typing import Callable
+import numpy as np
 
 def format_component(
     value: int | str | None,
@@ -7,14 +10,163 @@ def format_component(
     max_val: int,
     width: int,
     fallback_fn: Callable[[], int],
-    log: bool = False
+    log: bool = False,
+    *,
+    rng: RandomSource | None = None
 ) -> tuple[int, str]:
     """
         Helper to process and format a component (SSN/phone part).
         Returns both the integer value and the zero-padded string.
+
+        :param rng: The generator to fill in pattern digits from. If None, the global random module is used.
     """
     if value is None:
         int_val = fallback_fn()
     else:
-        int_val = clamp(randint_from_input(value, fallback_fn, log=log), min_val, max_val, log=log)
-    return int_val, str(int_val).zfill(width)
\ No newline at end of file
+        int_val = clamp(randint_from_input(value, fallback_fn, log=log, rng=rng), min_val, max_val, log=log)
+    return int_val, str(int_val).zfill(width)
+
+def format_component_batch(
+    value: int | str | None,
+    min_val: int,
+    max_val: int,
+    count: int,
+    fallback_fn: Callable[[int], np.ndarray],
+    rng: RandomSource | None = None,
+    log: bool = False
+) -> np.ndarray:
+    """
+        Vectorized `format_component`. Resolves `count` values of a component (SSN/phone part) at once.
+        Returns only the integer column; formatting is left to the caller.
+
+        :param fallback_fn: Called with `count` to get random values when the component is unspecified.
+    """
+    if value is None:
+        return fallback_fn(count)
+    return clamp_batch(randint_from_input_batch(value, count, fallback_fn, rng, log=log), min_val, max_val, log=log)
+
+class ComponentDomain:
+    """
+        The set of values a component (SSN/phone part) can take, as an indexable range [0, size).
+        Used by unique mode to enumerate every possible identifier without materializing them.
+    """
+    size: int
+
+    def __init__(self, size: int, decode_fn: Callable[[np.ndarray], np.ndarray]):
+        self.size = size
+        self._decode_fn = decode_fn
+
+    def decode(self, indices: np.ndarray) -> np.ndarray:
+        """
+            Map indices in [0, size) to component values.
+        """
+        return self._decode_fn(indices)
+
+    @staticmethod
+    def from_range(min_val: int, max_val: int) -> "ComponentDomain":
+        return ComponentDomain(max_val - min_val + 1, lambda indices: indices + min_val)
+
+    @staticmethod
+    def from_values(values: list[int]) -> "ComponentDomain":
+        array = np.array(values, dtype=np.int64)
+        return ComponentDomain(len(array), lambda indices: array[indices])
+
+    @staticmethod
+    def from_pattern(pattern: str) -> "ComponentDomain":
+        """
+            Every value a pattern can produce: digits are fixed, and each non-digit can be any digit.
+        """
+        if len(pattern) > INT64_SAFE_DIGITS:
+            head, pattern = pattern[:-INT64_SAFE_DIGITS], pattern[-INT64_SAFE_DIGITS:]
+            # A non-zero digit in the head makes every value too large for any component's range. Otherwise, only
+            # the values whose head is all zeros can be in range, so its free positions are fixed to zero.
+            if any(c.isdigit() and c != '0' for c in head):
+                return ComponentDomain.from_values([INT64_MAX])
+
+        base = 0
+        free_powers: list[int] = []
+        for power, c in enumerate(reversed(pattern)):
+            if c.isdigit():
+                base += int(c) * 10 ** power
+            else:
+                free_powers.append(power)
+
+        def decode(indices: np.ndarray) -> np.ndarray:
+            values = np.full(len(indices), base, dtype=np.int64)
+            for j, power in enumerate(free_powers):
+                values += (indices // 10 ** j) % 10 * 10 ** power
+            return values
+
+        return ComponentDomain(10 ** len(free_powers), decode)
+
+def component_domain(value: int | str | None, fallback: ComponentDomain) -> ComponentDomain:
+    """
+        Unique-mode counterpart of `format_component`: the domain of values a component input can produce.
+        Unspecified components, and patterns with no digits, use the fallback domain.
+    """
+    if value is None:
+        return fallback
+    if isinstance(value, int):
+        return ComponentDomain.from_values([saturate_int64(value)])
+
+    try:
+        return ComponentDomain.from_values([saturate_int64(int(value))])
+    except ValueError:
+        pass
+
+    if not any(c.isdigit() for c in value):
+        return fallback
+    return ComponentDomain.from_pattern(value)
+
+def gen_unique_components(
+    n: int,
+    domains: list[ComponentDomain],
+    key: int,
+    cursor: int = 0,
+    is_valid: Callable[[list[np.ndarray]], np.ndarray] | None = None,
+    block_size: int = 1 << 16
+) -> tuple[list[np.ndarray], int]:
+    """
+        Draw up to `n` distinct combinations of components by walking a keyed permutation of the product of their domains.
+        Every combination is emitted at most once for a given key, no matter how many calls are made, as long as
+        each call resumes from the cursor returned by the previous one. Memory use is bounded by the block size.
+
+        :param domains: The domain of each component.
+        :param key: The permutation key. The same key and cursor always give the same values.
+        :param cursor: How far into the permutation to start.
+        :param is_valid: Optional filter over the decoded component columns. Rejected combinations are skipped,
+        which keeps the output unique when the product of the domains contains values that should never be emitted.
+        :return: The component columns (possibly shorter than `n` if the space ran out) and the cursor to resume from.
+    """
+    total = 1
+    for domain in domains:
+        total *= domain.size
+    permutation = FeistelPermutation(total, key)
+
+    chunks: list[list[np.ndarray]] = []
+    found = 0
+    while found < n and cursor < total:
+        counters = np.arange(cursor, min(cursor + block_size, total), dtype=np.int64)
+        indices = permutation.permute(counters)
+
+        # Mixed-radix decode of the combined index, last component varying fastest
+        columns: list[np.ndarray] = []
+        for domain in reversed(domains):
+            columns.append(domain.decode(indices % domain.size))
+            indices = indices // domain.size
+        columns.reverse()
+
+        keep = np.ones(len(counters), dtype=bool) if is_valid is None else is_valid(columns)
+        # Stop the cursor right after the last value we need, so nothing is skipped on resume
+        kept_positions = np.flatnonzero(keep)[:n - found]
+        if len(kept_positions) < n - found:
+            cursor += len(counters)
+        else:
+            cursor += int(kept_positions[-1]) + 1
+
+        chunks.append([column[kept_positions] for column in columns])
+        found += len(kept_positions)
+
+    if not chunks:
+        return [np.empty(0, dtype=np.int64) for _ in domains], cursor
+    return [np.concatenate([chunk[i] for chunk in chunks]) for i in range(len(domains))], cursor
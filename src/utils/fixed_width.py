@@ -0,0 +1,53 @@
+import re
+import sys
+import numpy as np
+from typing import BinaryIO, Sequence
+
+# A run of '#' in a template is a zero-padded numeric slot as wide as the run.
+FIXED_WIDTH_SLOT_REGEX = re.compile(r'#+')
+
+def format_fixed_width(template: str, columns: Sequence[np.ndarray]) -> np.ndarray:
+    """
+        Render integer columns into a preallocated byte buffer using a fixed-width template, without creating
+        any per-record Python strings. Every record is the template with each run of '#' replaced by
+        the zero-padded value of the matching column, e.g. "###-##-####\n" for SSNs.
+
+        :param template: The record template. Must be ASCII.
+        :param columns: One integer array per slot, in order, all of the same length. Values must be
+        non-negative and fit in their slot.
+        :return: An (N, record width) uint8 array. Its memory is one contiguous block of N records.
+    """
+    slots = [(m.start(), m.end() - m.start()) for m in FIXED_WIDTH_SLOT_REGEX.finditer(template)]
+    if len(slots) != len(columns):
+        raise ValueError(f"Template '{template.strip()}' has {len(slots)} slot(s), but {len(columns)} column(s) were given.")
+
+    count = len(columns[0]) if columns else 0
+    row = np.frombuffer(template.encode("ascii"), dtype=np.uint8)
+    buffer = np.empty((count, len(row)), dtype=np.uint8)
+    buffer[:] = row
+
+    for (start, width), column in zip(slots, columns):
+        values = np.asarray(column, dtype=np.int64)
+        if count and (values.min() < 0 or values.max() >= 10 ** width):
+            raise ValueError(f"Column values must be between 0 and {10 ** width - 1} to fit a {width}-digit slot.")
+
+        # Fill digits from the right; ord('0') == 48
+        for k in range(width):
+            buffer[:, start + width - 1 - k] = values % 10 + 48
+            values = values // 10
+
+    return buffer
+
+def write_fixed_width(buffer: np.ndarray, stream: BinaryIO | None = None) -> None:
+    """
+        Write a buffer from `format_fixed_width` in a single call.
+
+        :param stream: A binary stream. Defaults to stdout, which is flushed first so text printed before
+        this stays in order.
+    """
+    if stream is None:
+        sys.stdout.flush()
+        stream = sys.stdout.buffer
+
+    stream.write(np.ascontiguousarray(buffer).data)
+    stream.flush()
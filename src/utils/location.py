@@ -1,22 +1,253 @@
 import us
-from uszipcode import SearchEngine
-import random
+from typing import NamedTuple
+from .math import WeightedSampler
+from .seeding import RandomSource
+from .log import get_logger
 
-# Initialize the SearchEngine once (loading the DB takes a moment)
-# simple_zipcode=True is faster and sufficient for just names/numbers
-engine = SearchEngine(simple_or_comprehensive=SearchEngine.SimpleOrComprehensiveArgEnum.simple)
+logger = get_logger("location")
 
-def get_all_us_states(include_territories: bool=True) -> list[dict[str, str]]:
+# The same threshold uszipcode's SearchEngine.find_city uses
+CITY_MATCH_MIN_SIMILARITY = 70
+
+class LocationIndex:
+    """
+        An in-memory copy of everything address generation needs from the simple uszipcode database,
+        read in a single query so that lookups never touch SQLite afterwards.
+
+        As with uszipcode's own `by_state` and `by_city_and_state`, only standard zip codes are listed
+        per state and per city. `city_state_by_zipcode` covers every zip code type, like `by_zipcode`.
+    """
+    # State abbreviation -> sorted major city names
+    cities_by_state: dict[str, tuple[str, ...]]
+    # State abbreviation -> sorted zip codes
+    zipcodes_by_state: dict[str, tuple[str, ...]]
+    # (case-folded city, state abbreviation) -> sorted zip codes
+    zipcodes_by_city: dict[tuple[str, str], tuple[str, ...]]
+    # Zip code -> (major city, state abbreviation)
+    city_state_by_zipcode: dict[str, tuple[str, str]]
+    # Case-folded city -> sorted state abbreviations
+    states_by_city: dict[str, tuple[str, ...]]
+    # Candidate pools for fuzzy city matching: every city name, and the city names per state
+    city_names: tuple[str, ...]
+    city_names_by_state: dict[str, tuple[str, ...]]
+    # Standard zip code -> population, for population-weighted sampling
+    population_by_zipcode: dict[str, int]
+
+    def __init__(self, rows: list[tuple[str, str, str | None, str | None, int | None]]):
+        """
+            :param rows: (zipcode, zipcode_type, major_city, state, population) tuples.
+        """
+        cities_by_state: dict[str, set[str]] = {}
+        zipcodes_by_state: dict[str, list[str]] = {}
+        zipcodes_by_city: dict[tuple[str, str], list[str]] = {}
+        states_by_city: dict[str, set[str]] = {}
+        all_cities_by_state: dict[str, set[str]] = {}
+        self.city_state_by_zipcode = {}
+        self.population_by_zipcode = {}
+
+        for zipcode, zipcode_type, city, state, population in rows:
+            if not state:
+                continue
+
+            if city:
+                self.city_state_by_zipcode[zipcode] = (city, state)
+                all_cities_by_state.setdefault(state, set()).add(city)
+
+            if zipcode_type != "STANDARD":
+                continue
+
+            zipcodes_by_state.setdefault(state, []).append(zipcode)
+            self.population_by_zipcode[zipcode] = population or 0
+            if city:
+                cities_by_state.setdefault(state, set()).add(city)
+                zipcodes_by_city.setdefault((city.casefold(), state), []).append(zipcode)
+                states_by_city.setdefault(city.casefold(), set()).add(state)
+
+        self.cities_by_state = {k: tuple(sorted(v)) for k, v in cities_by_state.items()}
+        self.zipcodes_by_state = {k: tuple(sorted(v)) for k, v in zipcodes_by_state.items()}
+        self.zipcodes_by_city = {k: tuple(sorted(v)) for k, v in zipcodes_by_city.items()}
+        self.states_by_city = {k: tuple(sorted(v)) for k, v in states_by_city.items()}
+        self.city_names_by_state = {k: tuple(sorted(v)) for k, v in all_cities_by_state.items()}
+        self.city_names = tuple(sorted(set().union(*all_cities_by_state.values())))
+
+        self._fuzzy_cache: dict[tuple[str, str | None], str | None] = {}
+
+        # Alias tables for population-weighted sampling, each built the first time it is needed
+        self._state_sampler: WeightedSampler | None = None
+        self._city_samplers: dict[str, WeightedSampler | None] = {}
+        self._zipcode_samplers: dict[tuple[str, str], WeightedSampler | None] = {}
+
+    def match_city(self, city_name: str, state_abbr: str | None = None) -> str | None:
+        """
+            Resolve a user-supplied city name to a city in the index. Exact (case-insensitive) names are
+            used as is; anything else goes through the same fuzzy match uszipcode uses, and the outcome
+            is cached so repeated lookups of the same name stay cheap.
+
+            :param city_name: The city name to resolve.
+            :param state_abbr: If given, only cities in this state are considered.
+            :return: The case-folded city name, or None if nothing is similar enough.
+        """
+        key = city_name.casefold()
+        if state_abbr is None:
+            if key in self.states_by_city:
+                return key
+        elif (key, state_abbr) in self.zipcodes_by_city:
+            return key
+
+        cache_key = (key, state_abbr)
+        if cache_key in self._fuzzy_cache:
+            return self._fuzzy_cache[cache_key]
+
+        pool = self.city_names if state_abbr is None else self.city_names_by_state.get(state_abbr, ())
+        match = None
+        if pool:
+            # fuzzywuzzy is a uszipcode dependency; only import it once a fuzzy match is actually needed.
+            from fuzzywuzzy.process import extractOne
+            candidate, confidence = extractOne(city_name, pool)
+            if confidence >= CITY_MATCH_MIN_SIMILARITY:
+                match = candidate.casefold()
+
+        self._fuzzy_cache[cache_key] = match
+        return match
+
+    def state_sampler(self) -> WeightedSampler:
+        """
+            Get the alias table picking a state abbreviation by the total population of its standard zip codes.
+        """
+        if self._state_sampler is None:
+            self._state_sampler = WeightedSampler([
+                (sum(self.population_by_zipcode[z] for z in zipcodes), state)
+                for state, zipcodes in sorted(self.zipcodes_by_state.items())
+            ])
+        return self._state_sampler
+
+    def city_sampler(self, state_abbr: str) -> WeightedSampler | None:
+        """
+            Get the alias table picking a city in a state by the total population of its standard zip codes.
+
+            :return: The sampler, or None if the state has no populated cities.
+        """
+        if state_abbr not in self._city_samplers:
+            options = [
+                (sum(self.population_by_zipcode[z] for z in self.zipcodes_by_city[(city.casefold(), state_abbr)]), city)
+                for city in self.cities_by_state.get(state_abbr, ())
+            ]
+            self._city_samplers[state_abbr] = WeightedSampler(options) if any(weight > 0 for weight, _ in options) else None
+        return self._city_samplers[state_abbr]
+
+    def zipcode_sampler(self, city_key: str, state_abbr: str) -> WeightedSampler | None:
+        """
+            Get the alias table picking one of a city's standard zip codes by population.
+
+            :param city_key: The case-folded city name, as returned by `match_city`.
+            :return: The sampler, or None if none of the city's zip codes are populated.
+        """
+        key = (city_key, state_abbr)
+        if key not in self._zipcode_samplers:
+            options = [(self.population_by_zipcode[z], z) for z in self.zipcodes_by_city.get(key, ())]
+            self._zipcode_samplers[key] = WeightedSampler(options) if any(weight > 0 for weight, _ in options) else None
+        return self._zipcode_samplers[key]
+
+# Built once per process by get_location_index()
+location_index: LocationIndex | None = None
+
+def get_location_index(log: bool = False) -> LocationIndex:
+    """
+        Load (or return the already loaded) location index from the simple uszipcode database.
+        The database is downloaded by uszipcode the first time if it is not present.
+    """
+    global location_index
+
+    if location_index is not None:
+        return location_index
+
+    import sqlalchemy as sa
+    from uszipcode import SearchEngine
+
+    # simple_zipcode=True is faster and sufficient for just names/numbers
+    engine = SearchEngine(simple_or_comprehensive=SearchEngine.SimpleOrComprehensiveArgEnum.simple)
+    try:
+        zip_klass = engine.zip_klass
+        rows = engine.ses.execute(
+            sa.select(zip_klass.zipcode, zip_klass.zipcode_type, zip_klass.major_city, zip_klass.state, zip_klass.population)
+        ).all()
+    finally:
+        engine.close()
+
+    location_index = LocationIndex([tuple(row) for row in rows])
+    if log: logger.info("Loaded location index with %s zip codes.", len(location_index.city_state_by_zipcode))
+    return location_index
+
+class USState(NamedTuple):
+    name: str
+    abbr: str
+    fips: str
+
+# Built once per process by get_state_table(). The tuples are never mutated, unlike the `us` library's
+# own lists, so they can be handed out directly.
+us_states: tuple[USState, ...] | None = None
+us_states_and_territories: tuple[USState, ...] | None = None
+# Case-folded name, abbreviation or FIPS code -> state. Like the tuples, never mutated once built.
+state_lookup: dict[str, USState] | None = None
+# Case-folded keys missing from state_lookup -> what `us.states.lookup` resolved them to, if anything
+state_lookup_misses: dict[str, USState | None] = {}
+
+def get_state_table() -> tuple[tuple[USState, ...], tuple[USState, ...], dict[str, USState]]:
+    """
+        Build (or return the already built) state table from the `us` library.
+
+        :return: A (states, states and territories, lookup) tuple. The lookup also covers the District of Columbia.
+    """
+    global us_states
+    global us_states_and_territories
+    global state_lookup
+
+    if us_states is not None and us_states_and_territories is not None and state_lookup is not None:
+        return us_states, us_states_and_territories, state_lookup
+
+    def to_entry(state) -> USState:
+        return USState(str(state.name), str(state.abbr), str(state.fips))
+
+    states = tuple(to_entry(state) for state in us.states.STATES)
+    states_and_territories = states + tuple(to_entry(state) for state in us.states.TERRITORIES)
+
+    lookup: dict[str, USState] = {}
+    for state in us.states.STATES_AND_TERRITORIES:
+        entry = to_entry(state)
+        for key in (entry.name, entry.abbr, entry.fips):
+            lookup[key.casefold()] = entry
+
+    us_states = states
+    us_states_and_territories = states_and_territories
+    state_lookup = lookup
+    return us_states, us_states_and_territories, state_lookup
+
+def get_all_us_states(include_territories: bool=True) -> tuple[USState, ...]:
     """
-        Get a list of all US states (and optionally territories) with their names and abbreviations.
+        Get all US states (and optionally territories) with their names, abbreviations and FIPS codes.
         :param include_territories: Whether to include US territories in the list.
-        :return: A list of dictionaries with 'name' and 'abbr' keys.
+        :return: A tuple of USState entries.
     """
-    state_list = us.states.STATES
-    if include_territories:
-        state_list += us.states.TERRITORIES
+    states, states_and_territories, _ = get_state_table()
+    return states_and_territories if include_territories else states
+
+def lookup_state(name_or_abbr: str) -> USState | None:
+    """
+        Find a state by its name, abbreviation or FIPS code, ignoring case. Anything else (e.g. a misspelled name)
+        goes through the phonetic matching of `us.states.lookup` once, and the outcome is cached.
+    """
+    _, _, lookup = get_state_table()
+    key = name_or_abbr.strip().casefold()
+
+    if key in lookup:
+        return lookup[key]
+    if key in state_lookup_misses:
+        return state_lookup_misses[key]
 
-    return [{"name": state.name, "abbr": state.abbr} for state in state_list]
+    state = us.states.lookup(name_or_abbr.strip())
+    entry = lookup.get(str(state.abbr).casefold()) if state else None
+    state_lookup_misses[key] = entry
+    return entry
 
 def normalize_state_name(name_or_abbr: str | None, get_abbr: bool=False) -> str | None:
     """
@@ -27,69 +258,65 @@ def normalize_state_name(name_or_abbr: str | None, get_abbr: bool=False) -> str
     """
     if not name_or_abbr:
         return None
-    state = us.states.lookup(name_or_abbr)
+    state = lookup_state(name_or_abbr)
 
     if get_abbr:
         return state.abbr if state else None
     else:
         return state.name if state else None
 
-def get_cities_by_state(name_or_abbr: str | None) -> list[str]:
+def get_cities_by_state(name_or_abbr: str | None) -> tuple[str, ...]:
     """
         Returns a sorted list of all major cities in a given state abbreviation.
         Example: get_cities_by_state('IN') -> ['Anderson', 'Bloomington', ...]
 
         :param name_or_abbr: The state name or abbreviation.
-        :return: A sorted list of major city names in that state.
+        :return: A sorted tuple of major city names in that state.
     """
     if not name_or_abbr:
-        return []
+        return ()
     name_or_abbr = normalize_state_name(name_or_abbr, True)
     if not name_or_abbr:
-        return []
-    
-    results = engine.by_state(name_or_abbr, returns=0)
-    
-    # Use a set to remove duplicates, as many zip codes map to the same city
-    unique_cities = set()
-    for zipcode_obj in results:
-        if zipcode_obj.major_city:
-            unique_cities.add(zipcode_obj.major_city)
-            
-    return sorted(list(unique_cities))
-
-def get_zipcodes_by_city(city_name: str, state_name_or_abbr: str | None) -> list[str]:
-    """
-        Returns a list of valid zip codes for a specific city and state.
+        return ()
+
+    return get_location_index().cities_by_state.get(name_or_abbr, ())
+
+def get_zipcodes_by_city(city_name: str, state_name_or_abbr: str | None) -> tuple[str, ...]:
+    """
+        Returns the valid zip codes for a specific city and state.
+        The city name is matched fuzzily if there is no exact match in the state.
 
         :param city_name: The name of the city.
         :param state_name_or_abbr: The state name or abbreviation.
-        :return: A list of zip code strings for that city.
+        :return: A sorted tuple of zip code strings for that city.
     """
     if not state_name_or_abbr:
-        return []
+        return ()
     state_abbr = normalize_state_name(state_name_or_abbr, True)
     if not state_abbr:
-        return []
-    
-    results = engine.by_city_and_state(city_name, state_abbr, returns=0)
-    return [res.zipcode for res in results]
+        return ()
 
-def get_zipcodes_by_state(name_or_abbr: str | None) -> list[str]:
+    index = get_location_index()
+    city_key = index.match_city(city_name, state_abbr)
+    if city_key is None:
+        return ()
+
+    return index.zipcodes_by_city.get((city_key, state_abbr), ())
+
+def get_zipcodes_by_state(name_or_abbr: str | None) -> tuple[str, ...]:
     """
-        Returns a list of all zip codes in a given state abbreviation.
+        Returns all zip codes in a given state abbreviation.
 
         :param name_or_abbr: The state name or abbreviation.
-        :return: A list of zip code strings for that state.
+        :return: A sorted tuple of zip code strings for that state.
     """
     if not name_or_abbr:
-        return []
+        return ()
     name_or_abbr = normalize_state_name(name_or_abbr, True)
     if not name_or_abbr:
-        return []
+        return ()
 
-    results = engine.by_state(name_or_abbr, returns=0)
-    return [res.zipcode for res in results]
+    return get_location_index().zipcodes_by_state.get(name_or_abbr, ())
 
 def get_city_state_by_zipcode(zipcode: str) -> tuple[str, str] | None:
     """
@@ -98,29 +325,117 @@ def get_city_state_by_zipcode(zipcode: str) -> tuple[str, str] | None:
         :param zipcode: The zip code string.
         :return: The (city, state) tuple, or None if not found.
     """
-    result = engine.by_zipcode(zipcode)
+    result = get_location_index().city_state_by_zipcode.get(zipcode.zfill(5))
 
     if result is not None:
-        # The city and state will be columns. We need to convert to str to avoid type issues.
-        city = str(result.major_city)
-        state = normalize_state_name(str(result.state))
+        city, state_abbr = result
+        state = normalize_state_name(state_abbr)
 
         if not state:
             return None
 
         return (city, state)
-        
-    
+
     return None
 
-def find_states_with_city(city_name: str) -> list[str]:
+def find_states_with_city(city_name: str) -> tuple[str, ...]:
     """
-    Returns a sorted list of State Abbreviations that contain
-    a city with the given name.
+    Returns a sorted tuple of State Abbreviations that contain
+    a city with the given name. The name is matched fuzzily if there is no exact match.
     """
-    results = engine.query(city=city_name, returns=0)
-    
-    # Use a set comprehension to extract unique state abbreviations
-    found_states = {res.state for res in results}
-    
-    return sorted(list(found_states))
\ No newline at end of file
+    index = get_location_index()
+    city_key = index.match_city(city_name)
+    if city_key is None:
+        return ()
+
+    return index.states_by_city.get(city_key, ())
+
+def pick_state_by_population(rng: RandomSource | None = None) -> str:
+    """
+        Pick a random state abbreviation with probability proportional to its population.
+
+        :param rng: The generator to draw from. If None, the global random module is used.
+    """
+    return get_location_index().state_sampler().draw(rng)
+
+def pick_states_by_population(n: int, rng: RandomSource | None = None) -> list[str]:
+    """
+        Vectorized `pick_state_by_population`. Picks `n` state abbreviations independently, all at once.
+
+        :param rng: The generator to draw from. If None, one is seeded from the global random module.
+    """
+    return get_location_index().state_sampler().sample(n, rng)
+
+def pick_city_by_population(name_or_abbr: str | None, rng: RandomSource | None = None) -> str | None:
+    """
+        Pick a random major city in a state with probability proportional to its population.
+
+        :param name_or_abbr: The state name or abbreviation.
+        :param rng: The generator to draw from. If None, the global random module is used.
+        :return: The city name, or None if the state is unknown or has no population data.
+    """
+    if not name_or_abbr:
+        return None
+    state_abbr = normalize_state_name(name_or_abbr, True)
+    if not state_abbr:
+        return None
+
+    sampler = get_location_index().city_sampler(state_abbr)
+    return sampler.draw(rng) if sampler is not None else None
+
+def pick_cities_by_population(name_or_abbr: str | None, n: int, rng: RandomSource | None = None) -> list[str] | None:
+    """
+        Vectorized `pick_city_by_population`. Picks `n` major cities in a state independently, all at once.
+
+        :return: The city names, or None if the state is unknown or has no population data.
+    """
+    if not name_or_abbr:
+        return None
+    state_abbr = normalize_state_name(name_or_abbr, True)
+    if not state_abbr:
+        return None
+
+    sampler = get_location_index().city_sampler(state_abbr)
+    return sampler.sample(n, rng) if sampler is not None else None
+
+def pick_zipcode_by_population(city_name: str, state_name_or_abbr: str | None, rng: RandomSource | None = None) -> str | None:
+    """
+        Pick a random zip code for a city and state with probability proportional to its population.
+        The city name is matched the same way as in `get_zipcodes_by_city`.
+
+        :param rng: The generator to draw from. If None, the global random module is used.
+        :return: The zip code, or None if there is no match or no population data.
+    """
+    if not state_name_or_abbr:
+        return None
+    state_abbr = normalize_state_name(state_name_or_abbr, True)
+    if not state_abbr:
+        return None
+
+    index = get_location_index()
+    city_key = index.match_city(city_name, state_abbr)
+    if city_key is None:
+        return None
+
+    sampler = index.zipcode_sampler(city_key, state_abbr)
+    return sampler.draw(rng) if sampler is not None else None
+
+def pick_zipcodes_by_population(city_name: str, state_name_or_abbr: str | None, n: int, rng: RandomSource | None = None) -> list[str] | None:
+    """
+        Vectorized `pick_zipcode_by_population`. Picks `n` zip codes for a city and state independently, all at once.
+
+        :return: The zip codes, or None if there is no match or no population data.
+    """
+    if not state_name_or_abbr:
+        return None
+    state_abbr = normalize_state_name(state_name_or_abbr, True)
+    if not state_abbr:
+        return None
+
+    index = get_location_index()
+    city_key = index.match_city(city_name, state_abbr)
+    if city_key is None:
+        return None
+
+    sampler = index.zipcode_sampler(city_key, state_abbr)
+    return sampler.sample(n, rng) if sampler is not None else None
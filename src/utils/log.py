@@ -0,0 +1,76 @@
+import logging
+import sys
+from typing import TextIO
+from colorama import Fore
+
+# Every logger of the tool is a child of this one (e.g. "info_gen.address"), so one call configures them all
+ROOT_LOGGER_NAME = "info_gen"
+
+# Between INFO and WARNING: the few lines that sum up a whole run
+SUMMARY = 25
+logging.addLevelName(SUMMARY, "SUMMARY")
+
+# Levels accepted by --log-level, from the most to the least verbose:
+# - debug: a line per generated item (each address lookup, each typo, each clamped value...)
+# - info: a line per batch or step
+# - summary: only the end-of-run summary
+# - warning/error: only problems
+LOG_LEVELS: dict[str, int] = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "summary": SUMMARY,
+    "warning": logging.WARNING,
+    "error": logging.ERROR
+}
+DEFAULT_LOG_LEVEL = "info"
+
+def get_logger(name: str) -> logging.Logger:
+    """
+        Get the logger for one part of the tool, e.g. get_logger("address").
+
+        Pass message arguments separately instead of formatting them into the message
+        (`logger.debug("Picked state '%s'.", state)`), so that nothing is formatted unless the message's level is
+        enabled. Until `configure_logging` is called, only warnings and errors are shown.
+    """
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+class LogFormatter(logging.Formatter):
+    """
+        Diagnostics are printed as they are. Warnings and errors are prefixed with their level and colored,
+        like warnings from `warn` (see `utils.output`).
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        if record.levelno >= logging.ERROR:
+            return Fore.RED + f"{record.levelname.title()}: {message}" + Fore.RESET
+        if record.levelno >= logging.WARNING:
+            return Fore.YELLOW + f"{record.levelname.title()}: {message}" + Fore.RESET
+        return message
+
+def configure_logging(level: str | int = DEFAULT_LOG_LEVEL, stream: TextIO | None = None) -> logging.Logger:
+    """
+        Show the tool's log messages at or above the given level. Replaces any earlier configuration.
+
+        :param level: One of LOG_LEVELS, or a numeric logging level.
+        :param stream: Where to write the messages. Defaults to standard error, so that standard output only
+        carries the generated values.
+        :return: The root logger of the tool.
+    """
+    if isinstance(level, str):
+        if level not in LOG_LEVELS:
+            raise ValueError(f"Unknown log level '{level}'. Valid levels are: {', '.join(LOG_LEVELS)}.")
+        level = LOG_LEVELS[level]
+
+    root_logger = logging.getLogger(ROOT_LOGGER_NAME)
+    root_logger.setLevel(level)
+    # Messages stop here instead of also reaching handlers set up on Python's root logger
+    root_logger.propagate = False
+
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+
+    handler = logging.StreamHandler(stream if stream is not None else sys.stderr)
+    handler.setFormatter(LogFormatter("%(message)s"))
+    root_logger.addHandler(handler)
+
+    return root_logger
@@ -1,5 +1,22 @@
-import random
-from typing import Callable, Any
+import logging
+import numpy as np
+from typing import Callable, Any, Sequence
+from .seeding import RandomSource, resolve_random, resolve_generator
+from .log import get_logger
+
+logger = get_logger("math")
+
+# Bounds of the int64 columns batch helpers produce. Integers with more than INT64_SAFE_DIGITS digits may not fit.
+INT64_MIN = int(np.iinfo(np.int64).min)
+INT64_MAX = int(np.iinfo(np.int64).max)
+INT64_SAFE_DIGITS = 18
+
+def saturate_int64(value: int) -> int:
+    """
+        Clamp an integer of any size to the int64 range. Clamping the result to a narrower range afterwards gives
+        the same value as clamping the original integer would.
+    """
+    return clamp(value, INT64_MIN, INT64_MAX)
 
 def clamp(value: int, min_value: int, max_value: int, log: bool = False) -> int:
     """
@@ -7,22 +24,24 @@ def clamp(value: int, min_value: int, max_value: int, log: bool = False) -> int:
     """
     if value < min_value:
         if log:
-            print(f"Clamping value {value} to minimum {min_value}.")
+            logger.debug("Clamping value %s to minimum %s.", value, min_value)
         return min_value
     elif value > max_value:
         if log:
-            print(f"Clamping value {value} to maximum {max_value}.")
+            logger.debug("Clamping value %s to maximum %s.", value, max_value)
         return max_value
     return value
 
 
-def randint_from_input(i: str | int, fallback: Callable[[], int] | None = None, log: bool = False) -> int:
+def randint_from_input(i: str | int, fallback: Callable[[], int] | None = None, log: bool = False, *, rng: RandomSource | None = None) -> int:
     """
         If the input is an integer, return it as-is. If it's a string with at least one digit character,
         replace any non-digit characters with random digits independently, and return the resulting integer.
         If there are no digit characters and a fallback is provided, call the fallback to get a value.
         If there are no digit characters and no fallback is provided, generate a random integer of the same length
         as the input string.
+
+        :param rng: The generator to draw random digits from. If None, the global random module is used.
     """
     if isinstance(i, int):
         result = i
@@ -33,35 +52,103 @@ def randint_from_input(i: str | int, fallback: Callable[[], int] | None = None,
             if callable(fallback) and not any(c.isdigit() for c in i):
                 result = fallback()
                 if log:
-                    print(f"Input '{i}' has no digits; used fallback function to generate integer {result}.")
+                    logger.debug("Input '%s' has no digits; used fallback function to generate integer %s.", i, result)
                 return result
 
+            rng = resolve_random(rng)
             result_str = ""
             for c in i:
                 if c.isdigit():
                     result_str += c
                 else:
-                    result_str += str(random.randint(0, 9))
+                    result_str += str(rng.randint(0, 9))
 
             if log:
-                print(f"Transformed input with digits '{i}' into integer {result_str} by replacing non-digits with random digits.")
+                logger.debug("Transformed input with digits '%s' into integer %s by replacing non-digits with random digits.", i, result_str)
 
             result = int(result_str)
 
     return result
 
-def rand_pick_dstrb(options: list[tuple[int, Any]]) -> Any:
+def clamp_batch(values: np.ndarray, min_value: int, max_value: int, log: bool = False) -> np.ndarray:
+    """
+        Vectorized `clamp`. Clamps every value in an array between a minimum and maximum value, inclusive on both ends.
+    """
+    # Counting is skipped entirely unless the message would be shown
+    if log and logger.isEnabledFor(logging.INFO):
+        below = int(np.count_nonzero(values < min_value))
+        above = int(np.count_nonzero(values > max_value))
+        if below:
+            logger.info("Clamping %s value(s) to minimum %s.", below, min_value)
+        if above:
+            logger.info("Clamping %s value(s) to maximum %s.", above, max_value)
+    return np.clip(values, min_value, max_value)
+
+def randint_from_input_batch(
+    i: str | int,
+    count: int,
+    fallback: Callable[[int], np.ndarray] | None = None,
+    rng: RandomSource | None = None,
+    log: bool = False
+) -> np.ndarray:
+    """
+        Vectorized `randint_from_input`. Produces `count` integers from the same input, drawing every
+        random digit position for all of them at once.
+
+        :param fallback: Called with `count` to get the values when the input has no digit characters.
+        :param rng: The generator to draw random digits from. If None, one is seeded from the global random module.
+        :return: An int64 array of length `count`. Values too large (or small) for an int64 are saturated to its
+        bounds (see `saturate_int64`), so clamping them afterwards agrees with `randint_from_input`.
+    """
+    if isinstance(i, int):
+        return np.full(count, saturate_int64(i), dtype=np.int64)
+
+    try:
+        return np.full(count, saturate_int64(int(i)), dtype=np.int64)
+    except ValueError:
+        pass
+
+    if callable(fallback) and not any(c.isdigit() for c in i):
+        if log:
+            logger.info("Input '%s' has no digits; used fallback function to generate %s integer(s).", i, count)
+        return fallback(count)
+
+    rng = resolve_generator(rng)
+
+    # Longer patterns could wrap around in int64 arithmetic, so they are built from Python ints and saturated
+    long_pattern = len(i) > INT64_SAFE_DIGITS
+    result = np.zeros(count, dtype=object if long_pattern else np.int64)
+    for c in i:
+        result *= 10
+        if c.isdigit():
+            result += int(c)
+        else:
+            digits = rng.integers(0, 10, size=count)
+            result += digits.astype(object) if long_pattern else digits
+
+    if long_pattern:
+        result = np.clip(result, INT64_MIN, INT64_MAX).astype(np.int64)
+
+    if log:
+        logger.info("Transformed input with digits '%s' into %s integer(s) by replacing non-digits with random digits.", i, count)
+
+    return result
+
+def rand_pick_dstrb(options: list[tuple[int, Any]], rng: RandomSource | None = None) -> Any:
     """
         Given a list of (weight, value) pairs, randomly pick a value according to the distribution of weights.
+        This walks the whole list on every call; to pick repeatedly from the same distribution, build a
+        `WeightedSampler` once instead.
 
         :param options: A list of (weight, value) pairs. Weights should be non-negative integers, and at least one should be greater than 0.
+        :param rng: The generator to draw from. If None, the global random module is used.
         :return: A randomly picked value from the options, with probability proportional to its weight.
     """
     total_weight = sum(weight for weight, _ in options)
     if total_weight == 0:
         raise ValueError("Total weight must be greater than 0.")
     
-    r = random.uniform(0, total_weight)
+    r = resolve_random(rng).uniform(0, total_weight)
     cumulative_weight = 0
     for weight, value in options:
         cumulative_weight += weight
@@ -69,4 +156,89 @@ def rand_pick_dstrb(options: list[tuple[int, Any]]) -> Any:
             return value
     
     # In case of rounding errors, return the last value
-    return options[-1][1]
\ No newline at end of file
+    return options[-1][1]
+
+class WeightedSampler:
+    """
+        Picks values with probability proportional to their weights in O(1) per draw, using an alias table
+        (Vose's alias method) built once in O(n). Each draw is one uniform slot pick plus one biased coin flip,
+        no matter how many options there are.
+
+        :param options: A list of (weight, value) pairs. Weights should be non-negative, and at least one should be greater than 0.
+    """
+    values: list[Any]
+
+    def __init__(self, options: Sequence[tuple[float, Any]]):
+        weights = np.array([weight for weight, _ in options], dtype=np.float64)
+        if (weights < 0).any():
+            raise ValueError("Weights must be non-negative.")
+        if len(weights) == 0 or weights.sum() <= 0:
+            raise ValueError("Total weight must be greater than 0.")
+
+        self.values = [value for _, value in options]
+
+        n = len(weights)
+        scaled = (weights * (n / weights.sum())).tolist()
+        prob = [1.0] * n
+        alias = list(range(n))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+
+            # Slot `less` keeps its own value with probability scaled[less], and hands the rest to `more`
+            prob[less] = scaled[less]
+            alias[less] = more
+
+            scaled[more] = (scaled[more] + scaled[less]) - 1.0
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+        # Anything left over is full up to rounding error, so it always keeps its own value (prob stays 1).
+
+        # Plain lists are faster than NumPy for single draws; the arrays serve vectorized sampling.
+        self._prob = prob
+        self._alias = alias
+        self._prob_array = np.array(prob, dtype=np.float64)
+        self._alias_array = np.array(alias, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def draw_index(self, rng: RandomSource | None = None) -> int:
+        """
+            Pick the index of one option.
+
+            :param rng: The generator to draw from. If None, the global random module is used, so that seeded runs repeat.
+        """
+        rng = resolve_random(rng)
+        slot = rng.randrange(len(self._prob))
+        return slot if rng.random() < self._prob[slot] else self._alias[slot]
+
+    def draw(self, rng: RandomSource | None = None) -> Any:
+        """
+            Pick one value with probability proportional to its weight.
+        """
+        return self.values[self.draw_index(rng)]
+
+    def sample_indices(self, n: int, rng: RandomSource | None = None) -> np.ndarray:
+        """
+            Vectorized `draw_index`. Picks `n` option indices independently, all at once.
+
+            :param rng: The generator to draw from. If None, one is seeded from the global random module.
+            :return: An int64 array of length `n`.
+        """
+        rng = resolve_generator(rng)
+
+        slots = rng.integers(0, len(self._prob), size=n)
+        keep = rng.random(n) < self._prob_array[slots]
+        return np.where(keep, slots, self._alias_array[slots])
+
+    def sample(self, n: int, rng: RandomSource | None = None) -> list[Any]:
+        """
+            Vectorized `draw`. Picks `n` values independently, all at once.
+        """
+        return [self.values[i] for i in self.sample_indices(n, rng).tolist()]
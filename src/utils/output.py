@@ -1,10 +1,15 @@
 # A file for utility functions used by the uv script. You could put more utilities here as needed.
 from datetime import datetime
 import os
+import re
 import warnings
 from colorama import Fore
+from .log import get_logger
 
-# Always show user warnings to the console
+logger = get_logger("warnings")
+
+# Always pass user warnings on to warnings.showwarning, so that the aggregator (see aggregate_warnings) sees
+# every occurrence
 warnings.simplefilter('always', UserWarning)
 
 # Make warnings print in one line
@@ -13,6 +18,71 @@ def warning_on_one_line(message, category, filename, lineno, file=None, line=Non
 
 warnings.formatwarning = warning_on_one_line
 
+# The values that vary between warnings of the same kind: quoted strings and numbers
+WARNING_VALUE_REGEX = re.compile(r"'[^']*'|\d+(?:\.\d+)?")
+
+def get_warning_template(message: str) -> str:
+    """
+        Get the template of a warning message, with the values that vary between occurrences replaced by
+        placeholders, e.g. "The specified SSN start (123) means 5 of..." -> "The specified SSN start (<n>) means <n> of...".
+    """
+    return WARNING_VALUE_REGEX.sub(lambda match: "'<value>'" if match.group().startswith("'") else "<n>", message)
+
+class WarningAggregator:
+    """
+        Replaces `warnings.showwarning` while installed, so that each kind of warning (its category and message
+        template) is shown the first time it is raised and only counted after that. A bulk run that raises the
+        same warning for every value then costs one line of output instead of one per value.
+    """
+    def __init__(self):
+        # (category, template) -> number of times raised, in the order first raised
+        self.counts: dict[tuple[type[Warning], str], int] = {}
+        self.original_showwarning = None
+
+    def showwarning(self, message, category, filename, lineno, file=None, line=None) -> None:
+        key = (category, get_warning_template(str(message)))
+        count = self.counts.get(key, 0)
+        self.counts[key] = count + 1
+
+        if count == 0:
+            self.original_showwarning(message, category, filename, lineno, file, line)
+
+    def install(self) -> "WarningAggregator":
+        if self.original_showwarning is None:
+            self.original_showwarning = warnings.showwarning
+            warnings.showwarning = self.showwarning
+        return self
+
+    def uninstall(self) -> None:
+        if self.original_showwarning is not None:
+            warnings.showwarning = self.original_showwarning
+            self.original_showwarning = None
+
+    def report(self) -> None:
+        """
+            Log how many times each warning that was raised more than once was raised in total.
+        """
+        for (category, template), count in self.counts.items():
+            if count > 1:
+                logger.warning("%s was raised %s time(s) in total (%s not shown): %s", category.__name__, count, count - 1, template)
+
+    def __enter__(self) -> "WarningAggregator":
+        return self.install()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.uninstall()
+        self.report()
+
+def aggregate_warnings() -> WarningAggregator:
+    """
+        Show each kind of warning once while the returned aggregator is installed, and report how often each
+        was raised once it is uninstalled. Use as a context manager:
+
+        with aggregate_warnings():
+            ...
+    """
+    return WarningAggregator()
+
 def get_latest_main_outputs_dir() -> str:
     now: datetime = datetime.now()
     result: str = f"./src/outputs/main/{now.year}/{now.month:02d}/{now.day:02d}"
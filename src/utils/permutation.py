@@ -0,0 +1,72 @@
+import numpy as np
+
+MASK_64 = (1 << 64) - 1
+
+def splitmix64(x: int) -> int:
+    """
+        One step of the SplitMix64 mixer on a Python integer. Used to derive independent round keys.
+    """
+    x = (x + 0x9E3779B97F4A7C15) & MASK_64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK_64
+    return x ^ (x >> 31)
+
+class FeistelPermutation:
+    """
+        A keyed pseudorandom permutation of the integers [0, size), built from a balanced Feistel network
+        with cycle walking. It is a format-preserving cipher over the index domain: every index maps to
+        a distinct index in the same range, so walking a counter through it visits every value exactly once
+        in a shuffled order, using O(1) memory. The same size and key always give the same permutation.
+    """
+    size: int
+    rounds: int
+
+    def __init__(self, size: int, key: int, rounds: int = 8):
+        if size < 1:
+            raise ValueError("Permutation size must be at least 1.")
+
+        self.size = size
+        self.rounds = rounds
+
+        # Smallest even bit width covering the domain, so the network can be split into equal halves.
+        self._half_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+        self._half_mask = np.uint64((1 << self._half_bits) - 1)
+
+        # Mix the size into the key so that domains sharing a bit width still get unrelated permutations.
+        round_keys = []
+        state = (key ^ splitmix64(size)) & MASK_64
+        for _ in range(rounds):
+            state = splitmix64(state)
+            round_keys.append(state)
+        self._round_keys = [np.uint64(k) for k in round_keys]
+
+    def _round(self, half: np.ndarray, round_key: np.uint64) -> np.ndarray:
+        # A cheap keyed mixer; it only needs to look random, not be cryptographically strong.
+        x = half ^ round_key
+        x = (x ^ (x >> np.uint64(33))) * np.uint64(0xFF51AFD7ED558CCD)
+        x = (x ^ (x >> np.uint64(33))) * np.uint64(0xC4CEB9FE1A85EC53)
+        x = x ^ (x >> np.uint64(33))
+        return x & self._half_mask
+
+    def _encrypt(self, values: np.ndarray) -> np.ndarray:
+        shift = np.uint64(self._half_bits)
+        left = values >> shift
+        right = values & self._half_mask
+        for round_key in self._round_keys:
+            left, right = right, left ^ self._round(right, round_key)
+        return (left << shift) | right
+
+    def permute(self, indices: np.ndarray) -> np.ndarray:
+        """
+            Map each index in [0, size) to its position in the permutation.
+        """
+        values = self._encrypt(np.asarray(indices, dtype=np.uint64))
+
+        # Cycle walking: the network permutes a power-of-4 domain, so re-encrypt anything that
+        # landed outside [0, size) until it comes back in. This keeps the result a bijection.
+        outside = values >= np.uint64(self.size)
+        while outside.any():
+            values[outside] = self._encrypt(values[outside])
+            outside = values >= np.uint64(self.size)
+
+        return values.astype(np.int64)
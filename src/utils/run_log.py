@@ -0,0 +1,165 @@
+import os
+import re
+import sys
+from typing import Any, BinaryIO, TextIO
+
+# Name of the run log in the run's output directory
+RUN_LOG_FILE = "log.txt"
+
+# Text bound for the run log is buffered until about this many bytes are pending, then written in one call
+RUN_LOG_BUFFER_SIZE = 1 << 20
+
+# How many rotated logs (log.txt.1, log.txt.2, ...) are kept when the run log is rotated
+RUN_LOG_BACKUP_COUNT = 5
+
+# Color and cursor codes written by colorama, which only mean something to a terminal
+ANSI_ESCAPE_REGEX = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]')
+ANSI_ESCAPE_BYTES_REGEX = re.compile(rb'\x1b\[[0-9;?]*[A-Za-z]')
+
+class RunLogWriter:
+    """
+        Writes everything a run prints to a log file in one streaming pass: escape codes are stripped, and the
+        text is buffered so that the file sees a few large writes. Optionally rotates the file once it grows past
+        a size, like `logging.handlers.RotatingFileHandler`.
+
+        :param path: The log file. Replaced if it exists.
+        :param max_bytes: Rotate once the file would grow past this many bytes. If None, the file is never rotated.
+        :param backup_count: How many rotated files to keep.
+    """
+    path: str
+    max_bytes: int | None
+    backup_count: int
+    file: BinaryIO | None
+
+    def __init__(self, path: str, max_bytes: int | None = None, backup_count: int = RUN_LOG_BACKUP_COUNT):
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError(f"Run log size limit must be positive, got {max_bytes}.")
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.file = open(path, "wb", buffering=RUN_LOG_BUFFER_SIZE)
+        self.size = 0
+
+    def rotate(self) -> None:
+        """
+            Move the current file to `<path>.1` (shifting older ones up, and dropping the oldest) and start a new one.
+        """
+        self.file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+
+        self.file = open(self.path, "wb", buffering=RUN_LOG_BUFFER_SIZE)
+        self.size = 0
+
+    def write_bytes(self, data: bytes) -> None:
+        if self.file is None:
+            return
+
+        data = ANSI_ESCAPE_BYTES_REGEX.sub(b"", data)
+        # A single write larger than the limit still goes into one file, rather than being split mid-line
+        if self.max_bytes is not None and self.size > 0 and self.size + len(data) > self.max_bytes:
+            self.rotate()
+
+        self.file.write(data)
+        self.size += len(data)
+
+    def write_text(self, text: str) -> None:
+        self.write_bytes(ANSI_ESCAPE_REGEX.sub("", text).encode("utf-8", "replace"))
+
+    def flush(self) -> None:
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+class TeeBuffer:
+    """
+        The binary side of a `TeeStream`: bytes go to the terminal's binary stream as they are, and to the run log.
+    """
+    def __init__(self, terminal: BinaryIO, log: RunLogWriter):
+        self.terminal = terminal
+        self.log = log
+
+    def write(self, data: bytes) -> int:
+        self.log.write_bytes(bytes(data))
+        return self.terminal.write(data)
+
+    def flush(self) -> None:
+        self.terminal.flush()
+        self.log.flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.terminal, name)
+
+class TeeStream:
+    """
+        Stands in for sys.stdout or sys.stderr: text goes to the terminal as it is (colors included) and to the run
+        log without escape codes. Binary writes through `buffer` (see `utils.sink.open_sink`) are logged as well.
+    """
+    def __init__(self, terminal: TextIO, log: RunLogWriter):
+        self.terminal = terminal
+        self.log = log
+        self.buffer = TeeBuffer(terminal.buffer, log) if hasattr(terminal, "buffer") else None
+
+    def write(self, text: str) -> int:
+        self.log.write_text(text)
+        return self.terminal.write(text)
+
+    def writelines(self, lines) -> None:
+        for line in lines:
+            self.write(line)
+
+    def flush(self) -> None:
+        self.terminal.flush()
+        self.log.flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.terminal, name)
+
+# The installed run log, if any
+current_run_log: RunLogWriter | None = None
+
+def start_run_log(path: str, max_bytes: int | None = None, backup_count: int = RUN_LOG_BACKUP_COUNT) -> RunLogWriter:
+    """
+        Copy everything written to standard output and standard error from now on into a log file, until
+        `stop_run_log` is called. Replaces any run log that was already started.
+
+        Loggers hold on to the stream they write to, so start the run log before `utils.log.configure_logging`.
+
+        :param path: The log file. Replaced if it exists.
+        :param max_bytes: Rotate the file once it would grow past this many bytes. If None, it is never rotated.
+        :param backup_count: How many rotated files to keep.
+        :return: The run log's writer.
+    """
+    global current_run_log
+
+    stop_run_log()
+    current_run_log = RunLogWriter(path, max_bytes, backup_count)
+    sys.stdout = TeeStream(sys.stdout, current_run_log)
+    sys.stderr = TeeStream(sys.stderr, current_run_log)
+    return current_run_log
+
+def stop_run_log() -> None:
+    """
+        Restore standard output and standard error, and flush and close the run log.
+    """
+    global current_run_log
+
+    if current_run_log is None:
+        return
+
+    for name in ["stdout", "stderr"]:
+        stream = getattr(sys, name)
+        if isinstance(stream, TeeStream):
+            stream.terminal.flush()
+            setattr(sys, name, stream.terminal)
+
+    current_run_log.close()
+    current_run_log = None
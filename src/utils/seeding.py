@@ -0,0 +1,120 @@
+import hashlib
+import random
+import numpy as np
+
+# Derives independent random streams from one master seed, so that work split across workers, shards or
+# batches is reproducible no matter how it is split. A stream is named by a key path such as
+# ("typos-corpus", 12): the same master seed and key path always give the same stream, and different key
+# paths give statistically independent ones (this is numpy.random.SeedSequence's spawn_key mechanism).
+#
+# Generators take an optional `rng` so that each thread or worker can own its stream instead of sharing the
+# global `random` module. Either kind of generator is accepted; `resolve_random` and `resolve_generator`
+# turn whatever was passed into the kind the code at hand draws from.
+
+# Anything that can be passed as a generator's `rng`
+RandomSource = random.Random | np.random.Generator
+
+class NumpyRandom(random.Random):
+    """
+        A `random.Random` that draws from a NumPy Generator, so code written against the `random` API
+        (randint, choice, uniform...) can consume a NumPy stream.
+    """
+    generator: np.random.Generator
+
+    def __init__(self, generator: np.random.Generator):
+        self.generator = generator
+        # Every draw goes through `random` and `getrandbits`, so the inherited Mersenne Twister is never used;
+        # skip `random.Random.__init__`, which would seed it from the OS. This is the rest of what it sets up.
+        self.gauss_next = None
+
+    def random(self) -> float:
+        return float(self.generator.random())
+
+    def getrandbits(self, k: int) -> int:
+        if k == 0:
+            return 0
+        byte_count = (k + 7) // 8
+        return int.from_bytes(self.generator.bytes(byte_count), "little") >> (8 * byte_count - k)
+
+# The wrapper resolve_random made last, reused while the same NumPy Generator keeps being passed
+numpy_random: NumpyRandom | None = None
+
+def resolve_random(rng: RandomSource | None = None) -> random.Random:
+    """
+        Get a `random.Random` to draw from for the given `rng`. None means the global `random` module's
+        generator, so that unseeded calls and `--seed` behave exactly as before.
+    """
+    global numpy_random
+
+    if rng is None:
+        # The instance behind the module-level functions (random.randint, random.choice...)
+        return random._inst  # type: ignore[attr-defined]
+    if isinstance(rng, np.random.Generator):
+        # Read the cache once, so another thread replacing it cannot hand this one a different stream
+        wrapper = numpy_random
+        if wrapper is None or wrapper.generator is not rng:
+            wrapper = NumpyRandom(rng)
+            numpy_random = wrapper
+        return wrapper
+    return rng
+
+def resolve_generator(rng: RandomSource | None = None) -> np.random.Generator:
+    """
+        Get a NumPy Generator to draw from for the given `rng`. None means a new generator seeded from the
+        global `random` module, and a `random.Random` seeds a new generator from its own stream.
+    """
+    if isinstance(rng, np.random.Generator):
+        return rng
+    return np.random.default_rng(resolve_random(rng).getrandbits(128))
+
+def seed_entropy(seed: int) -> int:
+    """
+        Map any integer seed to the non-negative entropy SeedSequence accepts, without collisions.
+        Non-negative seeds go to the even numbers and negative seeds to the odd ones.
+    """
+    return 2 * seed if seed >= 0 else -2 * seed - 1
+
+def stream_key_part(part: int | str) -> int:
+    """
+        Turn one part of a key path into a spawn key word. Strings are hashed stably (unlike `hash()`,
+        which changes from process to process).
+    """
+    if isinstance(part, str):
+        return int.from_bytes(hashlib.sha256(part.encode("utf-8")).digest()[:4], "little")
+    if part < 0:
+        raise ValueError(f"Stream key parts must be non-negative integers or strings, but got {part}.")
+    return part
+
+def get_seed_sequence(master_seed: int, *key: int | str) -> np.random.SeedSequence:
+    """
+        Get the SeedSequence for the stream at `key` under the master seed.
+    """
+    return np.random.SeedSequence(seed_entropy(master_seed), spawn_key=tuple(stream_key_part(part) for part in key))
+
+def derive_seed(master_seed: int, *key: int | str, bits: int = 128) -> int:
+    """
+        Derive an integer seed for the stream at `key`, e.g. to seed a `random.Random` or Faker.
+
+        :param bits: The size of the seed. Rounded up to a multiple of 32.
+    """
+    words = get_seed_sequence(master_seed, *key).generate_state((bits + 31) // 32)
+    return int.from_bytes(words.astype("<u4").tobytes(), "little")
+
+def spawn_seeds(master_seed: int, count: int, *key: int | str, bits: int = 128) -> list[int]:
+    """
+        Derive `count` independent seeds under `key`, one for each of the children 0 to count - 1,
+        like `SeedSequence.spawn`. Child i always gets the same seed, however many are spawned.
+    """
+    return [derive_seed(master_seed, *key, i, bits=bits) for i in range(count)]
+
+def derive_random(master_seed: int, *key: int | str) -> random.Random:
+    """
+        Get an independent `random.Random` for the stream at `key`.
+    """
+    return random.Random(derive_seed(master_seed, *key))
+
+def derive_generator(master_seed: int, *key: int | str) -> np.random.Generator:
+    """
+        Get an independent NumPy Generator for the stream at `key`.
+    """
+    return np.random.default_rng(get_seed_sequence(master_seed, *key))
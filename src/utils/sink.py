@@ -0,0 +1,151 @@
+import csv
+import json
+import sys
+import numpy as np
+from types import SimpleNamespace
+from typing import Any, BinaryIO, Iterable
+
+# Output formats accepted by `open_sink`
+OUTPUT_FORMATS = ["text", "csv", "jsonl", "columnar"]
+
+# Rendered records are buffered until about this many characters are pending, then written in one call
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+class RecordSink:
+    """
+        Writes records (dicts of field name to value) to a binary stream as they are produced. Records are
+        rendered to text and buffered, so the stream sees a few large writes instead of one per record, and
+        memory stays bounded by the buffer size no matter how many records pass through.
+
+        :param stream: The binary stream to write to.
+        :param fields: The fields of every record, in output order.
+        :param owns_stream: Whether `close` should also close the stream.
+    """
+    stream: BinaryIO
+    fields: list[str]
+    count: int
+
+    def __init__(self, stream: BinaryIO, fields: list[str], owns_stream: bool = False):
+        self.stream = stream
+        self.fields = fields
+        self.owns_stream = owns_stream
+        self.count = 0
+        self._pending: list[str] = []
+        self._pending_size = 0
+
+    def format_record(self, record: dict[str, Any]) -> str:
+        raise NotImplementedError("Subclasses must implement the format_record method")
+
+    def write_text(self, text: str) -> None:
+        """
+            Queue already rendered text, writing the buffer out once it is full.
+        """
+        self._pending.append(text)
+        self._pending_size += len(text)
+        if self._pending_size >= OUTPUT_BUFFER_SIZE:
+            self.flush()
+
+    def write(self, record: dict[str, Any]) -> None:
+        self.write_text(self.format_record(record))
+        self.count += 1
+
+    def write_many(self, records: Iterable[dict[str, Any]]) -> int:
+        """
+            Write every record of an iterable, consuming it lazily.
+
+            :return: The number of records written.
+        """
+        written = 0
+        for record in records:
+            self.write(record)
+            written += 1
+        return written
+
+    def flush(self) -> None:
+        if self._pending:
+            self.stream.write(''.join(self._pending).encode("utf-8"))
+            self._pending.clear()
+            self._pending_size = 0
+        self.stream.flush()
+
+    def close(self) -> None:
+        self.flush()
+        if self.owns_stream:
+            self.stream.close()
+
+    def __enter__(self) -> "RecordSink":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+class TextSink(RecordSink):
+    """
+        Plain text, one record per line. Records with several fields are tab-separated.
+    """
+    def format_record(self, record: dict[str, Any]) -> str:
+        return '\t'.join('' if record.get(field) is None else str(record[field]) for field in self.fields) + '\n'
+
+    def write_fixed_width(self, buffer: np.ndarray) -> None:
+        """
+            Write newline-terminated records already rendered by `format_fixed_width`, without turning them
+            into strings first.
+        """
+        self.flush()
+        self.stream.write(np.ascontiguousarray(buffer).data)
+        self.count += len(buffer)
+
+class CsvSink(RecordSink):
+    """
+        CSV with a header row naming the fields.
+    """
+    def __init__(self, stream: BinaryIO, fields: list[str], owns_stream: bool = False):
+        super().__init__(stream, fields, owns_stream)
+        # The csv module writes each rendered row into this sink's buffer rather than to the stream
+        self._writer = csv.DictWriter(SimpleNamespace(write=self.write_text), fields, lineterminator='\n', extrasaction='ignore')
+        self._writer.writeheader()
+
+    def write(self, record: dict[str, Any]) -> None:
+        self._writer.writerow(record)
+        self.count += 1
+
+class JsonlSink(RecordSink):
+    """
+        JSON Lines: one JSON object per record, keeping the values' types.
+    """
+    def format_record(self, record: dict[str, Any]) -> str:
+        return json.dumps({field: record.get(field) for field in self.fields}, ensure_ascii=False) + '\n'
+
+SINK_TYPES: dict[str, type[RecordSink]] = {
+    "text": TextSink,
+    "csv": CsvSink,
+    "jsonl": JsonlSink
+}
+
+def open_sink(output_format: str, fields: list[str], path: str | None = None, columns: dict[str, str] | None = None) -> RecordSink:
+    """
+        Open a sink for the given output format.
+
+        :param output_format: One of OUTPUT_FORMATS.
+        :param fields: The fields of every record, in output order.
+        :param path: The file to write to (replaced if it exists). None or '-' means standard output.
+        For the columnar format, this is the directory to write the columns to, and it is required.
+        :param columns: For the columnar format, the column types (see `ColumnarSink`). Defaults to
+        dictionary-encoding every field.
+    """
+    if output_format == "columnar":
+        from .columnar import ColumnarSink, DICTIONARY_COLUMN
+
+        if path is None or path == "-":
+            raise ValueError("The columnar format writes a directory of files, so an output path is required.")
+        return ColumnarSink(path, columns if columns is not None else {field: DICTIONARY_COLUMN for field in fields})
+
+    if output_format not in SINK_TYPES:
+        raise ValueError(f"Unknown output format '{output_format}'. Valid formats are: {', '.join(OUTPUT_FORMATS)}.")
+
+    if path is None or path == "-":
+        # Anything printed before this must come out first
+        sys.stdout.flush()
+        return SINK_TYPES[output_format](sys.stdout.buffer, fields)
+
+    return SINK_TYPES[output_format](open(path, "wb"), fields, owns_stream=True)